@@ -0,0 +1,34 @@
+"""Add file size and sha256
+
+Revision ID: 5e2b7f0c9d41
+Revises: c1a696167488
+Create Date: 2026-10-18 09:12:44.517204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e2b7f0c9d41"
+down_revision: Union[str, Sequence[str], None] = "c1a696167488"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("file", sa.Column("size_bytes", sa.BigInteger(), nullable=True))
+    op.add_column(
+        "file",
+        sa.Column("sha256", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("file", "sha256")
+    op.drop_column("file", "size_bytes")
@@ -1,92 +1,88 @@
-import { useState, useEffect, useCallback } from 'react';
-import { io, Socket } from 'socket.io-client';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import type { Message } from '../App'; // Correctly import as a type
 
-// The URL of our WebSocket gateway is no longer needed here
-// as the connection is established with a relative path.
+const API_KEY = import.meta.env.VITE_API_KEY;
 
-// Create the socket instance outside the component to prevent re-creation on re-renders.
-// This is a common pattern to avoid issues with React's strict mode and HMR.
-const socket: Socket = io({
-  transports: ['websocket'], // Use WebSocket transport
-  // Explicitly set the path to match the Nginx proxy config.
-  // The path must start with the location defined in nginx.conf (/ws/)
-  // followed by the standard socket.io path.
-  path: '/ws/socket.io/',
-});
+// Chat is served by the API itself. Nginx (and the Vite dev proxy) forward
+// /api/ws/ to the API's /ws/ endpoints.
+const CHAT_PATH = '/api/ws/chat';
+
+// Delay before reconnecting after the connection drops.
+const RECONNECT_DELAY_MS = 2000;
+
+const chatUrl = () => {
+  const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+  return `${scheme}://${window.location.host}${CHAT_PATH}`;
+};
 
 export const useWebSocket = (addMessage: (message: Omit<Message, 'id'>) => void) => {
-  const [isConnected, setIsConnected] = useState(socket.connected);
+  const [isConnected, setIsConnected] = useState(false);
+  const socketRef = useRef<WebSocket | null>(null);
+  // Tokens of the answer currently being streamed.
+  const answerRef = useRef<string[]>([]);
+  // Keep the latest callback without reconnecting when it changes.
+  const addMessageRef = useRef(addMessage);
+  addMessageRef.current = addMessage;
 
   useEffect(() => {
-    // Connect to the WebSocket server
-    // We use the '/api' path that we configured in vite.config.ts proxy
-    // The socket instance is now global, so we don't need to re-connect here.
-    // We only need to set up event listeners.
+    let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
 
-    // Event listener for successful connection
-    socket.on('connect', () => {
-      console.log('WebSocket connected successfully!');
-      setIsConnected(true);
-    });
+    const connect = () => {
+      const socket = new WebSocket(chatUrl());
+      socketRef.current = socket;
 
-    // Event listener for disconnection
-    socket.on('disconnect', () => {
-      console.log('WebSocket disconnected.');
-      setIsConnected(false);
-    });
+      socket.onopen = () => {
+        // Browsers cannot set headers on a WebSocket, and keys in the URL end
+        // up in access logs, so the API key is the first message.
+        socket.send(JSON.stringify({ api_key: API_KEY }));
+        console.log('WebSocket connected successfully!');
+        setIsConnected(true);
+      };
 
-    // Event listener for incoming messages from the server
-    socket.on('message', (data: any) => {
-      console.log('Message received from server:', data);
-      
-      let messageText: string;
-      // Check if the data object has an 'answer' property for successful responses
-      if (data && data.answer) {
-        messageText = data.answer;
-      } 
-      // Check for our specific error format from the gateway
-      else if (data && data.error) {
-        messageText = `Error: ${data.details || data.error}`;
-      }
-      // Fallback for any other unexpected format
-      else {
-        messageText = JSON.stringify(data);
-      }
+      socket.onclose = (event) => {
+        console.log(`WebSocket disconnected (code ${event.code}).`);
+        setIsConnected(false);
+        if (!closed) {
+          reconnectTimer = setTimeout(connect, RECONNECT_DELAY_MS);
+        }
+      };
 
-      const serverMessage: Omit<Message, 'id'> = {
-        sender: 'bot',
-        text: messageText,
+      // Answers arrive as the events of /chat/stream: sources, tokens, done.
+      socket.onmessage = (message: MessageEvent) => {
+        const data = JSON.parse(message.data);
+        if (data.event === 'token') {
+          answerRef.current.push(data.text);
+        } else if (data.event === 'done') {
+          addMessageRef.current({ sender: 'bot', text: answerRef.current.join('') });
+          answerRef.current = [];
+        } else if (data.event === 'error') {
+          answerRef.current = [];
+          addMessageRef.current({ sender: 'bot', text: `Error: ${data.detail}` });
+        }
       };
-      addMessage(serverMessage);
-    });
+    };
+
+    connect();
 
     // Cleanup on component unmount
     return () => {
-      // We should remove the event listeners to avoid memory leaks
-      // and duplicate event handlers on re-renders.
-      // We should NOT disconnect the socket itself, as the instance is shared.
-      socket.off('connect');
-      socket.off('disconnect');
-      socket.off('message');
+      closed = true;
+      clearTimeout(reconnectTimer);
+      socketRef.current?.close();
     };
-  }, [addMessage]);
+  }, []);
 
   const sendMessage = useCallback((messageText: string, brainId: string | null) => {
-    if (socket && socket.connected) {
+    const socket = socketRef.current;
+    if (socket && socket.readyState === WebSocket.OPEN) {
       if (!brainId) {
         console.error('No brain selected, cannot send message.');
-        addMessage({ sender: 'bot', text: 'Please select a brain before sending a message.' });
+        addMessageRef.current({ sender: 'bot', text: 'Please select a brain before sending a message.' });
         return;
       }
       console.log(`Sending message to server for brain ${brainId}:`, messageText);
-      socket.emit('message', {
-        type: 'qna',
-        payload: {
-          question: messageText,
-          brain_id: brainId,
-        },
-      });
+      socket.send(JSON.stringify({ question: messageText, brain_id: brainId }));
     } else {
       console.error('Socket not connected, cannot send message.');
     }
@@ -6,15 +6,12 @@ export default defineConfig({
   plugins: [react()],
   server: {
     proxy: {
-      // Proxy for WebSocket Gateway
-      '/socket.io': {
-        target: 'http://localhost:8080',
-        ws: true, // Enable WebSocket proxying
-      },
-      // Generic proxy for all FastAPI endpoints
+      // Generic proxy for all FastAPI endpoints, including WebSocket chat
+      // under /api/ws/
       '/api': {
         target: 'http://localhost:8000',
         changeOrigin: true,
+        ws: true, // Enable WebSocket proxying
         rewrite: (path) => path.replace(/^\/api/, ''),
       },
     },
@@ -1,31 +1,45 @@
+import asyncio
+import json
 import uuid
 from functools import lru_cache
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-# import boto3
 import uvicorn
 from celery.result import AsyncResult
-from fastapi import Depends, FastAPI, File, Form, HTTPException, Security, UploadFile
+from fastapi import (
+    Depends,
+    FastAPI,
+    File,
+    Form,
+    HTTPException,
+    Security,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from starlette_exporter import PrometheusMiddleware, handle_metrics
 
 from nexusmind.brain.brain import Brain
+from nexusmind.brain.cache import get_brain_cache
 from nexusmind.brain.serialization import BRAIN_STORAGE_PATH, load_brain
 from nexusmind.celery_app import app as celery_app
 from nexusmind.config import CoreConfig, get_core_config
 from nexusmind.database import create_db_and_tables, get_session
+from nexusmind.llm.llm_endpoint import configure_async_http_pool
 from nexusmind.logger import get_logger
 from nexusmind.models.files import File as FileModel
 from nexusmind.models.files import FileStatusEnum
-from nexusmind.processor.implementations.simple_txt_processor import SimpleTxtProcessor
 from nexusmind.processor.registry import ProcessorRegistry
+from nexusmind.rag.cache import get_answer_cache
 from nexusmind.rag.nexus_rag import NexusRAG
-from nexusmind.storage.s3_storage import S3Storage, get_s3_storage
-from nexusmind.tasks import process_file
+from nexusmind.storage.s3_storage import S3Storage, UploadResult, get_s3_storage
+from nexusmind.tasks import delete_file, process_file, setup_processor_registry
 
 logger = get_logger(__name__)
 
@@ -50,7 +64,6 @@ app.add_route("/metrics", handle_metrics)
 def on_startup():
     # Create database tables if they don't exist
     create_db_and_tables()
-    # Ensure the S3 bucket exists by manually creating dependencies
     config = get_core_config()
 
     # Configure Celery app with settings from CoreConfig
@@ -66,18 +79,22 @@ def on_startup():
     # Also load any other celery settings from the main config
     celery_app.config_from_object(config, namespace="CELERY")
 
-    if config.minio:  # noqa
-        # Mirror the logic from get_s3_storage to correctly instantiate
-        client_kwargs = {
-            "aws_access_key_id": config.minio.access_key,
-            "aws_secret_access_key": config.minio.secret_key.get_secret_value(),
-            "region_name": "us-east-1",
-        }
-        if config.minio.endpoint:
-            client_kwargs["endpoint_url"] = config.minio.endpoint
+    # Share one keep-alive pool between all async LLM calls of this worker.
+    app.state.llm_http_client = configure_async_http_pool(config.llm_max_connections)
+
+    # Build the pooled S3 client and check the bucket once per process;
+    # /upload reuses them. If S3 is down, the first upload tries again.
+    try:
+        get_s3_storage()
+    except Exception as e:
+        logger.error(f"Could not set up S3 storage at startup: {e}")
+
 
-        # s3_client = boto3.client("s3", **client_kwargs)
-        # s3_storage = S3Storage(config=config.minio, s3_client=s3_client)
+@app.on_event("shutdown")
+async def on_shutdown():
+    client = getattr(app.state, "llm_http_client", None)
+    if client is not None:
+        await client.aclose()
 
 
 # --- Global Exception Handler ---
@@ -108,32 +125,31 @@ async def get_api_key(
     config: CoreConfig = Depends(get_core_config),
 ):
     """Dependency to verify the API key."""
-    if not config.api_keys:
-        logger.warning("API keys are not configured. Endpoint is unprotected.")
-        return api_key_header
-    if api_key_header not in config.api_keys:
+    if not is_valid_api_key(api_key_header, config):
         raise HTTPException(status_code=403, detail="Could not validate credentials")
     return api_key_header
 
 
+def is_valid_api_key(api_key: Optional[str], config: CoreConfig) -> bool:
+    if not config.api_keys:
+        logger.warning("API keys are not configured. Endpoint is unprotected.")
+        return True
+    return api_key in config.api_keys
+
+
 # In-memory storage for task statuses
 TASK_STATUSES = {}
 
+# Seconds a browser WebSocket client has to send its API key.
+WEBSOCKET_AUTH_TIMEOUT_SECONDS = 10
 
-def get_processor_registry(
-    config: CoreConfig = Depends(get_core_config),
-    storage: S3Storage = Depends(get_s3_storage),
-) -> ProcessorRegistry:
+
+def get_processor_registry() -> ProcessorRegistry:
     """
     Dependency provider for the ProcessorRegistry.
-    It creates and configures a singleton instance of the registry.
+    It returns the process-wide registry, built on first use.
     """
-    logger.info("Creating and configuring processor registry singleton...")
-    registry = ProcessorRegistry()
-    simple_txt_processor = SimpleTxtProcessor(storage=storage)
-    registry.register_processor(".txt", simple_txt_processor)
-    logger.info("Processor registry configured.")
-    return registry
+    return setup_processor_registry()
 
 
 # --- Helper Functions ---
@@ -170,6 +186,8 @@ class ChatRequest(BaseModel):
 class UploadResponse(BaseModel):
     task_id: str
     message: str
+    size_bytes: Optional[int] = None
+    sha256: Optional[str] = None
 
 
 class StatusResponse(BaseModel):
@@ -204,6 +222,11 @@ class UpdateBrainRequest(BaseModel):
     name: str
 
 
+class DeleteFileResponse(BaseModel):
+    task_id: str
+    message: str
+
+
 # --- API Endpoints ---
 @app.get("/brains", dependencies=[Depends(get_api_key)], response_model=BrainsList)
 async def get_all_brains():
@@ -289,6 +312,60 @@ async def get_brain_files(brain_id: uuid.UUID, session: Session = Depends(get_se
     return FilesList(files=files)
 
 
+@app.delete(
+    "/brains/{brain_id}/files/{file_id}",
+    dependencies=[Depends(get_api_key)],
+    response_model=DeleteFileResponse,
+)
+async def delete_brain_file(
+    brain_id: uuid.UUID, file_id: uuid.UUID, session: Session = Depends(get_session)
+):
+    """
+    Queues the deletion of a file and its chunks from a specific brain.
+    """
+    file_record = (
+        session.query(FileModel)
+        .filter(FileModel.id == file_id, FileModel.brain_id == brain_id)
+        .one_or_none()
+    )
+    if file_record is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"File with ID {file_id} not found in brain {brain_id}.",
+        )
+
+    task = delete_file.delay(str(file_id), str(brain_id))
+    return DeleteFileResponse(
+        task_id=task.id, message="File deletion accepted and is being processed."
+    )
+
+
+def record_and_queue_upload(
+    session: Session, file_name: str, upload: UploadResult, brain_id: uuid.UUID
+) -> str:
+    """
+    Creates the database record of an uploaded file and queues the task that
+    processes it.
+
+    :return: The id of the queued task.
+    """
+    db_file = FileModel(
+        file_name=file_name,
+        s3_path=upload.file_path,
+        size_bytes=upload.size,
+        sha256=upload.sha256,
+        brain_id=brain_id,
+        status=FileStatusEnum.PENDING,
+    )
+    session.add(db_file)
+    session.commit()
+    session.refresh(db_file)
+    logger.info(f"Created file record in DB with ID: {db_file.id}")
+
+    task = process_file.delay(str(db_file.id), str(brain_id))
+    return task.id
+
+
 @app.post("/upload", dependencies=[Depends(get_api_key)], response_model=UploadResponse)
 async def upload_file(
     brain_id: uuid.UUID = Form(...),
@@ -298,30 +375,31 @@ async def upload_file(
 ):
     """
     Uploads a file to S3, creates a database record, and queues it for processing.
+
+    The spooled request body is streamed into S3 (as a parallel multipart
+    upload when large) and every blocking step runs in a worker thread, so
+    the event loop keeps serving other requests.
     """
     try:
-        # 1. Save file to S3
-        content = await file.read()
-        s3_path = storage.save(file.filename, content)
-        logger.info(f"File '{file.filename}' uploaded to S3 at '{s3_path}'.")
-
-        # 2. Create a record in the database
-        db_file = FileModel(
-            file_name=file.filename,
-            s3_path=s3_path,
-            brain_id=brain_id,
-            status=FileStatusEnum.PENDING,
+        # 1. Stream file to S3, hashing it on the way
+        upload = await asyncio.to_thread(
+            storage.upload_stream, file.filename, file.file
+        )
+        logger.info(
+            f"File '{file.filename}' uploaded to S3 at '{upload.file_path}' "
+            f"({upload.size} bytes, sha256 {upload.sha256})."
         )
-        session.add(db_file)
-        session.commit()
-        session.refresh(db_file)
-        logger.info(f"Created file record in DB with ID: {db_file.id}")
 
-        # 3. Queue the processing task, now passing both file_id and brain_id
-        task = process_file.delay(str(db_file.id), str(brain_id))
+        # 2. Create a record in the database and 3. queue its processing
+        task_id = await asyncio.to_thread(
+            record_and_queue_upload, session, file.filename, upload, brain_id
+        )
 
         return UploadResponse(
-            task_id=task.id, message="File upload accepted and is being processed."
+            task_id=task_id,
+            message="File upload accepted and is being processed.",
+            size_bytes=upload.size,
+            sha256=upload.sha256,
         )
     except Exception as e:
         logger.error(
@@ -354,27 +432,159 @@ async def get_upload_status(task_id: str, session: Session = Depends(get_session
     )
 
 
+async def get_cached_brain(brain_id: uuid.UUID) -> Brain:
+    """Returns a loaded brain from the brain cache, or raises a 404."""
+    try:
+        # Reuse the loaded brain and index unless a worker has written new data.
+        # A miss loads the brain from disk, so it runs in a worker thread.
+        return await asyncio.to_thread(get_brain_cache().get, brain_id)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404, detail=f"Brain with ID {brain_id} not found."
+        )
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Formats one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.post("/chat", dependencies=[Depends(get_api_key)])
 async def chat_with_brain(request: ChatRequest):
     """
     Handles a chat request by generating an answer from the specified brain.
     """
-    try:
-        brain = Brain.load(request.brain_id)
-    except FileNotFoundError:
-        raise HTTPException(
-            status_code=404, detail=f"Brain with ID {request.brain_id} not found."
-        )
+    brain = await get_cached_brain(request.brain_id)
 
     # Instantiate RAG with the loaded brain
-    rag = NexusRAG(brain=brain)
+    # The brain is shared through the cache, so the turn is recorded in a
+    # history of this request's own.
+    rag = NexusRAG(brain=brain, answer_cache=get_answer_cache(), history=[])
 
-    # Generate an answer
-    answer = rag.generate_answer(request.question)
+    # Generate an answer without blocking the event loop
+    answer = await rag.agenerate_answer(request.question)
 
     return {"answer": answer}
 
 
+@app.post("/chat/stream", dependencies=[Depends(get_api_key)])
+async def stream_chat_with_brain(request: ChatRequest):
+    """
+    Streams an answer as Server-Sent Events: a ``sources`` event with the
+    retrieved chunks, ``token`` events as the model generates, then ``done``.
+    Failures after the stream has started are sent as an ``error`` event.
+    """
+    brain = await get_cached_brain(request.brain_id)
+    rag = NexusRAG(brain=brain, answer_cache=get_answer_cache(), history=[])
+
+    async def events():
+        try:
+            async for event, data in rag.astream_answer(request.question):
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Streaming chat for brain {brain.brain_id} failed: {e}")
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep nginx from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def authenticate_websocket(websocket: WebSocket) -> bool:
+    """
+    Accepts a WebSocket and checks its API key, closing it with a policy
+    violation if the key is invalid.
+
+    The key comes from the ``X-API-Key`` header or, for browsers, which
+    cannot set headers, from a first ``{"api_key": ...}`` message sent
+    within ``WEBSOCKET_AUTH_TIMEOUT_SECONDS``. It is never read from the
+    URL, which ends up in access logs.
+    """
+    config = get_core_config()
+    api_key = websocket.headers.get("x-api-key")
+    if api_key is not None:
+        if not is_valid_api_key(api_key, config):
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return False
+        await websocket.accept()
+        return True
+
+    await websocket.accept()
+    try:
+        message = json.loads(
+            await asyncio.wait_for(
+                websocket.receive_text(), WEBSOCKET_AUTH_TIMEOUT_SECONDS
+            )
+        )
+        api_key = message["api_key"]
+    except (asyncio.TimeoutError, ValueError, KeyError, TypeError):
+        api_key = None
+    if api_key is None or not is_valid_api_key(api_key, config):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return False
+    return True
+
+
+@app.websocket("/ws/chat")
+async def websocket_chat(websocket: WebSocket, brain_id: Optional[uuid.UUID] = None):
+    """
+    Chat session over a WebSocket, authenticated once when it connects (see
+    ``authenticate_websocket``).
+
+    The session is bound to ``brain_id`` if given; a message may carry
+    another ``brain_id`` to switch brains. Each message is
+    ``{"question": ...}`` and is answered with the events of
+    ``/chat/stream`` as JSON frames: ``{"event": "token", "text": ...}``.
+    """
+    try:
+        if not await authenticate_websocket(websocket):
+            return
+    except WebSocketDisconnect:
+        return
+
+    # The session's conversation; cached brains are shared between sessions.
+    history: List[Dict[str, str]] = []
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                brain_id = uuid.UUID(str(message.get("brain_id", brain_id)))
+                question = message["question"]
+            except (ValueError, KeyError, TypeError, AttributeError):
+                await websocket.send_json(
+                    {
+                        "event": "error",
+                        "detail": 'Expected {"question": ..., "brain_id": ...}.',
+                    }
+                )
+                continue
+
+            try:
+                brain = await asyncio.to_thread(get_brain_cache().get, brain_id)
+            except FileNotFoundError:
+                await websocket.send_json(
+                    {"event": "error", "detail": f"Brain {brain_id} not found."}
+                )
+                continue
+
+            rag = NexusRAG(
+                brain=brain, answer_cache=get_answer_cache(), history=history
+            )
+            try:
+                async for event, data in rag.astream_answer(question):
+                    await websocket.send_json({"event": event, **data})
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket chat for brain {brain_id} failed: {e}")
+                await websocket.send_json({"event": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        logger.info("WebSocket chat session closed by the client.")
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """
@@ -50,3 +50,9 @@ class MinioConfig(BaseConfig):
     secret_key: SecretStr = Field(alias="MINIO_ROOT_PASSWORD")
     endpoint: str
     bucket: str
+    # HTTP connections one S3 client keeps open, shared by its threads.
+    max_pool_connections: int = 32
+    # Multipart uploads: size of each part (S3's minimum is 5 MiB) and parts
+    # of one upload sent at once.
+    upload_part_size: int = 8 * 1024 * 1024
+    upload_concurrency: int = 4
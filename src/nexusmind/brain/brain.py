@@ -1,19 +1,38 @@
 from __future__ import annotations
 
+import os
 from typing import Dict, List, Optional
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel, ConfigDict, Field
 
 from nexusmind.files.file import NexusFile
-from nexusmind.llm.llm_endpoint import LLMEndpoint
+from nexusmind.llm.embedding_cache import get_embedding_cache
+from nexusmind.llm.llm_endpoint import (
+    DEFAULT_EMBEDDING_BATCH_SIZE,
+    DEFAULT_EMBEDDING_BATCH_TOKENS,
+    DEFAULT_EMBEDDING_CONCURRENCY,
+    LLMEndpoint,
+)
 from nexusmind.logger import get_logger
-from nexusmind.storage.faiss_vector_store import FaissVectorStore
+from nexusmind.processor.splitter import SplitterConfig
+from nexusmind.rag.context import DEFAULT_PROMPT_TOKEN_BUDGET
+from nexusmind.storage.faiss_vector_store import (
+    DEFAULT_INGEST_BATCH_SIZE,
+    DEFAULT_INGEST_CONCURRENCY,
+    FaissVectorStore,
+)
+from nexusmind.storage.index_policy import IndexPolicy
 from nexusmind.storage.vector_store_base import VectorStoreBase
 
 logger = get_logger(__name__)
 
 
+def get_vector_store_path(brain_id: UUID) -> str:
+    """Returns the path of the vector store belonging to a brain."""
+    return f"storage/vs_{brain_id}.index"
+
+
 class Brain(BaseModel):
     """
     The Brain class is the central control unit.
@@ -32,6 +51,34 @@ class Brain(BaseModel):
     temperature: float = Field(...)
     max_tokens: int = Field(...)
 
+    # Embedding ingest settings
+    embedding_batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE
+    embedding_batch_tokens: int = DEFAULT_EMBEDDING_BATCH_TOKENS
+    embedding_concurrency: int = DEFAULT_EMBEDDING_CONCURRENCY
+    # Chunks per ingest batch and batches embedded at once while earlier
+    # batches are indexed.
+    ingest_batch_size: int = DEFAULT_INGEST_BATCH_SIZE
+    ingest_concurrency: int = DEFAULT_INGEST_CONCURRENCY
+
+    # Chunking per file extension (e.g. ".md"); other files are split into
+    # one chunk per line.
+    chunking: Dict[str, SplitterConfig] = Field(default_factory=dict)
+
+    # Vector index type, promotion threshold and search tuning knobs
+    index_policy: IndexPolicy = Field(default_factory=IndexPolicy)
+
+    # Retrieval settings: how many chunks to fetch per question and optional
+    # cutoffs that drop irrelevant chunks before they reach the prompt.
+    retrieval_k: int = 5
+    retrieval_max_distance: Optional[float] = None
+    retrieval_min_score: Optional[float] = None
+    # Lines of context added on each side of a line hit; overlapping windows
+    # are merged into one block. 0 keeps hits as single chunks.
+    retrieval_window: int = 0
+    # Upper bound on prompt plus answer tokens. Retrieved chunks fill what is
+    # left after the question, the instructions and ``max_tokens``.
+    prompt_token_budget: int = DEFAULT_PROMPT_TOKEN_BUDGET
+
     # This field will not be part of the serialization
     # as it's a runtime object.
     llm_endpoint: Optional[LLMEndpoint] = Field(None, exclude=True)
@@ -42,20 +89,44 @@ class Brain(BaseModel):
         self.llm_endpoint = self._create_llm_endpoint()
         self.vector_store = self._create_vector_store()
 
+    def splitter_for(self, file_name: str) -> SplitterConfig:
+        """Returns the chunking settings for a file, based on its extension."""
+        _, extension = os.path.splitext(file_name)
+        extension = extension.lower()
+        for key, config in self.chunking.items():
+            if key.lower() in (extension, extension.lstrip(".")):
+                return config
+        return SplitterConfig()
+
     def _create_llm_endpoint(self) -> LLMEndpoint:
         """Creates the LLM endpoint from the brain's configuration."""
         return LLMEndpoint(
             model_name=self.llm_model_name,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
+            embedding_batch_size=self.embedding_batch_size,
+            embedding_batch_tokens=self.embedding_batch_tokens,
+            embedding_concurrency=self.embedding_concurrency,
+            embedding_cache=get_embedding_cache(),
         )
 
-    def _create_vector_store(self) -> VectorStoreBase:
-        """Creates the vector store."""
+    def _create_vector_store(self, read_only: bool = False) -> VectorStoreBase:
+        """
+        Creates the vector store.
+
+        :param read_only: Open the store memory-mapped for serving queries.
+        """
         # For now, we are hardcoding FaissVectorStore.
         # This could be made configurable in the future.
-        store_path = f"storage/vs_{self.brain_id}.index"
-        return FaissVectorStore(llm_endpoint=self.llm_endpoint, store_path=store_path)
+        store_path = get_vector_store_path(self.brain_id)
+        return FaissVectorStore(
+            llm_endpoint=self.llm_endpoint,
+            store_path=store_path,
+            index_policy=self.index_policy,
+            read_only=read_only,
+            ingest_batch_size=self.ingest_batch_size,
+            ingest_concurrency=self.ingest_concurrency,
+        )
 
     def save(self):
         """Saves the brain's state."""
@@ -65,8 +136,13 @@ class Brain(BaseModel):
         serialization.save_brain(self)
 
     @classmethod
-    def load(cls, brain_id: UUID) -> "Brain":
-        """Loads a brain's state."""
+    def load(cls, brain_id: UUID, read_only: bool = False) -> "Brain":
+        """
+        Loads a brain's state.
+
+        :param read_only: Open the vector store read-only, for processes that
+            only answer queries.
+        """
         logger.info(f"Loading brain state for brain_id: {brain_id}")
         from . import serialization
 
@@ -75,7 +151,7 @@ class Brain(BaseModel):
         # After loading, we need to re-initialize the runtime components
         # that are not part of the serialization.
         brain.llm_endpoint = brain._create_llm_endpoint()
-        brain.vector_store = brain._create_vector_store()
+        brain.vector_store = brain._create_vector_store(read_only=read_only)
 
         # The vector store might have been loaded from disk without an
         # active LLM endpoint. We need to set it explicitly.
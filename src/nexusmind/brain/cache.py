@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from typing import Callable, Tuple
+from uuid import UUID
+
+from nexusmind.config import get_core_config
+from nexusmind.logger import get_logger
+from nexusmind.metrics import (
+    BRAIN_CACHE_BYTES,
+    BRAIN_CACHE_ENTRIES,
+    BRAIN_CACHE_EVICTIONS,
+    BRAIN_CACHE_HITS,
+    BRAIN_CACHE_LOAD_SECONDS,
+    BRAIN_CACHE_MISSES,
+)
+from nexusmind.storage.faiss_vector_store import FaissVectorStore
+
+from .brain import Brain, get_vector_store_path
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _CacheEntry:
+    brain: Brain
+    version: Tuple
+    size_bytes: int
+
+
+def read_brain_version(brain_id: UUID) -> Tuple:
+    """
+    Returns a stamp of a brain's on-disk state: its config file and its
+    vector store. Raises FileNotFoundError if the brain does not exist.
+    """
+    from . import serialization
+
+    brain_stat = serialization.get_brain_path(brain_id).stat()
+    store_version = FaissVectorStore.read_disk_version(get_vector_store_path(brain_id))
+    return (brain_stat.st_mtime_ns, brain_stat.st_size, store_version)
+
+
+def estimate_brain_bytes(brain: Brain) -> int:
+    """Approximate resident memory of a loaded brain."""
+    if isinstance(brain.vector_store, FaissVectorStore):
+        return brain.vector_store.memory_bytes()
+    return 0
+
+
+class BrainCache:
+    """
+    Process-wide LRU cache of loaded brains and their vector stores.
+
+    Entries are keyed by brain id and validated against the brain's on-disk
+    version on every lookup, so a brain is reloaded only after a worker has
+    written new data for it. The least recently used brains are evicted once
+    the estimated memory of all entries exceeds ``max_bytes``. Brains are
+    loaded read-only so their indexes are memory-mapped and shared between
+    worker processes.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        loader: Callable[[UUID], Brain] = partial(Brain.load, read_only=True),
+    ):
+        self.max_bytes = max_bytes
+        self._loader = loader
+        self._entries: "OrderedDict[UUID, _CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, brain_id: UUID) -> Brain:
+        """
+        Returns the brain, loading it from disk if it is not cached or its
+        on-disk version has changed. Raises FileNotFoundError for unknown
+        brains.
+        """
+        try:
+            version = read_brain_version(brain_id)
+        except FileNotFoundError:
+            self.invalidate(brain_id)
+            raise
+
+        with self._lock:
+            entry = self._entries.get(brain_id)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(brain_id)
+                BRAIN_CACHE_HITS.inc()
+                return entry.brain
+
+        BRAIN_CACHE_MISSES.inc()
+        started = time.perf_counter()
+        brain = self._loader(brain_id)
+        BRAIN_CACHE_LOAD_SECONDS.observe(time.perf_counter() - started)
+
+        self._put(brain_id, _CacheEntry(brain, version, estimate_brain_bytes(brain)))
+        return brain
+
+    def invalidate(self, brain_id: UUID) -> None:
+        """Drops a brain from the cache."""
+        with self._lock:
+            entry = self._entries.pop(brain_id, None)
+            if entry is not None:
+                self._total_bytes -= entry.size_bytes
+            self._update_gauges()
+
+    def clear(self) -> None:
+        """Drops every cached brain."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            self._update_gauges()
+
+    def _put(self, brain_id: UUID, entry: _CacheEntry) -> None:
+        with self._lock:
+            previous = self._entries.pop(brain_id, None)
+            if previous is not None:
+                self._total_bytes -= previous.size_bytes
+            self._entries[brain_id] = entry
+            self._total_bytes += entry.size_bytes
+
+            # Always keep the entry just loaded, even if it alone exceeds the
+            # budget; the caller is about to use it.
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                evicted_id, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size_bytes
+                BRAIN_CACHE_EVICTIONS.inc()
+                logger.info(f"Evicted brain {evicted_id} from the brain cache.")
+            self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        BRAIN_CACHE_BYTES.set(self._total_bytes)
+        BRAIN_CACHE_ENTRIES.set(len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+
+@lru_cache(maxsize=None)
+def get_brain_cache() -> BrainCache:
+    """
+    Factory function to get the process-wide BrainCache singleton.
+    """
+    return BrainCache(max_bytes=get_core_config().brain_cache_max_bytes)
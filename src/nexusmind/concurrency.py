@@ -0,0 +1,289 @@
+"""
+Request coalescing helpers.
+
+Single flight: callers asking for the same key while a computation for it
+is in flight wait for that computation instead of starting their own, so
+the work done scales with the number of distinct keys rather than with the
+number of concurrent requests. Nothing is cached once it finishes.
+
+Micro-batching: concurrent single-item requests are gathered into one
+batched call.
+
+Prefetching: an iterator runs ahead of its consumer in a background thread,
+so that stages of a pipeline overlap.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from .logger import logger
+from .metrics import (
+    INGEST_STAGE_BUSY_SECONDS,
+    INGEST_STAGE_ITEMS,
+    MICRO_BATCH_SIZE,
+    MICRO_BATCH_WAIT_SECONDS,
+    SINGLE_FLIGHT_CALLS,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key across threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Runs ``fn`` unless a call for ``key`` is already running, in which
+        case that call's result (or exception) is returned instead.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            SINGLE_FLIGHT_CALLS.labels(name=self.name, role="follower").inc()
+            logger.debug(f"Joined in-flight {self.name} call.")
+            return future.result()
+
+        SINGLE_FLIGHT_CALLS.labels(name=self.name, role="leader").inc()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent calls with the same key within an event loop.
+
+    The shared computation runs as its own task, so a caller that is
+    cancelled (for example because its client disconnected) does not cancel
+    it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Awaits ``fn()``, or the in-flight call for ``key`` if there is one."""
+        task = self._tasks.get(key)
+        if task is None:
+            SINGLE_FLIGHT_CALLS.labels(name=self.name, role="leader").inc()
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            SINGLE_FLIGHT_CALLS.labels(name=self.name, role="follower").inc()
+            logger.debug(f"Joined in-flight {self.name} call.")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+class AsyncMicroBatcher:
+    """
+    Gathers concurrent ``submit`` calls into batched ``batch_fn`` calls.
+
+    When no batch is in flight an item is sent at once, so a lone request
+    pays no extra latency. While a batch is in flight new items queue up and
+    are sent together once ``max_batch_size`` items are waiting or the
+    oldest has waited ``max_wait_seconds``. ``batch_fn`` must return one
+    result per item, in order; if it raises, every item in the batch fails.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[T]], Awaitable[List[R]]],
+        max_batch_size: int = 64,
+        max_wait_seconds: float = 0.005,
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: List[Tuple[T, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight = 0
+        # Strong references, so running batches are not garbage collected.
+        self._tasks = set()
+
+    async def submit(self, item: T) -> R:
+        """Queues ``item`` for the next batch and returns its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if self._in_flight == 0 or len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            self._in_flight += 1
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future, float]]) -> None:
+        sent = time.perf_counter()
+        MICRO_BATCH_SIZE.labels(name=self.name).observe(len(batch))
+        for _, _, queued in batch:
+            MICRO_BATCH_WAIT_SECONDS.labels(name=self.name).observe(sent - queued)
+        try:
+            results = await self.batch_fn([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"{self.name} batch returned {len(results)} results "
+                    f"for {len(batch)} items."
+                )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            # Items that queued behind this batch go out now rather than
+            # waiting for their timer.
+            if self._in_flight == 0 and self._pending:
+                self._flush()
+
+
+class _Done:
+    """Marks the end of a prefetched iterator, carrying its error if any."""
+
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+# Seconds each thread has spent waiting on prefetch queues, so that a stage
+# reading another stage's output can leave those waits out of its busy time.
+_queue_waits = threading.local()
+
+
+def _queue_wait_seconds() -> float:
+    return getattr(_queue_waits, "seconds", 0.0)
+
+
+def record_stage(stage: str, items: int, seconds: float) -> None:
+    """Records work done by an ingest pipeline stage."""
+    INGEST_STAGE_ITEMS.labels(stage=stage).inc(items)
+    INGEST_STAGE_BUSY_SECONDS.labels(stage=stage).inc(seconds)
+
+
+def prefetch(
+    items: Iterable[T],
+    stage: str,
+    maxsize: int = 2,
+    measure: Callable[[T], int] = lambda item: 1,
+) -> Iterator[T]:
+    """
+    Iterates ``items`` in a background thread, at most ``maxsize`` items
+    ahead of the consumer.
+
+    The bounded queue is the backpressure: a producer that gets ahead blocks
+    until the consumer catches up. Errors raised by ``items`` are re-raised
+    to the consumer, and a consumer that stops early stops the producer.
+    Time spent producing each item is recorded for ``stage``, with
+    ``measure`` giving the amount of work an item represents. Time ``items``
+    spends waiting on an upstream ``prefetch`` is not counted.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(items)
+        try:
+            while True:
+                started = time.perf_counter()
+                waited = _queue_wait_seconds()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                busy = time.perf_counter() - started
+                busy -= _queue_wait_seconds() - waited
+                record_stage(stage, measure(item), busy)
+                if not put(item):
+                    break
+        except BaseException as e:
+            put(_Done(e))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        put(_Done())
+
+    producer = threading.Thread(target=produce, name=f"prefetch-{stage}", daemon=True)
+    producer.start()
+    try:
+        while True:
+            started = time.perf_counter()
+            item = buffer.get()
+            _queue_waits.seconds = _queue_wait_seconds() + time.perf_counter() - started
+            if isinstance(item, _Done):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
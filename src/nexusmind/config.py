@@ -26,6 +26,11 @@ class CoreConfig(BaseConfig):
     # The maximum number of tokens to generate in a response.
     max_tokens: int = Field(1000, description="LLM max tokens.")
 
+    # Connections the API keeps open to LLM providers for async calls.
+    llm_max_connections: int = Field(
+        200, description="Size of the API's shared async connection pool to LLMs."
+    )
+
     # The API key for OpenAI services, loaded from OPENAI_API_KEY.
     openai_api_key: str
 
@@ -36,6 +41,48 @@ class CoreConfig(BaseConfig):
     aws_region: str = "us-east-1"
     aws_endpoint_url: str | None = None
 
+    # --- Brain Cache Configuration ---
+    # Memory budget for brains and vector stores kept loaded by the API.
+    brain_cache_max_bytes: int = Field(
+        2 * 1024**3, description="Memory budget of the in-process brain cache."
+    )
+
+    # --- Embedding Cache Configuration ---
+    # Content-addressed cache of embeddings shared by brains and workers.
+    embedding_cache_enabled: bool = Field(
+        True, description="Reuse embeddings of previously seen text."
+    )
+    embedding_cache_max_entries: int = Field(
+        10_000, description="Size of the in-process embedding cache tier."
+    )
+    embedding_cache_redis: bool = Field(
+        True, description="Share cached embeddings across workers through Redis."
+    )
+    embedding_cache_ttl_seconds: int = Field(
+        30 * 24 * 3600, description="Lifetime of embeddings cached in Redis."
+    )
+
+    # --- Answer Cache Configuration ---
+    # Answers to repeated /chat questions, per brain version.
+    answer_cache_enabled: bool = Field(
+        True, description="Reuse answers to near-duplicate questions."
+    )
+    answer_cache_ttl_seconds: float = Field(
+        600.0, description="Lifetime of a cached answer."
+    )
+    answer_cache_min_similarity: float = Field(
+        0.97, description="Cosine similarity at which two questions match."
+    )
+    answer_cache_max_entries_per_brain: int = Field(
+        256, description="Number of answers kept per brain."
+    )
+
+    # --- Ingest Configuration ---
+    # Pieces of an uploaded file fetched from S3 ahead of chunking.
+    ingest_read_ahead: int = Field(
+        4, description="Storage pieces a worker reads ahead of parsing."
+    )
+
     # --- Redis Configuration ---
 
     # --- Storage Configuration ---
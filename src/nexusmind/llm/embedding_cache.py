@@ -0,0 +1,218 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import numpy as np
+import redis
+from pydantic import BaseModel
+
+from ..config import get_core_config
+from ..logger import logger
+from ..metrics import EMBEDDING_CACHE_LOOKUPS
+
+# At 1536 dimensions an entry takes about 6 KB, so the default local tier
+# holds roughly 60 MB of vectors.
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+# After a Redis error the shared tier is skipped for this long.
+REDIS_RETRY_SECONDS = 30.0
+
+KEY_PREFIX = "nexusmind:emb"
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so that trivially different copies share a key."""
+    return " ".join(text.split())
+
+
+def cache_key(model: str, text: str) -> str:
+    """Content address of ``text`` embedded with ``model``."""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:{model}:{digest}"
+
+
+class EmbeddingCacheStats(BaseModel):
+    """Embedding cache lookups, by the tier that answered them."""
+
+    memory_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.redis_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def add(self, other: "EmbeddingCacheStats") -> None:
+        self.memory_hits += other.memory_hits
+        self.redis_hits += other.redis_hits
+        self.misses += other.misses
+
+    def diff(self, earlier: "EmbeddingCacheStats") -> "EmbeddingCacheStats":
+        """Lookups made since ``earlier`` was copied from these stats."""
+        return EmbeddingCacheStats(
+            memory_hits=self.memory_hits - earlier.memory_hits,
+            redis_hits=self.redis_hits - earlier.redis_hits,
+            misses=self.misses - earlier.misses,
+        )
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embeddings keyed by (model, normalized text
+    hash).
+
+    Lookups go to an in-process LRU first and then to Redis, which is shared
+    by every worker and brain. Vectors are stored as float32 bytes. Redis
+    failures are logged and the shared tier is skipped for a while, so an
+    unavailable Redis only costs cache hits.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        redis_client=None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.redis_client = redis_client
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_retry_at = 0.0
+
+    def get_many(
+        self,
+        model: str,
+        texts: Sequence[str],
+        stats: Optional[EmbeddingCacheStats] = None,
+    ) -> List[Optional[List[float]]]:
+        """
+        Returns the cached embedding of each text, or None where missing.
+
+        :param stats: Optional stats object the lookups are added to.
+        """
+        stats = stats if stats is not None else EmbeddingCacheStats()
+        keys = [cache_key(model, text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(keys)
+
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is None:
+                    missing.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    results[i] = vector.tolist()
+                    stats.memory_hits += 1
+
+        if missing:
+            shared = self._redis_get([keys[i] for i in missing])
+            for i, data in zip(missing, shared):
+                if data is None:
+                    stats.misses += 1
+                    continue
+                vector = np.frombuffer(data, dtype=np.float32)
+                self._remember(keys[i], vector)
+                results[i] = vector.tolist()
+                stats.redis_hits += 1
+
+        EMBEDDING_CACHE_LOOKUPS.labels(result="memory_hit").inc(stats.memory_hits)
+        EMBEDDING_CACHE_LOOKUPS.labels(result="redis_hit").inc(stats.redis_hits)
+        EMBEDDING_CACHE_LOOKUPS.labels(result="miss").inc(stats.misses)
+        return results
+
+    def put_many(
+        self, model: str, texts: Sequence[str], embeddings: Sequence[List[float]]
+    ) -> None:
+        """Caches embeddings; empty (failed) embeddings are skipped."""
+        entries = {
+            cache_key(model, text): np.asarray(embedding, dtype=np.float32)
+            for text, embedding in zip(texts, embeddings)
+            if embedding
+        }
+        for key, vector in entries.items():
+            self._remember(key, vector)
+        self._redis_set(entries)
+
+    def clear(self) -> None:
+        """Drops the in-process tier."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # --- Redis tier ---
+    def _redis_available(self) -> bool:
+        return (
+            self.redis_client is not None and time.monotonic() >= self._redis_retry_at
+        )
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(
+            f"Embedding cache Redis tier unavailable, skipping it for "
+            f"{REDIS_RETRY_SECONDS:.0f}s: {e}"
+        )
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _redis_get(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys or not self._redis_available():
+            return [None] * len(keys)
+        try:
+            return self.redis_client.mget(keys)
+        except Exception as e:
+            self._redis_failed(e)
+            return [None] * len(keys)
+
+    def _redis_set(self, entries) -> None:
+        if not entries or not self._redis_available():
+            return
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for key, vector in entries.items():
+                pipeline.set(key, vector.tobytes(), ex=self.ttl_seconds)
+            pipeline.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+
+@lru_cache(maxsize=None)
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Factory function to get the process-wide EmbeddingCache singleton, or
+    None when the cache is disabled.
+    """
+    config = get_core_config()
+    if not config.embedding_cache_enabled:
+        return None
+
+    redis_client = None
+    if config.embedding_cache_redis:
+        redis_client = redis.Redis(
+            host=config.redis.redis_host,
+            port=config.redis.redis_port,
+            db=config.redis.redis_db,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+        )
+    return EmbeddingCache(
+        max_entries=config.embedding_cache_max_entries,
+        redis_client=redis_client,
+        ttl_seconds=config.embedding_cache_ttl_seconds,
+    )
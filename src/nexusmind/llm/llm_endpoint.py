@@ -1,7 +1,84 @@
-from typing import List
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 
+import httpx
 import litellm
 
+from ..concurrency import AsyncMicroBatcher, AsyncSingleFlight, SingleFlight
+from ..logger import logger
+from .embedding_cache import EmbeddingCache, EmbeddingCacheStats, cache_key
+from .tokens import estimate_tokens
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# Provider-side limits for a single embedding request. OpenAI accepts up to
+# 2048 inputs and roughly 300k tokens per call; we stay well below both.
+DEFAULT_EMBEDDING_BATCH_SIZE = 256
+DEFAULT_EMBEDDING_BATCH_TOKENS = 50_000
+DEFAULT_EMBEDDING_CONCURRENCY = 4
+# Concurrent async query embeddings are sent together once this many are
+# waiting, or once the oldest has waited this long.
+DEFAULT_QUERY_BATCH_SIZE = 64
+DEFAULT_QUERY_BATCH_WAIT_SECONDS = 0.005
+# Connections the async client keeps open to LLM providers, shared by all
+# endpoints in the process.
+DEFAULT_ASYNC_MAX_CONNECTIONS = 200
+
+
+def configure_async_http_pool(
+    max_connections: int = DEFAULT_ASYNC_MAX_CONNECTIONS,
+) -> httpx.AsyncClient:
+    """
+    Installs one pooled async HTTP client for every litellm async call.
+
+    Without it each provider client opens its own connections; with it
+    concurrent requests in the event loop reuse a bounded keep-alive pool.
+    """
+    client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        timeout=httpx.Timeout(600.0, connect=10.0),
+    )
+    litellm.aclient_session = client
+    return client
+
+
+# Process-wide, so identical texts are coalesced across brains' endpoints.
+_EMBEDDING_FLIGHTS = SingleFlight("embedding")
+_ASYNC_EMBEDDING_FLIGHTS = AsyncSingleFlight("embedding")
+
+
+_EMBEDDING_BATCHERS: Dict[str, AsyncMicroBatcher] = {}
+
+
+async def _aembed_texts(model: str, texts: List[str]) -> List[List[float]]:
+    """Embeds ``texts`` with one async provider call, in input order."""
+    response = await litellm.aembedding(model=model, input=texts)
+    results: List[List[float]] = [[] for _ in texts]
+    for position, item in enumerate(response["data"]):
+        index = item.get("index", position)
+        if 0 <= index < len(texts):
+            results[index] = item["embedding"]
+    return results
+
+
+def _embedding_batcher(model: str) -> AsyncMicroBatcher:
+    """Returns the process-wide micro-batcher for query embeddings of ``model``."""
+    batcher = _EMBEDDING_BATCHERS.get(model)
+    if batcher is None:
+        batcher = _EMBEDDING_BATCHERS[model] = AsyncMicroBatcher(
+            f"embedding:{model}",
+            partial(_aembed_texts, model),
+            max_batch_size=DEFAULT_QUERY_BATCH_SIZE,
+            max_wait_seconds=DEFAULT_QUERY_BATCH_WAIT_SECONDS,
+        )
+    return batcher
+
 
 class LLMEndpoint:
     """
@@ -9,10 +86,28 @@ class LLMEndpoint:
     using the litellm library.
     """
 
-    def __init__(self, model_name: str, temperature: float, max_tokens: int):
+    def __init__(
+        self,
+        model_name: str,
+        temperature: float,
+        max_tokens: int,
+        embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+        embedding_batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE,
+        embedding_batch_tokens: int = DEFAULT_EMBEDDING_BATCH_TOKENS,
+        embedding_concurrency: int = DEFAULT_EMBEDDING_CONCURRENCY,
+        embedding_cache: Optional[EmbeddingCache] = None,
+    ):
         self.model_name = model_name
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.embedding_model = embedding_model
+        self.embedding_batch_size = max(1, embedding_batch_size)
+        self.embedding_batch_tokens = max(1, embedding_batch_tokens)
+        self.embedding_concurrency = max(1, embedding_concurrency)
+        self.embedding_cache = embedding_cache
+        # Running totals of cache lookups; callers diff them per ingest.
+        self.embedding_cache_stats = EmbeddingCacheStats()
+        self._stats_lock = threading.Lock()
         # litellm can automatically handle API keys from environment variables,
         # so we don't necessarily need to pass them explicitly.
 
@@ -25,6 +120,19 @@ class LLMEndpoint:
             litellm.completion.
         :return: The string content of the model's response.
         """
+        try:
+            response = litellm.completion(
+                **self._completion_params(messages, optional_params)
+            )
+            return response.choices[0].message.content or ""
+        except Exception as e:
+            # Handle potential API errors gracefully
+            print(f"An error occurred while calling the LLM: {e}")
+            # Depending on the desired behavior, you might want to re-raise,
+            # return a default value, or log the error.
+            return ""
+
+    def _completion_params(self, messages: list, optional_params: dict = None) -> dict:
         params = {
             "model": self.model_name,
             "messages": messages,
@@ -33,17 +141,43 @@ class LLMEndpoint:
         }
         if optional_params:
             params.update(optional_params)
+        return params
 
+    async def aget_chat_completion(
+        self, messages: list, optional_params: dict = None
+    ) -> str:
+        """
+        Async variant of ``get_chat_completion`` that does not block the
+        event loop while the model responds.
+        """
         try:
-            response = litellm.completion(**params)
+            response = await litellm.acompletion(
+                **self._completion_params(messages, optional_params)
+            )
             return response.choices[0].message.content or ""
         except Exception as e:
-            # Handle potential API errors gracefully
-            print(f"An error occurred while calling the LLM: {e}")
-            # Depending on the desired behavior, you might want to re-raise,
-            # return a default value, or log the error.
+            logger.error(f"An error occurred while calling the LLM: {e}")
             return ""
 
+    async def astream_chat_completion(
+        self, messages: list, optional_params: dict = None
+    ) -> AsyncIterator[str]:
+        """
+        Streams the model's response as text deltas as they arrive.
+
+        Unlike ``get_chat_completion``, provider errors are raised: once
+        tokens have been sent there is no empty answer to fall back to.
+        """
+        params = self._completion_params(messages, optional_params)
+        params["stream"] = True
+        response = await litellm.acompletion(**params)
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
     def get_embedding(self, text: str) -> List[float]:
         """
         Get the vector embedding for a given text.
@@ -51,9 +185,164 @@ class LLMEndpoint:
         :param text: The input text to embed.
         :return: A list of floats representing the embedding.
         """
+        if self.embedding_cache is not None:
+            cached = self._cache_lookup([text])[0]
+            if cached is not None:
+                return cached
+        # Concurrent requests for the same text share one provider call.
+        return _EMBEDDING_FLIGHTS.do(
+            cache_key(self.embedding_model, text), lambda: self._embed_one(text)
+        )
+
+    def _embed_one(self, text: str) -> List[float]:
         try:
-            response = litellm.embedding(model="text-embedding-ada-002", input=[text])
-            return response["data"][0]["embedding"]
+            response = litellm.embedding(model=self.embedding_model, input=[text])
+            embedding = response["data"][0]["embedding"]
         except Exception as e:
             print(f"An error occurred while getting embeddings: {e}")
             return []
+        if self.embedding_cache is not None:
+            self.embedding_cache.put_many(self.embedding_model, [text], [embedding])
+        return embedding
+
+    async def aget_embedding(self, text: str) -> List[float]:
+        """
+        Async variant of ``get_embedding``. Cache lookups, which may go to
+        Redis, run in a worker thread.
+        """
+        if self.embedding_cache is not None:
+            cached = (await asyncio.to_thread(self._cache_lookup, [text]))[0]
+            if cached is not None:
+                return cached
+        return await _ASYNC_EMBEDDING_FLIGHTS.do(
+            cache_key(self.embedding_model, text), lambda: self._aembed_one(text)
+        )
+
+    async def _aembed_one(self, text: str) -> List[float]:
+        try:
+            # Concurrent requests for different texts share a provider call.
+            embedding = await _embedding_batcher(self.embedding_model).submit(text)
+        except Exception as e:
+            logger.error(f"An error occurred while getting embeddings: {e}")
+            return []
+        if self.embedding_cache is not None:
+            await asyncio.to_thread(
+                self.embedding_cache.put_many,
+                self.embedding_model,
+                [text],
+                [embedding],
+            )
+        return embedding
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get the vector embeddings for many texts using batched provider calls.
+
+        Texts are grouped into batches bounded by both item count and
+        estimated token count, and up to ``embedding_concurrency`` batches
+        are in flight at once. With an ``embedding_cache`` only texts that are
+        neither cached nor repeated earlier in ``texts`` reach the provider.
+
+        :param texts: The input texts to embed.
+        :return: One embedding per input text, in input order. Texts whose
+            batch failed get an empty list, mirroring ``get_embedding``.
+        """
+        if not texts:
+            return []
+        if self.embedding_cache is not None:
+            return self._get_embeddings_cached(texts)
+        return self._embed_batches(texts)
+
+    def _get_embeddings_cached(self, texts: List[str]) -> List[List[float]]:
+        """Serves cached texts, embeds each distinct miss once and caches it."""
+        results = self._cache_lookup(texts)
+
+        # Copies of a text within the batch share one provider input.
+        pending: Dict[str, List[int]] = {}
+        for i, embedding in enumerate(results):
+            if embedding is None:
+                pending.setdefault(
+                    cache_key(self.embedding_model, texts[i]), []
+                ).append(i)
+        if not pending:
+            return results
+
+        positions = list(pending.values())
+        missing = [texts[rows[0]] for rows in positions]
+        embedded = self._embed_batches(missing)
+        self.embedding_cache.put_many(self.embedding_model, missing, embedded)
+        for rows, embedding in zip(positions, embedded):
+            for i in rows:
+                results[i] = embedding
+
+        duplicates = sum(len(rows) for rows in positions) - len(positions)
+        if duplicates:
+            # In-batch copies were counted as misses by the cache lookup.
+            with self._stats_lock:
+                self.embedding_cache_stats.memory_hits += duplicates
+                self.embedding_cache_stats.misses -= duplicates
+        return results
+
+    def _cache_lookup(self, texts: List[str]) -> List[Optional[List[float]]]:
+        stats = EmbeddingCacheStats()
+        results = self.embedding_cache.get_many(self.embedding_model, texts, stats)
+        with self._stats_lock:
+            self.embedding_cache_stats.add(stats)
+        return results
+
+    def _embed_batches(self, texts: List[str]) -> List[List[float]]:
+        batches = list(self._iter_batches(texts))
+        results: List[List[float]] = [[] for _ in texts]
+
+        if len(batches) == 1 or self.embedding_concurrency == 1:
+            for start, batch in batches:
+                self._fill_batch(results, start, batch)
+            return results
+
+        workers = min(self.embedding_concurrency, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._fill_batch, results, start, batch)
+                for start, batch in batches
+            ]
+            for future in futures:
+                future.result()
+        return results
+
+    def _iter_batches(self, texts: List[str]) -> Iterator[tuple]:
+        """Yields ``(start_index, batch)`` pairs sized by items and tokens."""
+        start = 0
+        batch: List[str] = []
+        batch_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if batch and (
+                len(batch) >= self.embedding_batch_size
+                or batch_tokens + tokens > self.embedding_batch_tokens
+            ):
+                yield start, batch
+                start, batch, batch_tokens = i, [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            yield start, batch
+
+    def _fill_batch(
+        self, results: List[List[float]], start: int, batch: List[str]
+    ) -> None:
+        """Embeds one batch and writes the vectors into ``results`` in place."""
+        try:
+            response = litellm.embedding(model=self.embedding_model, input=batch)
+        except Exception as e:
+            logger.error(
+                f"Embedding batch of {len(batch)} texts starting at {start} "
+                f"failed: {e}"
+            )
+            return
+
+        for position, item in enumerate(response["data"]):
+            # Providers report each vector's input position; fall back to
+            # response order when it is missing.
+            index = item.get("index", position)
+            if 0 <= index < len(batch):
+                results[start + index] = item["embedding"]
@@ -0,0 +1,10 @@
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap, conservative token estimate used to size embedding batches and
+    chunks.
+
+    Running the real tokenizer over every line of a large file costs more
+    than it saves here; the estimate only has to keep batches under the
+    provider's per-request limit.
+    """
+    return len(text) // 3 + 1
@@ -0,0 +1,126 @@
+"""
+Prometheus metrics shared across the application.
+
+Metrics are registered on the default registry, which the API exposes on
+``/metrics`` through starlette_exporter.
+"""
+
+from typing import Dict
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+
+# --- Brain cache ---
+BRAIN_CACHE_HITS = Counter(
+    "nexusmind_brain_cache_hits_total",
+    "Number of brain lookups served from the in-process cache.",
+)
+BRAIN_CACHE_MISSES = Counter(
+    "nexusmind_brain_cache_misses_total",
+    "Number of brain lookups that had to load the brain from disk.",
+)
+BRAIN_CACHE_EVICTIONS = Counter(
+    "nexusmind_brain_cache_evictions_total",
+    "Number of brains evicted from the cache to stay within its memory budget.",
+)
+BRAIN_CACHE_LOAD_SECONDS = Histogram(
+    "nexusmind_brain_cache_load_seconds",
+    "Time spent loading a brain and its vector store from disk.",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+BRAIN_CACHE_BYTES = Gauge(
+    "nexusmind_brain_cache_bytes",
+    "Estimated memory held by cached brains.",
+)
+BRAIN_CACHE_ENTRIES = Gauge(
+    "nexusmind_brain_cache_entries",
+    "Number of brains currently held in the cache.",
+)
+
+# --- Embedding cache ---
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "nexusmind_embedding_cache_lookups_total",
+    "Embedding cache lookups by result: memory_hit, redis_hit or miss.",
+    ["result"],
+)
+
+# --- Answer cache ---
+ANSWER_CACHE_LOOKUPS = Counter(
+    "nexusmind_answer_cache_lookups_total",
+    "Answer cache lookups for /chat questions by result: hit or miss.",
+    ["result"],
+)
+
+# --- Chat ---
+CHAT_TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "nexusmind_chat_time_to_first_token_seconds",
+    "Time from receiving a streamed chat question to sending its first token.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10, 30),
+)
+
+# --- Request coalescing ---
+SINGLE_FLIGHT_CALLS = Counter(
+    "nexusmind_single_flight_calls_total",
+    "Coalesced calls by flight and role: leader (did the work) or follower.",
+    ["name", "role"],
+)
+MICRO_BATCH_SIZE = Histogram(
+    "nexusmind_micro_batch_size",
+    "Items per call sent by a micro-batcher.",
+    ["name"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+MICRO_BATCH_WAIT_SECONDS = Histogram(
+    "nexusmind_micro_batch_wait_seconds",
+    "Time an item waited in a micro-batcher before its batch was sent.",
+    ["name"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+# --- Ingest pipeline ---
+# A stage's throughput is items / seconds; the stage whose busy time is
+# closest to the task's wall time is the bottleneck.
+INGEST_STAGE_ITEMS = Counter(
+    "nexusmind_ingest_stage_items_total",
+    "Work done by ingest pipeline stages: bytes for fetch, chunks otherwise.",
+    ["stage"],
+)
+INGEST_STAGE_BUSY_SECONDS = Counter(
+    "nexusmind_ingest_stage_busy_seconds_total",
+    "Time ingest pipeline stages spent working, excluding queue waits.",
+    ["stage"],
+)
+INGEST_STAGES = ("fetch", "parse", "embed", "index")
+
+
+def ingest_stage_totals() -> Dict[str, Dict[str, float]]:
+    """
+    Returns the items and busy seconds recorded so far by each ingest stage
+    in this process; diff two readings to get the figures of one task.
+    """
+    totals = {}
+    for stage in INGEST_STAGES:
+        labels = {"stage": stage}
+        totals[stage] = {
+            "items": REGISTRY.get_sample_value(
+                "nexusmind_ingest_stage_items_total", labels
+            )
+            or 0.0,
+            "busy_seconds": REGISTRY.get_sample_value(
+                "nexusmind_ingest_stage_busy_seconds_total", labels
+            )
+            or 0.0,
+        }
+    return totals
+
+
+# --- RAG prompts ---
+RAG_PROMPT_TOKENS = Histogram(
+    "nexusmind_rag_prompt_tokens",
+    "Tokens in prompts sent to the LLM, including the retrieved context.",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000),
+)
+RAG_CONTEXT_CHUNKS = Histogram(
+    "nexusmind_rag_context_chunks",
+    "Retrieved chunks that fit into a prompt's token budget.",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
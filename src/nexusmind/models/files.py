@@ -3,6 +3,7 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import BigInteger, Column
 from sqlmodel import Field, SQLModel
 
 
@@ -23,6 +24,13 @@ class File(SQLModel, table=True):
     # The path or key of the file in the S3 bucket.
     s3_path: str
 
+    # Size and SHA-256 of the uploaded content, computed while it streamed.
+    # 64-bit, as uploads can exceed the 2 GiB a Postgres integer holds.
+    size_bytes: Optional[int] = Field(
+        default=None, sa_column=Column(BigInteger, nullable=True)
+    )
+    sha256: Optional[str] = Field(default=None)
+
     # The processing status of the file.
     status: FileStatusEnum = Field(default=FileStatusEnum.PENDING)
 
@@ -1,50 +1,66 @@
-from typing import List
+from typing import Iterator, Optional
 
+from ...concurrency import prefetch
 from ...files.file import NexusFile
 from ...logger import logger
 from ...storage.storage_base import StorageBase
 from ..processor_base import ProcessorBase
-from ..splitter import Chunk
+from ..splitter import Chunk, SplitterConfig, split_lines
+from ..text_stream import decode_lines
 
 
 class SimpleTxtProcessor(ProcessorBase):
     """
     A simple processor for .txt files.
-    It splits the document by lines.
+    It splits the document by lines, or into line-aligned windows when
+    given a window splitter configuration.
+
+    With ``read_ahead`` the file is fetched in a background thread up to
+    that many pieces ahead of decoding and splitting.
     """
 
-    def __init__(self, storage: StorageBase):
+    def __init__(
+        self,
+        storage: StorageBase,
+        splitter: Optional[SplitterConfig] = None,
+        read_ahead: int = 0,
+    ):
         self.storage = storage
+        self.splitter = splitter
+        self.read_ahead = read_ahead
 
-    def process(self, file: NexusFile) -> List[Chunk]:
+    def iter_chunks(
+        self, file: NexusFile, splitter: Optional[SplitterConfig] = None
+    ) -> Iterator[Chunk]:
         """
-        Processes a .txt file by reading its content from storage
-        and splitting it into chunks line by line.
+        Processes a .txt file by streaming its content from storage,
+        decoding it incrementally and splitting it into chunks.
+
+        A file that cannot be read or decoded before its first chunk is
+        logged as failed and yields nothing. An error after chunks have been
+        yielded is raised, so a partly indexed file is not taken for a
+        complete one.
         """
         logger.info(f"Processing file: {file.file_name} (Path: {file.file_path})")
 
+        pieces = self.storage.stream(file.file_path)
+        if self.read_ahead > 0:
+            pieces = prefetch(pieces, "fetch", maxsize=self.read_ahead, measure=len)
+        lines = decode_lines(pieces)
+        count = 0
         try:
-            content_bytes = self.storage.get(file.file_path)
-            content_str = content_bytes.decode("utf-8")
+            for chunk in split_lines(
+                lines, file.file_id, file.file_name, splitter or self.splitter
+            ):
+                count += 1
+                yield chunk
         except Exception as e:
-            logger.error(f"Failed to read or decode file {file.file_name}: {e}")
-            return []
-
-        lines = content_str.splitlines()
-        logger.debug(f"File content split into {len(lines)} lines. Lines: {lines}")
-
-        chunks = []
-        for i, line in enumerate(lines):
-            if line.strip():  # Avoid creating empty chunks
-                chunk = Chunk(
-                    document_id=file.file_id,
-                    content=line,
-                    metadata={
-                        "file_name": file.file_name,
-                        "line_number": i + 1,
-                    },
-                )
-                chunks.append(chunk)
-
-        logger.info(f"Created {len(chunks)} chunks from file {file.file_name}.")
-        return chunks
+            logger.error(
+                f"Failed to read or decode file {file.file_name} "
+                f"after {count} chunks: {e}"
+            )
+            if count:
+                raise
+            return
+
+        logger.info(f"Created {count} chunks from file {file.file_name}.")
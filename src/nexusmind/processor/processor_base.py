@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterator, List, Optional
 
 from ..files.file import NexusFile
-from .splitter import Chunk
+from .splitter import Chunk, SplitterConfig
 
 
 class ProcessorBase(ABC):
@@ -11,8 +11,22 @@ class ProcessorBase(ABC):
     """
 
     @abstractmethod
-    def process(self, file: NexusFile) -> List[Chunk]:
+    def iter_chunks(
+        self, file: NexusFile, splitter: Optional[SplitterConfig] = None
+    ) -> Iterator[Chunk]:
         """
-        Process a file and return a list of chunks.
+        Process a file and yield its chunks as they are produced, so that
+        large files are processed in bounded memory.
+
+        :param splitter: How to cut the file into chunks; processors fall
+            back to their own default when it is None.
         """
         pass
+
+    def process(
+        self, file: NexusFile, splitter: Optional[SplitterConfig] = None
+    ) -> List[Chunk]:
+        """
+        Process a file and return a list of chunks.
+        """
+        return list(self.iter_chunks(file, splitter))
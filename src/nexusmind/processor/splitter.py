@@ -1,6 +1,21 @@
 import uuid
+from collections import deque
+from enum import Enum
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from ..llm.tokens import estimate_tokens
+
+# Metadata keys describing where a chunk came from in its file.
+FILE_NAME_KEY = "file_name"
+LINE_NUMBER_KEY = "line_number"
+LINE_START_KEY = "line_start"
+LINE_END_KEY = "line_end"
+
+# Characters per token assumed when a single line has to be cut into
+# token-sized pieces.
+CHARS_PER_TOKEN = 3
 
 
 class Chunk(BaseModel):
@@ -12,3 +27,163 @@ class Chunk(BaseModel):
     document_id: uuid.UUID
     content: str
     metadata: dict = Field(default_factory=dict)
+
+
+class SplitStrategy(str, Enum):
+    """How a text file is cut into chunks."""
+
+    LINE = "line"
+    CHARACTER = "character"
+    TOKEN = "token"
+
+
+class SplitterConfig(BaseModel):
+    """
+    Chunking settings for a file type.
+
+    ``line`` makes one chunk per non-empty line. ``character`` and ``token``
+    pack whole lines into windows of at most ``chunk_size`` characters or
+    estimated tokens, preferring to end a window at a paragraph break, and
+    repeat up to ``chunk_overlap`` of a window's trailing lines at the start
+    of the next one.
+    """
+
+    strategy: SplitStrategy = SplitStrategy.LINE
+    chunk_size: int = Field(2000, gt=0)
+    chunk_overlap: int = Field(200, ge=0)
+
+    @model_validator(mode="after")
+    def _check_overlap(self) -> "SplitterConfig":
+        if self.chunk_overlap >= self.chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size.")
+        return self
+
+
+def split_lines(
+    lines: Iterable[str],
+    document_id: uuid.UUID,
+    file_name: str,
+    config: Optional[SplitterConfig] = None,
+) -> Iterator[Chunk]:
+    """
+    Splits a file's lines into chunks according to ``config``.
+
+    Lines are consumed lazily, so a file never has to be held in memory as a
+    whole. Every chunk records ``file_name`` and its first line as
+    ``line_number``; window chunks also record ``line_start`` and
+    ``line_end``. Line numbers start at 1.
+    """
+    config = config or SplitterConfig()
+    if config.strategy == SplitStrategy.LINE:
+        for i, line in enumerate(lines, 1):
+            if line.strip():  # Avoid creating empty chunks
+                yield Chunk(
+                    document_id=document_id,
+                    content=line,
+                    metadata={FILE_NAME_KEY: file_name, LINE_NUMBER_KEY: i},
+                )
+        return
+    yield from _WindowSplitter(document_id, file_name, config).split(lines)
+
+
+class _WindowSplitter:
+    """Packs lines into overlapping, size-bounded windows."""
+
+    def __init__(self, document_id: uuid.UUID, file_name: str, config: SplitterConfig):
+        self.document_id = document_id
+        self.file_name = file_name
+        self.config = config
+        # (line number, text, size) of the lines of the window being built.
+        self.window: Deque[Tuple[int, str, int]] = deque()
+        self.window_size = 0
+        # Leading lines of the window repeated from the previous chunk.
+        self.carried = 0
+
+    def size(self, text: str) -> int:
+        if self.config.strategy == SplitStrategy.TOKEN:
+            return estimate_tokens(text)
+        return len(text) + 1  # the joining newline
+
+    def split(self, lines: Iterable[str]) -> Iterator[Chunk]:
+        for number, text in enumerate(lines, 1):
+            size = self.size(text)
+            if size > self.config.chunk_size:
+                yield from self.flush(overlap=False)
+                yield from self.cut(number, text)
+                continue
+            while self.window and self.window_size + size > self.config.chunk_size:
+                if not self.has_new_lines(list(self.window)):
+                    # Only overlap and blank lines are left; shrink them
+                    # rather than emit the overlap again.
+                    self.window_size -= self.window.popleft()[2]
+                    self.carried = max(0, self.carried - 1)
+                    continue
+                yield from self.flush(overlap=True)
+            self.window.append((number, text, size))
+            self.window_size += size
+        yield from self.flush(overlap=False)
+
+    def flush(self, overlap: bool) -> Iterator[Chunk]:
+        """Emits the window, up to a paragraph break when there is one."""
+        lines = list(self.window)
+        end = self.paragraph_break(lines) if overlap else len(lines)
+        emitted, rest = lines[:end], lines[end:]
+
+        chunk = self.chunk(emitted) if self.has_new_lines(emitted) else None
+        if chunk is not None:
+            yield chunk
+
+        kept: List[Tuple[int, str, int]] = []
+        if overlap:
+            budget = self.config.chunk_overlap
+            for line in reversed(emitted[1:]):
+                if line[2] > budget:
+                    break
+                kept.insert(0, line)
+                budget -= line[2]
+        self.window = deque(kept + rest)
+        self.window_size = sum(line[2] for line in self.window)
+        self.carried = len(kept)
+
+    def has_new_lines(self, lines: List[Tuple[int, str, int]]) -> bool:
+        """Whether ``lines`` hold a non-blank line past the carried overlap."""
+        return any(text.strip() for _, text, _ in lines[self.carried :])
+
+    def paragraph_break(self, lines: List[Tuple[int, str, int]]) -> int:
+        """
+        Index of the last blank line in the second half of the window and
+        past the carried overlap, or the window's length if there is none.
+        """
+        half, filled = self.config.chunk_size // 2, 0
+        best = len(lines)
+        for i, (_, text, size) in enumerate(lines):
+            if filled >= half and not text.strip() and i > self.carried:
+                best = i
+            filled += size
+        return best
+
+    def cut(self, number: int, text: str) -> Iterator[Chunk]:
+        """Cuts a line longer than a window into window-sized pieces."""
+        width = self.config.chunk_size
+        if self.config.strategy == SplitStrategy.TOKEN:
+            width *= CHARS_PER_TOKEN
+        for start in range(0, len(text), width):
+            chunk = self.chunk([(number, text[start : start + width], 0)])
+            if chunk is not None:
+                yield chunk
+
+    def chunk(self, lines: List[Tuple[int, str, int]]) -> Optional[Chunk]:
+        content_lines = [i for i, (_, text, _) in enumerate(lines) if text.strip()]
+        if not content_lines:
+            return None
+        lines = lines[content_lines[0] : content_lines[-1] + 1]
+        return Chunk(
+            document_id=self.document_id,
+            content="\n".join(text for _, text, _ in lines),
+            metadata={
+                FILE_NAME_KEY: self.file_name,
+                LINE_NUMBER_KEY: lines[0][0],
+                LINE_START_KEY: lines[0][0],
+                LINE_END_KEY: lines[-1][0],
+            },
+        )
@@ -0,0 +1,36 @@
+import codecs
+from typing import Iterable, Iterator
+
+
+def _is_complete(line: str) -> bool:
+    """
+    True when ``line`` ends with a line break that cannot continue in the
+    next piece; a trailing ``\\r`` may still be followed by ``\\n``.
+    """
+    return len(line.splitlines()[0]) < len(line) and not line.endswith("\r")
+
+
+def decode_lines(pieces: Iterable[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Decodes a stream of byte pieces into lines, without line breaks.
+
+    Decoding is incremental: characters and ``\\r\\n`` pairs split across
+    pieces are put back together, and only the current piece and line are
+    held in memory. Lines are split like ``str.splitlines``.
+
+    :raises UnicodeDecodeError: If the stream is not valid ``encoding``.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    for piece in pieces:
+        pending += decoder.decode(piece)
+        if not pending:
+            continue
+        lines = pending.splitlines(keepends=True)
+        # The last line may continue in the next piece.
+        pending = "" if _is_complete(lines[-1]) else lines.pop()
+        for line in lines:
+            yield line.splitlines()[0]
+
+    pending += decoder.decode(b"", final=True)
+    yield from pending.splitlines()
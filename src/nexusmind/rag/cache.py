@@ -0,0 +1,178 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Hashable, List, Optional
+from uuid import UUID
+
+import numpy as np
+
+from nexusmind.config import get_core_config
+from nexusmind.logger import get_logger
+from nexusmind.metrics import ANSWER_CACHE_LOOKUPS
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _BrainAnswers:
+    """Answers cached for one version of a brain, oldest first."""
+
+    version: Hashable
+    questions: List[str] = field(default_factory=list)
+    answers: List[str] = field(default_factory=list)
+    created_at: List[float] = field(default_factory=list)
+    # Unit-length question embeddings, one row per answer.
+    embeddings: Optional[np.ndarray] = None
+
+
+def _unit(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    """
+    Process-wide cache of generated answers per brain.
+
+    A question matches a cached answer when the cosine similarity of their
+    embeddings is at least ``min_similarity``, so rephrasings that embed
+    almost identically share an answer. Answers are tied to the brain
+    version they were generated from and are dropped as soon as a lookup
+    sees a newer version, or once they are older than ``ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600.0,
+        min_similarity: float = 0.97,
+        max_entries_per_brain: int = 256,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self.max_entries_per_brain = max_entries_per_brain
+        self._brains: Dict[UUID, _BrainAnswers] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, brain_id: UUID, version: Hashable, embedding: List[float]
+    ) -> Optional[str]:
+        """
+        Returns the answer of the closest cached question, or None. An empty
+        embedding, or one whose dimension differs from the cached ones (the
+        brain's embedding model changed), never matches.
+
+        :param version: The brain's current on-disk version.
+        :param embedding: The embedding of the question being asked.
+        """
+        query = _unit(embedding)
+        with self._lock:
+            entry = self._current(brain_id, version)
+            if entry is not None:
+                self._expire(entry)
+            if (
+                entry is None
+                or entry.embeddings is None
+                or not len(query)
+                or entry.embeddings.shape[1] != len(query)
+            ):
+                ANSWER_CACHE_LOOKUPS.labels(result="miss").inc()
+                return None
+
+            similarities = entry.embeddings @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.min_similarity:
+                ANSWER_CACHE_LOOKUPS.labels(result="miss").inc()
+                return None
+
+            ANSWER_CACHE_LOOKUPS.labels(result="hit").inc()
+            logger.debug(
+                f"Answer cache hit for brain {brain_id} "
+                f"(similarity {similarities[best]:.3f} to "
+                f"{entry.questions[best]!r})."
+            )
+            return entry.answers[best]
+
+    def put(
+        self,
+        brain_id: UUID,
+        version: Hashable,
+        question: str,
+        embedding: List[float],
+        answer: str,
+    ) -> None:
+        """Caches ``answer`` for ``question`` against a brain version."""
+        if not embedding:
+            return
+        row = _unit(embedding)[np.newaxis, :]
+        with self._lock:
+            entry = self._current(brain_id, version)
+            if entry is not None and entry.embeddings is not None:
+                if entry.embeddings.shape[1] != row.shape[1]:
+                    # Answers embedded by another model can never match again.
+                    entry = None
+            if entry is None:
+                entry = self._brains[brain_id] = _BrainAnswers(version=version)
+
+            entry.embeddings = (
+                row if entry.embeddings is None else np.vstack([entry.embeddings, row])
+            )
+            entry.questions.append(question)
+            entry.answers.append(answer)
+            entry.created_at.append(time.monotonic())
+
+            overflow = len(entry.answers) - self.max_entries_per_brain
+            if overflow > 0:
+                self._drop_oldest(entry, overflow)
+
+    def invalidate(self, brain_id: UUID) -> None:
+        """Drops every answer cached for a brain."""
+        with self._lock:
+            self._brains.pop(brain_id, None)
+
+    def clear(self) -> None:
+        """Drops every cached answer."""
+        with self._lock:
+            self._brains.clear()
+
+    def __len__(self) -> int:
+        return sum(len(entry.answers) for entry in self._brains.values())
+
+    def _current(self, brain_id: UUID, version: Hashable) -> Optional[_BrainAnswers]:
+        """Returns the brain's answers, dropping them if the brain has changed."""
+        entry = self._brains.get(brain_id)
+        if entry is not None and entry.version != version:
+            logger.info(f"Brain {brain_id} changed; dropping its cached answers.")
+            del self._brains[brain_id]
+            return None
+        return entry
+
+    def _expire(self, entry: _BrainAnswers) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = sum(1 for created in entry.created_at if created <= cutoff)
+        if expired:
+            self._drop_oldest(entry, expired)
+
+    @staticmethod
+    def _drop_oldest(entry: _BrainAnswers, count: int) -> None:
+        del entry.questions[:count]
+        del entry.answers[:count]
+        del entry.created_at[:count]
+        entry.embeddings = entry.embeddings[count:] if entry.answers else None
+
+
+@lru_cache(maxsize=None)
+def get_answer_cache() -> Optional[AnswerCache]:
+    """
+    Factory function to get the process-wide AnswerCache singleton, or None
+    when answer caching is disabled.
+    """
+    config = get_core_config()
+    if not config.answer_cache_enabled:
+        return None
+    return AnswerCache(
+        ttl_seconds=config.answer_cache_ttl_seconds,
+        min_similarity=config.answer_cache_min_similarity,
+        max_entries_per_brain=config.answer_cache_max_entries_per_brain,
+    )
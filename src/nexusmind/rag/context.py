@@ -0,0 +1,95 @@
+from typing import List
+
+import litellm
+from pydantic import BaseModel, ConfigDict, Field
+
+from nexusmind.llm.embedding_cache import normalize_text
+from nexusmind.llm.tokens import estimate_tokens
+from nexusmind.logger import get_logger
+from nexusmind.metrics import RAG_CONTEXT_CHUNKS, RAG_PROMPT_TOKENS
+from nexusmind.processor.splitter import Chunk
+from nexusmind.storage.vector_store_base import SearchHit
+
+logger = get_logger(__name__)
+
+DEFAULT_PROMPT_TOKEN_BUDGET = 8000
+# Tokens of the newline that separates two chunks in the prompt.
+SEPARATOR_TOKENS = 1
+
+
+def count_tokens(model: str, text: str) -> int:
+    """
+    Counts tokens with the model's tokenizer, falling back to a conservative
+    estimate when litellm cannot tokenize for the model.
+    """
+    try:
+        return litellm.token_counter(model=model, text=text)
+    except Exception as e:
+        logger.debug(f"Could not count tokens for model {model}: {e}")
+        return estimate_tokens(text)
+
+
+class AssembledContext(BaseModel):
+    """The chunks selected for a prompt and the tokens they take."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    chunks: List[Chunk] = Field(default_factory=list)
+    tokens: int = 0
+    duplicates: int = 0
+    over_budget: int = 0
+
+
+class ContextAssembler:
+    """
+    Fits retrieved chunks into a prompt's token budget.
+
+    Hits are taken highest score first. Chunks whose whitespace-normalized
+    content was already taken are dropped, and a chunk that does not fit the
+    remaining budget is skipped in favour of smaller, lower-scoring ones.
+    """
+
+    def __init__(self, model: str, token_budget: int = DEFAULT_PROMPT_TOKEN_BUDGET):
+        self.model = model
+        self.token_budget = token_budget
+
+    def assemble(self, hits: List[SearchHit], reserved_tokens: int) -> AssembledContext:
+        """
+        Selects chunks for the prompt.
+
+        :param hits: Retrieved chunks with their scores.
+        :param reserved_tokens: Tokens needed outside the context, i.e. the
+            rest of the prompt plus the answer's ``max_tokens``.
+        """
+        context = AssembledContext()
+        remaining = self.token_budget - reserved_tokens
+        seen = set()
+        for hit in sorted(hits, key=lambda hit: hit.score, reverse=True):
+            content = normalize_text(hit.chunk.content)
+            if content in seen:
+                context.duplicates += 1
+                continue
+            seen.add(content)
+
+            tokens = count_tokens(self.model, hit.chunk.content) + SEPARATOR_TOKENS
+            if tokens > remaining:
+                context.over_budget += 1
+                continue
+            context.chunks.append(hit.chunk)
+            context.tokens += tokens
+            remaining -= tokens
+
+        if context.duplicates or context.over_budget:
+            logger.info(
+                f"Context holds {len(context.chunks)} of {len(hits)} chunks "
+                f"({context.tokens} tokens): dropped {context.duplicates} "
+                f"duplicates and {context.over_budget} over the budget of "
+                f"{self.token_budget} tokens."
+            )
+        return context
+
+
+def observe_prompt(prompt_tokens: int, context: AssembledContext) -> None:
+    """Records the size of a prompt sent to the LLM."""
+    RAG_PROMPT_TOKENS.observe(prompt_tokens)
+    RAG_CONTEXT_CHUNKS.observe(len(context.chunks))
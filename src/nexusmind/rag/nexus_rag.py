@@ -1,8 +1,26 @@
-from typing import List
+import asyncio
+import time
+from functools import partial
+from typing import AsyncIterator, Dict, Hashable, List, Optional, Tuple
 
 from ..brain.brain import Brain
+from ..brain.cache import read_brain_version
+from ..concurrency import AsyncSingleFlight, SingleFlight
+from ..llm.embedding_cache import normalize_text
 from ..logger import logger
+from ..metrics import CHAT_TIME_TO_FIRST_TOKEN_SECONDS
 from ..processor.splitter import Chunk
+from ..storage.vector_store_base import SearchHit
+from .cache import AnswerCache
+from .context import ContextAssembler, count_tokens, observe_prompt
+from .windows import expand_windows
+
+# Process-wide, so concurrent requests coalesce across NexusRAG instances.
+_ANSWER_FLIGHTS = SingleFlight("answer")
+_ASYNC_ANSWER_FLIGHTS = AsyncSingleFlight("answer")
+
+# Turns kept in a conversation history; older turns are dropped.
+MAX_HISTORY_TURNS = 50
 
 
 class NexusRAG:
@@ -10,13 +28,36 @@ class NexusRAG:
     The NexusRAG class orchestrates the Retrieval-Augmented Generation pipeline.
     """
 
-    def __init__(self, brain: Brain):
+    def __init__(
+        self,
+        brain: Brain,
+        answer_cache: Optional[AnswerCache] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ):
         """
         Initializes the RAG pipeline.
 
         :param brain: The Brain instance containing configuration and state.
+        :param answer_cache: Optional cache of answers to earlier questions.
+        :param history: The conversation the turns are recorded in. Defaults
+            to the brain's own history; callers sharing a cached brain pass
+            a list of their own.
         """
         self.brain = brain
+        self.answer_cache = answer_cache
+        self.history = brain.history if history is None else history
+
+    def _record_turn(self, question: str, answer: str) -> None:
+        """Appends a turn to the history, keeping the latest turns only."""
+        self.history.append({"user": question, "assistant": answer})
+        del self.history[:-MAX_HISTORY_TURNS]
+
+    def _brain_version(self) -> Optional[Hashable]:
+        """The brain's on-disk version, or None if it was never saved."""
+        try:
+            return read_brain_version(self.brain.brain_id)
+        except FileNotFoundError:
+            return None
 
     def _generate_prompt(self, question: str, context_chunks: List[Chunk]) -> str:
         """
@@ -73,41 +114,231 @@ class NexusRAG:
 Please answer the question: {question}"""
         return prompt
 
-    def generate_answer(self, question: str) -> str:
-        """
-        Executes the full RAG pipeline to generate an answer.
-        """
-        logger.info(f"Generating answer for question: {question}")
+    def _cached_answer(
+        self, question: str, version: Hashable, embedding: List[float]
+    ) -> Optional[str]:
+        answer = self.answer_cache.get(self.brain.brain_id, version, embedding)
+        if answer is not None:
+            logger.info("Answered from the answer cache.")
+            self._record_turn(question, answer)
+        return answer
 
-        # a. Retrieve relevant chunks
+    def _check_vector_store(self) -> None:
         if not self.brain.vector_store:
             logger.error("Vector store not initialized in Brain.")
             raise ValueError("Vector store not initialized in Brain.")
 
-        logger.debug("Performing similarity search...")
-        retrieved_chunks = self.brain.vector_store.similarity_search(query=question)
+    def _check_llm_endpoint(self) -> None:
+        if not self.brain.llm_endpoint:
+            logger.error("LLM endpoint not initialized in Brain.")
+            raise ValueError("LLM endpoint not initialized in Brain.")
+
+    def _retrieve(
+        self, question: str, embedding: Optional[List[float]] = None
+    ) -> List[SearchHit]:
+        """
+        Searches the brain's vector store with its retrieval settings.
 
-        context_chunk_ids = [str(chunk.document_id) for chunk in retrieved_chunks]
+        :param embedding: The question's embedding, if already computed.
+        """
+        logger.debug("Performing similarity search...")
+        hits = self.brain.vector_store.similarity_search_with_scores(
+            query=question,
+            k=self.brain.retrieval_k,
+            max_distance=self.brain.retrieval_max_distance,
+            min_score=self.brain.retrieval_min_score,
+            embedding=embedding,
+        )
+        context_chunk_ids = [str(hit.chunk.document_id) for hit in hits]
         logger.info(
-            f"Retrieved {len(retrieved_chunks)} chunks with document IDs: "
-            f"{context_chunk_ids}"
+            f"Retrieved {len(hits)} chunks with document IDs: "
+            f"{context_chunk_ids} and scores: {[round(h.score, 3) for h in hits]}"
         )
+        if self.brain.retrieval_window > 0:
+            hits = expand_windows(
+                hits, self.brain.vector_store, self.brain.retrieval_window
+            )
+        return hits
 
-        # b. Augment the prompt
-        prompt = self._generate_prompt(question, retrieved_chunks)
+    def _build_messages(self, question: str, hits: List[SearchHit]) -> List[dict]:
+        """Builds the prompt from as many hits as the token budget allows."""
+        model = self.brain.llm_model_name
+        fixed_tokens = count_tokens(model, self._generate_prompt(question, []))
+        context = ContextAssembler(model, self.brain.prompt_token_budget).assemble(
+            hits, reserved_tokens=fixed_tokens + self.brain.max_tokens
+        )
+        observe_prompt(fixed_tokens + context.tokens, context)
+
+        prompt = self._generate_prompt(question, context.chunks)
         logger.info(f"Generated prompt for LLM: {prompt}")  # DEBUG: Log the full prompt
-        messages = [{"role": "user", "content": prompt}]
+        return [{"role": "user", "content": prompt}]
 
-        # c. Generate the answer using the LLM
-        if not self.brain.llm_endpoint:
-            logger.error("LLM endpoint not initialized in Brain.")
-            raise ValueError("LLM endpoint not initialized in Brain.")
+    def _cache_answer(
+        self,
+        question: str,
+        answer: str,
+        version: Optional[Hashable],
+        embedding: Optional[List[float]],
+    ) -> None:
+        logger.info(f"Generated answer: {answer}")
+        if answer and embedding and self.answer_cache is not None:
+            self.answer_cache.put(
+                self.brain.brain_id, version, question, embedding, answer
+            )
 
+    def _flight_key(self, question: str, version: Optional[Hashable]):
+        """
+        Key under which identical concurrent questions are coalesced, or None
+        when the brain has no on-disk version to tie the answer to.
+        """
+        if version is None:
+            return None
+        return (self.brain.brain_id, version, normalize_text(question))
+
+    def _generate(
+        self,
+        question: str,
+        version: Optional[Hashable],
+        embedding: Optional[List[float]],
+    ) -> str:
+        # a. Retrieve relevant chunks
+        hits = self._retrieve(question, embedding)
+
+        # b. Augment the prompt
+        messages = self._build_messages(question, hits)
+
+        # c. Generate the answer using the LLM
+        self._check_llm_endpoint()
         logger.debug("Calling LLM to generate final answer...")
         answer = self.brain.llm_endpoint.get_chat_completion(messages)
-        logger.info(f"Generated answer: {answer}")
+        self._cache_answer(question, answer, version, embedding)
+        return answer
+
+    def generate_answer(self, question: str) -> str:
+        """
+        Executes the full RAG pipeline to generate an answer.
+        """
+        logger.info(f"Generating answer for question: {question}")
+
+        # Repeated questions are answered from the cache. The question's
+        # embedding is passed on, so the similarity search below does not
+        # embed it a second time.
+        version = self._brain_version()
+        embedding = None
+        if self.answer_cache is not None and version is not None:
+            self._check_llm_endpoint()
+            embedding = self.brain.llm_endpoint.get_embedding(question)
+            answer = self._cached_answer(question, version, embedding)
+            if answer is not None:
+                return answer
+
+        self._check_vector_store()
+        key = self._flight_key(question, version)
+        generate = partial(self._generate, question, version, embedding)
+        # Identical questions asked concurrently share one retrieval and LLM
+        # call.
+        answer = _ANSWER_FLIGHTS.do(key, generate) if key else generate()
 
         # d. Update history
-        self.brain.history.append({"user": question, "assistant": answer})
+        self._record_turn(question, answer)
+        return answer
+
+    async def _aprepare(
+        self, question: str
+    ) -> Tuple[Optional[Hashable], Optional[List[float]], Optional[str]]:
+        """
+        Embeds the question and checks the answer cache without blocking the
+        event loop.
+
+        :return: ``(version, embedding, cached_answer)``.
+        """
+        self._check_vector_store()
+        self._check_llm_endpoint()
+
+        # The question is always embedded here, through the async endpoint,
+        # and the similarity search in the worker thread reuses the vector.
+        version = self._brain_version()
+        embedding = await self.brain.llm_endpoint.aget_embedding(question)
+        answer = None
+        if self.answer_cache is not None and version is not None:
+            answer = self._cached_answer(question, version, embedding)
+        return version, embedding, answer
 
+    async def _agenerate(
+        self,
+        question: str,
+        version: Optional[Hashable],
+        embedding: Optional[List[float]],
+    ) -> str:
+        hits = await asyncio.to_thread(self._retrieve, question, embedding)
+        messages = self._build_messages(question, hits)
+
+        logger.debug("Calling LLM to generate final answer...")
+        answer = await self.brain.llm_endpoint.aget_chat_completion(messages)
+        self._cache_answer(question, answer, version, embedding)
+        return answer
+
+    async def agenerate_answer(self, question: str) -> str:
+        """
+        Async variant of ``generate_answer`` for use inside the event loop.
+
+        Provider calls are awaited and the FAISS search runs in a worker
+        thread, so the loop keeps serving other requests meanwhile.
+        """
+        logger.info(f"Generating answer for question: {question}")
+        version, embedding, answer = await self._aprepare(question)
+        if answer is not None:
+            return answer
+
+        key = self._flight_key(question, version)
+        generate = partial(self._agenerate, question, version, embedding)
+        answer = await (_ASYNC_ANSWER_FLIGHTS.do(key, generate) if key else generate())
+        self._record_turn(question, answer)
         return answer
+
+    async def astream_answer(self, question: str) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Streams an answer as ``(event, data)`` pairs.
+
+        A ``sources`` event describing the retrieved chunks comes first, then
+        one ``token`` event per text delta from the model and a final
+        ``done`` event. A cached answer is sent as a single token. The time
+        from the call to the first token is recorded in
+        ``CHAT_TIME_TO_FIRST_TOKEN_SECONDS``.
+        """
+        started = time.perf_counter()
+        logger.info(f"Streaming answer for question: {question}")
+        version, embedding, answer = await self._aprepare(question)
+        if answer is not None:
+            yield "sources", {"sources": [], "cached": True}
+            CHAT_TIME_TO_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+            yield "token", {"text": answer}
+            yield "done", {"cached": True}
+            return
+
+        hits = await asyncio.to_thread(self._retrieve, question, embedding)
+        yield "sources", {"sources": [self._source(hit) for hit in hits]}
+        messages = self._build_messages(question, hits)
+
+        parts: List[str] = []
+        async for delta in self.brain.llm_endpoint.astream_chat_completion(messages):
+            if not parts:
+                CHAT_TIME_TO_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+            parts.append(delta)
+            yield "token", {"text": delta}
+
+        answer = "".join(parts)
+        self._cache_answer(question, answer, version, embedding)
+        self._record_turn(question, answer)
+        yield "done", {"cached": False}
+
+    @staticmethod
+    def _source(hit: SearchHit) -> dict:
+        """JSON-serializable description of a retrieved chunk."""
+        return {
+            "document_id": str(hit.chunk.document_id),
+            "chunk_id": str(hit.chunk.chunk_id),
+            "metadata": hit.chunk.metadata,
+            "score": hit.score,
+            "distance": hit.distance,
+        }
@@ -0,0 +1,135 @@
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from nexusmind.logger import get_logger
+from nexusmind.processor.splitter import (
+    LINE_END_KEY,
+    LINE_NUMBER_KEY,
+    LINE_START_KEY,
+    Chunk,
+)
+from nexusmind.storage.vector_store_base import SearchHit, VectorStoreBase
+
+logger = get_logger(__name__)
+
+
+def _line_range(chunk: Chunk) -> Optional[Tuple[int, int]]:
+    """First and last line of a chunk, or None if it has no line number."""
+    line = chunk.metadata.get(LINE_NUMBER_KEY)
+    if line is None:
+        return None
+    return (
+        chunk.metadata.get(LINE_START_KEY, line),
+        chunk.metadata.get(LINE_END_KEY, line),
+    )
+
+
+def _merge_intervals(
+    windows: List[Tuple[int, int, SearchHit]]
+) -> List[Tuple[int, int, List[SearchHit]]]:
+    """Merges overlapping or touching ``(first, last, hit)`` line windows."""
+    merged: List[Tuple[int, int, List[SearchHit]]] = []
+    for first, last, hit in sorted(windows, key=lambda window: window[0]):
+        if merged and first <= merged[-1][1] + 1:
+            start, end, hits = merged[-1]
+            merged[-1] = (start, max(end, last), hits + [hit])
+        else:
+            merged.append((first, last, [hit]))
+    return merged
+
+
+def expand_windows(
+    hits: List[SearchHit], store: VectorStoreBase, window: int
+) -> List[SearchHit]:
+    """
+    Expands line hits to the ``window`` lines around their line range and
+    merges overlapping windows of a document into one block.
+
+    Each block is returned as a hit on a synthetic chunk joining its chunks'
+    contents, with the best score and distance of the hits it absorbed and
+    ``line_start``/``line_end`` metadata. Lines repeated by overlapping
+    window chunks appear once. Hits without a line number are kept as they
+    are. Blocks are ordered by score, best first.
+    """
+    if window <= 0:
+        return hits
+
+    by_document: Dict[UUID, List[Tuple[int, int, SearchHit]]] = {}
+    results: List[SearchHit] = []
+    for hit in hits:
+        lines = _line_range(hit.chunk)
+        if lines is None:
+            results.append(hit)
+            continue
+        by_document.setdefault(hit.chunk.document_id, []).append(
+            (lines[0] - window, lines[1] + window, hit)
+        )
+
+    for document_id, windows in by_document.items():
+        for first, last, merged in _merge_intervals(windows):
+            chunks = store.chunks_by_line(document_id, first, last) or sorted(
+                (hit.chunk for hit in merged), key=_line_range
+            )
+            results.append(_block(document_id, _without_overlap(chunks), merged))
+
+    blocks = len(results)
+    if blocks < len(hits):
+        logger.debug(f"Merged {len(hits)} hits into {blocks} context blocks.")
+    return sorted(results, key=lambda hit: hit.score, reverse=True)
+
+
+def _without_overlap(chunks: List[Chunk]) -> List[Chunk]:
+    """
+    Drops the lines of chunks, in line order, that earlier chunks already
+    cover, so overlapping window chunks do not repeat text. Consecutive
+    pieces of a cut line are joined back into one chunk.
+    """
+    kept: List[Chunk] = []
+    covered = None
+    for chunk in chunks:
+        start, end = _line_range(chunk)
+        if kept and start == end == covered and _line_range(kept[-1]) == (end, end):
+            kept[-1] = kept[-1].model_copy(
+                update={"content": kept[-1].content + chunk.content}
+            )
+            continue
+        if covered is not None and start <= covered:
+            if end <= covered:
+                continue
+            lines = chunk.content.split("\n")
+            if len(lines) == end - start + 1:
+                trimmed = covered - start + 1
+                metadata = dict(chunk.metadata)
+                metadata[LINE_NUMBER_KEY] = metadata[LINE_START_KEY] = covered + 1
+                chunk = chunk.model_copy(
+                    update={
+                        "content": "\n".join(lines[trimmed:]),
+                        "metadata": metadata,
+                    }
+                )
+        kept.append(chunk)
+        covered = end if covered is None else max(covered, end)
+    return kept
+
+
+def _block(document_id: UUID, chunks: List[Chunk], hits: List[SearchHit]) -> SearchHit:
+    ranges = [_line_range(chunk) for chunk in chunks]
+    metadata = {
+        key: value
+        for key, value in chunks[0].metadata.items()
+        if key != LINE_NUMBER_KEY
+    }
+    metadata[LINE_START_KEY] = min(start for start, _ in ranges)
+    metadata[LINE_END_KEY] = max(end for _, end in ranges)
+    best = max(hits, key=lambda hit: hit.score)
+    chunk = Chunk(
+        chunk_id=best.chunk.chunk_id,
+        document_id=document_id,
+        content="\n".join(chunk.content for chunk in chunks),
+        metadata=metadata,
+    )
+    return SearchHit(
+        chunk=chunk,
+        distance=min(hit.distance for hit in hits),
+        score=best.score,
+    )
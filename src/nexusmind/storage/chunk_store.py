@@ -0,0 +1,481 @@
+import bisect
+import json
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic_core import to_json
+
+from ..processor.splitter import FILE_NAME_KEY, LINE_NUMBER_KEY, Chunk
+
+# FILE_NAME_KEY and LINE_NUMBER_KEY are stored as typed columns; every other
+# metadata key goes to the per-chunk JSON metadata arena.
+# Filter field matching ``Chunk.document_id`` rather than a metadata key.
+DOCUMENT_ID_KEY = "document_id"
+
+# Column files written for every segment, keyed by column name.
+ARRAY_COLUMNS = (
+    "text_offsets",
+    "meta_offsets",
+    "chunk_ids",
+    "document_ids",
+    "line_numbers",
+    "file_codes",
+)
+ARENA_COLUMNS = ("text", "meta")
+
+MISSING = -1
+
+# Rough per-object cost of a Chunk held in memory before it is sealed.
+IN_MEMORY_CHUNK_OVERHEAD = 512
+
+_NO_IDS = np.zeros(0, dtype=np.int64)
+
+
+def _arena(values: Sequence[bytes]):
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(v) for v in values], out=offsets[1:])
+    return b"".join(values), offsets
+
+
+def _uuid_column(ids: Sequence[uuid.UUID]) -> np.ndarray:
+    data = b"".join(u.bytes for u in ids)
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(ids), 16).copy()
+
+
+class ChunkColumns:
+    """
+    Columnar, memory-mapped storage of one segment's chunks.
+
+    Content and non-indexed metadata live in UTF-8 byte arenas addressed by
+    offset arrays; ids, line numbers and file names are fixed-width
+    columns. ``Chunk`` objects are only built when a row is read.
+    """
+
+    def __init__(
+        self,
+        text: np.ndarray,
+        text_offsets: np.ndarray,
+        meta: np.ndarray,
+        meta_offsets: np.ndarray,
+        chunk_ids: np.ndarray,
+        document_ids: np.ndarray,
+        line_numbers: np.ndarray,
+        file_codes: np.ndarray,
+        file_names: List[str],
+    ):
+        self.text = text
+        self.text_offsets = text_offsets
+        self.meta = meta
+        self.meta_offsets = meta_offsets
+        self.chunk_ids = chunk_ids
+        self.document_ids = document_ids
+        self.line_numbers = line_numbers
+        self.file_codes = file_codes
+        self.file_names = file_names
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    def __getitem__(self, i: int) -> Chunk:
+        text_start, text_end = self.text_offsets[i], self.text_offsets[i + 1]
+        return Chunk.model_construct(
+            chunk_id=uuid.UUID(bytes=bytes(self.chunk_ids[i])),
+            document_id=uuid.UUID(bytes=bytes(self.document_ids[i])),
+            content=bytes(self.text[text_start:text_end]).decode("utf-8"),
+            metadata=self.metadata(i),
+        )
+
+    def metadata(self, i: int) -> Dict[str, Any]:
+        """Reads one row's metadata without decoding its content."""
+        metadata = {}
+        file_code = int(self.file_codes[i])
+        if file_code != MISSING:
+            metadata[FILE_NAME_KEY] = self.file_names[file_code]
+        line_number = int(self.line_numbers[i])
+        if line_number != MISSING:
+            metadata[LINE_NUMBER_KEY] = line_number
+        meta_start, meta_end = self.meta_offsets[i], self.meta_offsets[i + 1]
+        if meta_end > meta_start:
+            metadata.update(json.loads(bytes(self.meta[meta_start:meta_end])))
+        return metadata
+
+    def group_rows(self, field: str, start: int, end: int):
+        """
+        Groups rows ``start:end`` by their value of a filter field.
+
+        :return: ``(value, local row ids)`` pairs.
+        """
+        if field == DOCUMENT_ID_KEY:
+            keys = np.ascontiguousarray(self.document_ids[start:end]).view("V16")
+            values, inverse = np.unique(keys.ravel(), return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.searchsorted(inverse[order], np.arange(len(values) + 1))
+            return [
+                (uuid.UUID(bytes=value.tobytes()), start + order[lo:hi])
+                for value, lo, hi in zip(values, bounds[:-1], bounds[1:])
+            ]
+        if field in (FILE_NAME_KEY, LINE_NUMBER_KEY):
+            column = self.file_codes if field == FILE_NAME_KEY else self.line_numbers
+            codes = np.asarray(column[start:end])
+            groups = []
+            for code in np.unique(codes):
+                if code == MISSING:
+                    continue
+                value = self.file_names[code] if field == FILE_NAME_KEY else int(code)
+                groups.append((value, start + np.flatnonzero(codes == code)))
+            return groups
+        return _group_values(
+            ((i, self.metadata(i).get(field)) for i in range(start, end))
+        )
+
+    @classmethod
+    def from_chunks(cls, chunks: Sequence[Chunk]) -> "ChunkColumns":
+        """Builds in-memory columns for a batch of chunks."""
+        file_names: List[str] = []
+        file_name_codes: Dict[str, int] = {}
+        file_codes = np.full(len(chunks), MISSING, dtype=np.int32)
+        line_numbers = np.full(len(chunks), MISSING, dtype=np.int64)
+        metas = []
+
+        for i, chunk in enumerate(chunks):
+            extra = dict(chunk.metadata)
+            file_name = extra.get(FILE_NAME_KEY)
+            if isinstance(file_name, str):
+                del extra[FILE_NAME_KEY]
+                if file_name not in file_name_codes:
+                    file_name_codes[file_name] = len(file_names)
+                    file_names.append(file_name)
+                file_codes[i] = file_name_codes[file_name]
+            line_number = extra.get(LINE_NUMBER_KEY)
+            if isinstance(line_number, int) and line_number >= 0:
+                del extra[LINE_NUMBER_KEY]
+                line_numbers[i] = line_number
+            # to_json writes UUIDs, datetimes and models as JSON strings.
+            metas.append(to_json(extra) if extra else b"")
+
+        text, text_offsets = _arena([c.content.encode("utf-8") for c in chunks])
+        meta, meta_offsets = _arena(metas)
+        return cls(
+            text=np.frombuffer(text, dtype=np.uint8),
+            text_offsets=text_offsets,
+            meta=np.frombuffer(meta, dtype=np.uint8),
+            meta_offsets=meta_offsets,
+            chunk_ids=_uuid_column([c.chunk_id for c in chunks]),
+            document_ids=_uuid_column([c.document_id for c in chunks]),
+            line_numbers=line_numbers,
+            file_codes=file_codes,
+            file_names=file_names,
+        )
+
+    @classmethod
+    def concatenate(cls, parts: Sequence["ChunkColumns"]) -> "ChunkColumns":
+        """Joins several segments' columns, preserving row order."""
+        file_names: List[str] = []
+        file_name_codes: Dict[str, int] = {}
+        file_codes = []
+        for part in parts:
+            remap = np.empty(len(part.file_names) + 1, dtype=np.int32)
+            remap[-1] = MISSING
+            for code, name in enumerate(part.file_names):
+                if name not in file_name_codes:
+                    file_name_codes[name] = len(file_names)
+                    file_names.append(name)
+                remap[code] = file_name_codes[name]
+            file_codes.append(remap[np.asarray(part.file_codes)])
+
+        def join_arena(arena: str, offsets: str):
+            data = np.concatenate([np.asarray(getattr(p, arena)) for p in parts])
+            joined = [np.zeros(1, dtype=np.int64)]
+            base = 0
+            for part in parts:
+                part_offsets = np.asarray(getattr(part, offsets))
+                joined.append(part_offsets[1:] + base)
+                base += int(part_offsets[-1])
+            return data, np.concatenate(joined)
+
+        text, text_offsets = join_arena("text", "text_offsets")
+        meta, meta_offsets = join_arena("meta", "meta_offsets")
+        return cls(
+            text=text,
+            text_offsets=text_offsets,
+            meta=meta,
+            meta_offsets=meta_offsets,
+            chunk_ids=np.concatenate([p.chunk_ids for p in parts]),
+            document_ids=np.concatenate([p.document_ids for p in parts]),
+            line_numbers=np.concatenate([p.line_numbers for p in parts]),
+            file_codes=np.concatenate(file_codes),
+            file_names=file_names,
+        )
+
+    def take(self, rows: np.ndarray) -> "ChunkColumns":
+        """Returns new columns holding only ``rows``, in the given order."""
+        rows = np.asarray(rows, dtype=np.int64)
+
+        def take_arena(arena: str, offsets: str):
+            offsets = np.asarray(getattr(self, offsets))
+            starts, ends = offsets[rows], offsets[rows + 1]
+            new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+            np.cumsum(ends - starts, out=new_offsets[1:])
+            # Byte positions of every kept row, laid out back to back.
+            positions = np.repeat(starts - new_offsets[:-1], ends - starts)
+            positions += np.arange(new_offsets[-1])
+            return np.asarray(getattr(self, arena))[positions], new_offsets
+
+        text, text_offsets = take_arena("text", "text_offsets")
+        meta, meta_offsets = take_arena("meta", "meta_offsets")
+        return ChunkColumns(
+            text=text,
+            text_offsets=text_offsets,
+            meta=meta,
+            meta_offsets=meta_offsets,
+            chunk_ids=np.asarray(self.chunk_ids)[rows],
+            document_ids=np.asarray(self.document_ids)[rows],
+            line_numbers=np.asarray(self.line_numbers)[rows],
+            file_codes=np.asarray(self.file_codes)[rows],
+            file_names=list(self.file_names),
+        )
+
+    # --- Persistence ---
+    @staticmethod
+    def paths(directory: Path, name: str) -> List[Path]:
+        """Every file backing a segment's columns."""
+        return [
+            *(directory / f"{name}.{column}.npy" for column in ARRAY_COLUMNS),
+            *(directory / f"{name}.{column}.bin" for column in ARENA_COLUMNS),
+            directory / f"{name}.file_names.json",
+        ]
+
+    def write(self, directory: Path, name: str) -> None:
+        for column in ARRAY_COLUMNS:
+            np.save(directory / f"{name}.{column}.npy", getattr(self, column))
+        for column in ARENA_COLUMNS:
+            (directory / f"{name}.{column}.bin").write_bytes(
+                np.asarray(getattr(self, column)).tobytes()
+            )
+        (directory / f"{name}.file_names.json").write_text(json.dumps(self.file_names))
+
+    @classmethod
+    def open(cls, directory: Path, name: str) -> "ChunkColumns":
+        """Memory-maps a segment's columns."""
+        columns = {
+            column: np.load(directory / f"{name}.{column}.npy", mmap_mode="r")
+            for column in ARRAY_COLUMNS
+        }
+        for column in ARENA_COLUMNS:
+            path = directory / f"{name}.{column}.bin"
+            # Empty files cannot be memory-mapped.
+            columns[column] = (
+                np.memmap(path, dtype=np.uint8, mode="r")
+                if path.stat().st_size
+                else np.zeros(0, dtype=np.uint8)
+            )
+        file_names = json.loads((directory / f"{name}.file_names.json").read_text())
+        return cls(file_names=file_names, **columns)
+
+
+def _posting_key(field: str, value: Any) -> Optional[Hashable]:
+    """Normalizes a filter value; None for values that cannot be indexed."""
+    if field == DOCUMENT_ID_KEY and not isinstance(value, uuid.UUID):
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            return None
+    return value if isinstance(value, Hashable) else None
+
+
+def _group_values(rows) -> List[Tuple[Hashable, np.ndarray]]:
+    """Groups ``(row id, value)`` pairs by value, skipping missing values."""
+    groups: Dict[Hashable, List[int]] = {}
+    for i, value in rows:
+        if value is not None and isinstance(value, Hashable):
+            groups.setdefault(value, []).append(i)
+    return [(value, np.array(ids, dtype=np.int64)) for value, ids in groups.items()]
+
+
+class ChunkStore:
+    """
+    The chunk for every FAISS id: sealed, memory-mapped segments followed
+    by an in-memory tail of chunks that have not been saved yet.
+
+    For metadata filtering the store keeps per-field inverted lists mapping
+    each value to the sorted ids holding it. They are built the first time
+    a field is filtered on and extended as chunks are appended.
+    """
+
+    def __init__(self, chunks: Optional[List[Chunk]] = None):
+        self._segments: List[ChunkColumns] = []
+        # Global id of the first row of each segment.
+        self._starts: List[int] = []
+        self._sealed = 0
+        self._tail: List[Chunk] = list(chunks or [])
+        # field -> value -> id arrays, and how many rows each field covers.
+        self._postings: Dict[str, Dict[Hashable, List[np.ndarray]]] = {}
+        self._posted: Dict[str, int] = {}
+        self._postings_lock = threading.Lock()
+        # document id -> (ids indexed, line number -> ids, last line indexed)
+        self._line_index: Dict[
+            uuid.UUID, Tuple[int, Dict[int, List[int]], Optional[int]]
+        ] = {}
+
+    def __len__(self) -> int:
+        return self._sealed + len(self._tail)
+
+    def __getitem__(self, i: int) -> Chunk:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk id out of range")
+        if i >= self._sealed:
+            return self._tail[i - self._sealed]
+        segment = bisect.bisect_right(self._starts, i) - 1
+        return self._segments[segment][i - self._starts[segment]]
+
+    def __iter__(self) -> Iterator[Chunk]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def extend(self, chunks) -> None:
+        self._tail.extend(chunks)
+
+    def add_segment(self, columns: ChunkColumns) -> None:
+        """Appends a sealed segment. Only valid while the tail is empty."""
+        if self._tail:
+            raise ValueError("Cannot add a sealed segment behind unsaved chunks.")
+        self._starts.append(self._sealed)
+        self._segments.append(columns)
+        self._sealed += len(columns)
+
+    @property
+    def pending(self) -> List[Chunk]:
+        """Chunks that are not part of a sealed segment yet."""
+        return self._tail
+
+    def seal(self, columns: ChunkColumns) -> None:
+        """Replaces the in-memory tail with the segment it was saved as."""
+        if len(columns) != len(self._tail):
+            raise ValueError("Sealed segment does not match the pending chunks.")
+        self._tail = []
+        self.add_segment(columns)
+
+    def truncate(self, n: int) -> None:
+        """Drops unsaved chunks beyond the first ``n``."""
+        if n < self._sealed:
+            raise ValueError("Cannot truncate sealed chunks.")
+        self._tail = self._tail[: n - self._sealed]
+        self._postings = {}
+        self._posted = {}
+        self._line_index = {}
+
+    # --- Filtering ---
+    def select(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        Returns the sorted ids of chunks matching every field of
+        ``filters``. Fields are ``document_id``, ``file_name`` or any other
+        metadata key; a list, tuple or set value matches any of its items.
+        """
+        selected = None
+        for field, wanted in filters.items():
+            values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            parts = [self._ids_for(field, value) for value in values]
+            ids = np.unique(np.concatenate(parts)) if parts else _NO_IDS
+            selected = (
+                ids
+                if selected is None
+                else np.intersect1d(selected, ids, assume_unique=True)
+            )
+        return np.arange(len(self)) if selected is None else selected
+
+    def _ids_for(self, field: str, value: Any) -> np.ndarray:
+        key = _posting_key(field, value)
+        if key is None:
+            return _NO_IDS
+        with self._postings_lock:
+            postings = self._field_postings(field)
+            parts = postings.get(key)
+            if not parts:
+                return _NO_IDS
+            if len(parts) > 1:
+                parts[:] = [np.concatenate(parts)]
+            return parts[0]
+
+    def _field_postings(self, field: str) -> Dict[Hashable, List[np.ndarray]]:
+        """Returns a field's inverted lists, indexing rows added since."""
+        postings = self._postings.setdefault(field, {})
+        start, end = self._posted.get(field, 0), len(self)
+        for value, ids in self._group_rows(field, start, end):
+            postings.setdefault(value, []).append(ids)
+        self._posted[field] = end
+        return postings
+
+    # --- Positions ---
+    def line_number(self, i: int) -> Optional[int]:
+        """Reads chunk ``i``'s line number without decoding the chunk."""
+        if i >= self._sealed:
+            return self._tail[i - self._sealed].metadata.get(LINE_NUMBER_KEY)
+        segment = bisect.bisect_right(self._starts, i) - 1
+        line_number = int(
+            self._segments[segment].line_numbers[i - self._starts[segment]]
+        )
+        return None if line_number == MISSING else line_number
+
+    def line_positions(self, document_id: uuid.UUID) -> Dict[int, List[int]]:
+        """
+        Maps each line number of a document to the ids of its chunks, in
+        order: one id per line, or one per piece of a line that was cut.
+
+        Built from the document's inverted list on first use and extended
+        with chunks appended to the document since. If a line's chunks were
+        added again later, the latest run of them wins.
+        """
+        ids = self._ids_for(DOCUMENT_ID_KEY, document_id)
+        with self._postings_lock:
+            indexed, positions, previous = self._line_index.get(
+                document_id, (0, {}, None)
+            )
+            # Inverted lists only ever grow at the end.
+            for i in ids[indexed:].tolist():
+                line_number = self.line_number(i)
+                if line_number is not None:
+                    # Pieces of a cut line follow each other.
+                    if line_number == previous:
+                        positions[line_number].append(i)
+                    else:
+                        positions[line_number] = [i]
+                previous = line_number
+            self._line_index[document_id] = (len(ids), positions, previous)
+            return positions
+
+    def _group_rows(self, field: str, start: int, end: int):
+        groups = []
+        for segment_start, columns in zip(self._starts, self._segments):
+            lo = max(start, segment_start) - segment_start
+            hi = min(end, segment_start + len(columns)) - segment_start
+            if lo < hi:
+                groups.extend(
+                    (value, ids + segment_start)
+                    for value, ids in columns.group_rows(field, lo, hi)
+                )
+        tail_rows = (
+            (
+                i,
+                chunk.document_id
+                if field == DOCUMENT_ID_KEY
+                else chunk.metadata.get(field),
+            )
+            for i, chunk in enumerate(self._tail, self._sealed)
+            if i >= start
+        )
+        groups.extend(_group_values(tail_rows))
+        return groups
+
+    def nbytes(self) -> int:
+        """
+        Approximate resident memory. Sealed columns are memory-mapped and
+        only paged in as they are read, so only the unsaved tail counts.
+        """
+        return sum(
+            len(chunk.content) + IN_MEMORY_CHUNK_OVERHEAD for chunk in self._tail
+        )
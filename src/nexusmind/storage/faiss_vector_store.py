@@ -1,32 +1,131 @@
 import json
 import logging
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import faiss
 import numpy as np
 
+from nexusmind.concurrency import prefetch, record_stage
 from nexusmind.llm.llm_endpoint import LLMEndpoint
 from nexusmind.processor.splitter import Chunk
-from nexusmind.storage.vector_store_base import VectorStoreBase
+from nexusmind.storage.chunk_store import DOCUMENT_ID_KEY, ChunkStore
+from nexusmind.storage.index_policy import (
+    IndexPolicy,
+    IndexType,
+    PromotionReport,
+    estimate_index_bytes,
+    index_type_of,
+    promote,
+    reconstruct_ids,
+    reconstruct_vectors,
+    search_parameters,
+)
+from nexusmind.storage.segments import (
+    DEFAULT_MERGE_FACTOR,
+    DEFAULT_SMALL_SEGMENT_SIZE,
+    DEFAULT_TOMBSTONE_RATIO,
+    Manifest,
+    SegmentStore,
+    find_compaction_run,
+)
+from nexusmind.storage.vector_store_base import IngestResult, SearchHit, VectorStoreBase
 
 logger = logging.getLogger(__name__)
 
+# How many embedding passes a chunk gets before it is reported as failed.
+DEFAULT_MAX_EMBEDDING_ATTEMPTS = 3
+
+# Chunks embedded and indexed per pass when adding documents, which bounds
+# the memory a streamed file takes while it is ingested.
+DEFAULT_INGEST_BATCH_SIZE = 1024
+# Ingest batches being embedded at once while earlier ones are indexed and
+# later ones are parsed. Each batch is itself split into concurrent provider
+# requests by the LLM endpoint.
+DEFAULT_INGEST_CONCURRENCY = 2
+
+# Filters matching at most this many vectors of an HNSW index are answered
+# by an exact scan of those vectors; graph search with a very selective
+# id selector misses most matches.
+EXACT_FILTER_LIMIT = 10_000
+
 
 class FaissVectorStore(VectorStoreBase):
     """
     An in-memory vector store using FAISS that can be persisted to disk.
+
+    On disk the store is a directory of immutable segments plus a manifest
+    (see ``SegmentStore``). Saving writes only the vectors and chunks added
+    since the last save; small segments are merged in the background.
+    Deleted vectors are tombstoned and dropped by a background rebuild once
+    they make up ``compaction_tombstone_ratio`` of the store.
+
+    With ``read_only`` the store is opened for serving queries: the index
+    snapshot and segment files are memory-mapped rather than copied, so
+    processes on one host share page-cache pages and opening is cheap.
     """
 
-    def __init__(self, llm_endpoint: LLMEndpoint, store_path: Optional[str] = None):
+    def __init__(
+        self,
+        llm_endpoint: LLMEndpoint,
+        store_path: Optional[str] = None,
+        max_embedding_attempts: int = DEFAULT_MAX_EMBEDDING_ATTEMPTS,
+        index_policy: Optional[IndexPolicy] = None,
+        read_only: bool = False,
+        ingest_batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+        ingest_concurrency: int = DEFAULT_INGEST_CONCURRENCY,
+    ):
+        if read_only and not store_path:
+            raise ValueError("A read-only vector store needs a store_path.")
         self.llm_endpoint = llm_endpoint
         self.store_path = store_path
+        self.read_only = read_only
+        self.max_embedding_attempts = max(1, max_embedding_attempts)
+        self.ingest_batch_size = max(1, ingest_batch_size)
+        self.ingest_concurrency = max(1, ingest_concurrency)
+        self.index_policy = index_policy or IndexPolicy()
         self.index = None
-        # Mapping from FAISS index ID to Chunk object
-        self.index_to_chunk: List[Chunk] = []
+        # Guards self.index against concurrent adds, saves and the background
+        # promotion swapping in a new index.
+        self._lock = threading.RLock()
+        self._promotion: Optional[threading.Thread] = None
+        self._compaction: Optional[threading.Thread] = None
+        self.promotion_report: Optional[PromotionReport] = None
+        # Mapping from FAISS index ID to Chunk object. Saved chunks stay in
+        # memory-mapped columns and are only materialized when read.
+        self.index_to_chunk = ChunkStore()
+        # Chunks whose embedding failed, keyed by chunk_id, with the number of
+        # attempts made so far.
+        self.retry_queue: Dict[str, Tuple[Chunk, int]] = {}
 
-        if self.store_path and Path(self.store_path).exists():
+        # Persistence state: the last manifest this store read or wrote, the
+        # raw vectors added since then, and whether the in-memory index must
+        # be written as a new snapshot (after a promotion or migration).
+        self.segments = SegmentStore(self._get_store_dir()) if store_path else None
+        self._manifest = Manifest()
+        self._pending_vectors: List[np.ndarray] = []
+        self._snapshot_dirty = False
+        # Read-only stores search the segments not covered by the index
+        # snapshot directly in their memory-mapped vector files.
+        self._mapped_vectors: List[np.ndarray] = []
+        # Sorted ids of deleted vectors, excluded from every search.
+        self._tombstones = np.zeros(0, dtype=np.int64)
+        self._live_bitmap_cache = None
+        self.compaction_small_segment_size = DEFAULT_SMALL_SEGMENT_SIZE
+        self.compaction_merge_factor = DEFAULT_MERGE_FACTOR
+        self.compaction_tombstone_ratio = DEFAULT_TOMBSTONE_RATIO
+
+        if self.store_path:
             self._load_from_disk()
+            if not self.read_only and self._get_retry_path().exists():
+                self._load_retry_queue()
 
     def set_llm_endpoint(self, llm_endpoint: LLMEndpoint):
         """
@@ -36,95 +135,854 @@ class FaissVectorStore(VectorStoreBase):
         """
         self.llm_endpoint = llm_endpoint
 
+    @staticmethod
+    def read_disk_version(store_path: str) -> Optional[Tuple[int, ...]]:
+        """
+        Returns a stamp that changes whenever the store at ``store_path`` is
+        written on disk, or None when nothing has been saved there yet.
+        """
+        manifest_path = SegmentStore(Path(store_path).with_suffix("")).manifest_path
+        for path in (manifest_path, Path(store_path)):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        return None
+
+    @property
+    def ntotal(self) -> int:
+        """Number of searchable vectors."""
+        mapped = sum(len(vectors) for vectors in self._mapped_vectors)
+        return (self.index.ntotal if self.index is not None else 0) + mapped
+
+    def memory_bytes(self) -> int:
+        """Approximate resident memory of the index and chunk mapping."""
+        mapped_bytes = sum(vectors.nbytes for vectors in self._mapped_vectors)
+        return (
+            estimate_index_bytes(self.index)
+            + mapped_bytes
+            + self.index_to_chunk.nbytes()
+        )
+
+    def _get_store_dir(self) -> Path:
+        """Helper to get the directory holding the store's segments."""
+        if not self.store_path:
+            raise ValueError("store_path must be set to save or load the store.")
+        return Path(self.store_path).with_suffix("")
+
     def _get_chunk_path(self) -> Path:
-        """Helper to get the path for the chunk mapping file."""
+        """Helper to get the path of a legacy single-file chunk mapping."""
         if not self.store_path:
             raise ValueError("store_path must be set to save or load chunks.")
         return Path(self.store_path).with_suffix(".json")
 
-    def add_documents(self, chunks: List[Chunk]) -> None:
-        if not chunks:
-            return
+    def _get_retry_path(self) -> Path:
+        """Helper to get the path for the embedding retry queue file."""
+        return self._get_store_dir() / "retry.json"
 
-        logger.info(f"Generating embeddings for {len(chunks)} chunks...")
-        embeddings = [
-            self.llm_endpoint.get_embedding(chunk.content) for chunk in chunks
-        ]
+    def _get_promotion_report_path(self) -> Path:
+        """Helper to get the path for the index promotion report."""
+        return self._get_store_dir() / "promotion.json"
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("Vector store was opened read-only.")
+
+    def add_documents(self, chunks: Iterable[Chunk]) -> IngestResult:
+        """
+        Embeds and indexes chunks as a pipeline: batches are parsed ahead
+        (when ``chunks`` is lazy), up to ``ingest_concurrency`` batches are
+        embedded at once, and finished batches are indexed in order while
+        later ones are still embedding. Every stage waits on a bounded
+        buffer, so memory stays bounded for any number of chunks.
+        """
+        self._check_writable()
+        result = IngestResult()
+        batches = self._batches(chunks)
+        if not isinstance(chunks, (list, tuple)):
+            batches = prefetch(
+                batches, "parse", maxsize=self.ingest_concurrency, measure=len
+            )
+
+        in_flight: Deque[Future] = deque()
+        with ThreadPoolExecutor(
+            max_workers=self.ingest_concurrency, thread_name_prefix="ingest-embed"
+        ) as executor:
+            for batch in batches:
+                logger.info(f"Generating embeddings for {len(batch)} chunks...")
+                in_flight.append(
+                    executor.submit(self._embed, [(chunk, 0) for chunk in batch])
+                )
+                if len(in_flight) >= self.ingest_concurrency:
+                    result.merge(self._index_embedded(in_flight.popleft()))
+            while in_flight:
+                result.merge(self._index_embedded(in_flight.popleft()))
+        if not result.total:
+            return result
+
+        if self.store_path:
+            self.save_to_disk()
+        self._maybe_promote()
+        return result
+
+    def _batches(self, chunks: Iterable[Chunk]) -> Iterator[List[Chunk]]:
+        chunks = iter(chunks)
+        while True:
+            batch = list(islice(chunks, self.ingest_batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _index_embedded(self, embedding: Future) -> IngestResult:
+        """Waits for an embedded batch and appends it to the index."""
+        result, chunks, vectors = embedding.result()
+        self._index(chunks, vectors)
+        return result
 
-        # Ensure all embeddings are valid
-        valid_embeddings = [emb for emb in embeddings if emb]
-        if not valid_embeddings:
+    def retry_failed(self) -> IngestResult:
+        """
+        Re-embeds the chunks in the retry queue and appends the ones that
+        succeed. Chunks that keep failing are dropped once they reach
+        ``max_embedding_attempts``.
+        """
+        self._check_writable()
+        if not self.retry_queue:
+            return IngestResult()
+
+        pending = list(self.retry_queue.values())
+        self.retry_queue = {}
+        logger.info(f"Retrying embeddings for {len(pending)} queued chunks...")
+        result = self._embed_and_add(pending)
+
+        if self.store_path:
+            self.save_to_disk()
+        self._maybe_promote()
+        return result
+
+    def _embed_and_add(self, pending: List[Tuple[Chunk, int]]) -> IngestResult:
+        """
+        Embeds ``(chunk, previous_attempts)`` pairs, indexes the successes and
+        queues or fails the rest.
+        """
+        result, chunks, vectors = self._embed(pending)
+        self._index(chunks, vectors)
+        return result
+
+    def _embed(
+        self, pending: List[Tuple[Chunk, int]]
+    ) -> Tuple[IngestResult, List[Chunk], Optional[np.ndarray]]:
+        """
+        Embeds ``(chunk, previous_attempts)`` pairs and queues or fails the
+        ones whose embedding failed.
+
+        :return: The outcome, the embedded chunks and their vectors (None
+            when no chunk was embedded), ready for ``_index``.
+        """
+        started = time.perf_counter()
+        result = IngestResult()
+        embeddings = self.llm_endpoint.get_embeddings(
+            [chunk.content for chunk, _ in pending]
+        )
+
+        # Keep every vector paired with the chunk it was computed from, so that
+        # FAISS ids and index_to_chunk positions stay aligned even when some
+        # embeddings fail.
+        embedded = []
+        for (chunk, attempts), emb in zip(pending, embeddings):
+            if emb:
+                embedded.append((chunk, emb))
+                result.embedded.append(chunk.chunk_id)
+            elif attempts + 1 >= self.max_embedding_attempts:
+                result.failed.append(chunk.chunk_id)
+            else:
+                with self._lock:
+                    self.retry_queue[str(chunk.chunk_id)] = (chunk, attempts + 1)
+                result.retry.append(chunk.chunk_id)
+
+        if result.retry or result.failed:
+            logger.warning(
+                f"{len(result.retry)} chunks queued for embedding retry, "
+                f"{len(result.failed)} chunks failed permanently."
+            )
+
+        if not embedded:
             logger.warning(
                 "No valid embeddings were generated for the provided chunks. "
                 "Index will not be updated."
             )
+            record_stage("embed", len(pending), time.perf_counter() - started)
+            return result, [], None
+
+        logger.info(f"Successfully generated {len(embedded)} valid embeddings.")
+        vectors = self._as_vectors([emb for _, emb in embedded])
+        record_stage("embed", len(pending), time.perf_counter() - started)
+        return result, [chunk for chunk, _ in embedded], vectors
+
+    def _index(self, chunks: List[Chunk], vectors: Optional[np.ndarray]) -> None:
+        """Appends embedded chunks and their vectors to the index."""
+        if vectors is None:
             return
+        started = time.perf_counter()
+        with self._lock:
+            if self.index is None:
+                dimension = vectors.shape[1]
+                logger.info(f"Creating new FAISS index with dimension {dimension}.")
+                self.index = faiss.IndexFlatL2(dimension)
 
-        logger.info(f"Successfully generated {len(valid_embeddings)} valid embeddings.")
-        dimension = len(valid_embeddings[0])
-        vectors = np.array(valid_embeddings).astype("float32")
+            self.index.add(vectors)
+            self.index_to_chunk.extend(chunks)
+            self._pending_vectors.append(vectors)
+        record_stage("index", len(chunks), time.perf_counter() - started)
 
-        if self.index is None:
-            logger.info(f"Creating new FAISS index with dimension {dimension}.")
-            self.index = faiss.IndexFlatL2(dimension)
+    def delete_documents(self, document_ids: List[uuid.UUID]) -> int:
+        """
+        Deletes every chunk of the given documents. Their ids are tombstoned
+        right away, so searches stop returning them; the vectors are removed
+        from disk by a background rebuild.
+
+        :return: The number of vectors deleted.
+        """
+        self._check_writable()
+        if not document_ids:
+            return 0
 
-        self.index.add(vectors)
-        self.index_to_chunk.extend(chunks)
+        for attempt in range(2):
+            with self._lock:
+                if self.store_path and self.index is not None:
+                    # Tombstones are positions in the manifest, so unsaved
+                    # vectors are published first.
+                    self._flush()
+                ids = self.index_to_chunk.select({DOCUMENT_ID_KEY: list(document_ids)})
+                deleted = np.setdiff1d(ids, self._tombstones, assume_unique=True)
+                if not len(deleted):
+                    return 0
+                self._tombstones = np.union1d(self._tombstones, deleted)
+                if not self.store_path or self._save_tombstones():
+                    break
+                # A concurrent rebuild renumbered the ids; start over.
+                self._load_from_disk()
 
+        logger.info(
+            f"Deleted {len(deleted)} vectors of {len(document_ids)} documents; "
+            f"{len(self._tombstones)} tombstones pending compaction."
+        )
         if self.store_path:
-            self.save_to_disk()
+            self._maybe_compact()
+        return len(deleted)
 
-    def similarity_search(self, query: str, k: int = 5) -> List[Chunk]:
-        if self.index is None:
+    def _save_tombstones(self) -> bool:
+        """
+        Publishes the in-memory tombstones, merged with those on disk.
+        Returns False if the store was rebuilt since it was loaded.
+        """
+        with self.segments.locked():
+            current = self.segments.read_manifest() or Manifest()
+            if current.generation != self._manifest.generation:
+                return False
+            tombstones = np.union1d(
+                self.segments.read_tombstones(current.tombstones), self._tombstones
+            )
+            old_tombstones = current.tombstones
+            current.tombstones = self.segments.write_tombstones(tombstones)
+            current.version += 1
+            self.segments.write_manifest(current)
+
+        self._tombstones = tombstones
+        if old_tombstones is not None:
+            self.segments.remove_files([self.segments.tombstones_path(old_tombstones)])
+        if current.count == self._manifest.count:
+            self._manifest = current
+        return True
+
+    def _maybe_promote(self):
+        """
+        Starts a background migration to the policy's ANN index once the
+        flat index has grown past the promotion threshold.
+        """
+        if self._promotion is not None and self._promotion.is_alive():
+            return
+        if not self.index_policy.should_promote(self.index):
+            return
+
+        logger.info(
+            f"Index holds {self.index.ntotal} vectors; promoting to "
+            f"{self.index_policy.index_type.value} in the background."
+        )
+        self._promotion = threading.Thread(
+            target=self._promote, name="faiss-index-promotion", daemon=True
+        )
+        self._promotion.start()
+
+    def _promote(self):
+        """Trains the ANN index and swaps it in for the flat index."""
+        try:
+            with self._lock:
+                flat_index = self.index
+                promoted_count = flat_index.ntotal
+                vectors = flat_index.reconstruct_n(0, promoted_count)
+
+            # Training runs without the lock so searches and adds continue
+            # against the flat index in the meantime.
+            ann_index, report = promote(self.index_policy, vectors)
+
+            with self._lock:
+                if self.index is not flat_index:
+                    logger.warning("Index replaced during promotion; discarding.")
+                    return
+                # Carry over vectors added while training was in progress.
+                added = flat_index.ntotal - promoted_count
+                if added:
+                    ann_index.add(flat_index.reconstruct_n(promoted_count, added))
+                self.index = ann_index
+                self.promotion_report = report
+                self._snapshot_dirty = True
+                if self.store_path:
+                    self.save_to_disk()
+                    self._save_promotion_report(report)
+            logger.info(f"Index promoted to {report.to_type.value}.")
+        except Exception as e:
+            logger.error(f"Index promotion failed: {e}", exc_info=True)
+
+    def wait_for_promotion(self, timeout: Optional[float] = None):
+        """Blocks until a running background promotion has finished."""
+        if self._promotion is not None:
+            self._promotion.join(timeout)
+
+    def wait_for_background_tasks(self, timeout: Optional[float] = None):
+        """Blocks until running promotions and compactions have finished."""
+        self.wait_for_promotion(timeout)
+        if self._compaction is not None:
+            self._compaction.join(timeout)
+
+    def _save_promotion_report(self, report: PromotionReport):
+        report_path = self._get_promotion_report_path()
+        report_path.write_text(report.model_dump_json(indent=4))
+        logger.info(f"Saved index promotion report to {report_path}")
+
+    def similarity_search(
+        self, query: str, k: int = 5, filters: Optional[Dict[str, Any]] = None
+    ) -> List[Chunk]:
+        hits = self.similarity_search_with_scores(query, k, filters=filters)
+        return [hit.chunk for hit in hits]
+
+    def similarity_search_with_scores(
+        self,
+        query: str,
+        k: int = 5,
+        max_distance: Optional[float] = None,
+        min_score: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None,
+    ) -> List[SearchHit]:
+        if self.ntotal == 0:
             return []
 
-        query_embedding = self.llm_endpoint.get_embedding(query)
+        query_embedding = embedding or self.llm_endpoint.get_embedding(query)
         if not query_embedding:
             return []
 
-        query_vector = np.array([query_embedding]).astype("float32")
+        query_vector = self._as_vectors([query_embedding])
+        distances, indices = self._search(query_vector, k, self._select(filters))
+        return self._to_hits(distances[0], indices[0], max_distance, min_score)
 
-        # k might be larger than the number of vectors in the index
-        k = min(k, self.index.ntotal)
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        max_distance: Optional[float] = None,
+        min_score: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[List[SearchHit]]:
+        """
+        Embeds all queries in one batched call and searches them with a
+        single multi-row FAISS search. Queries whose embedding failed get
+        no hits.
+        """
+        results: List[List[SearchHit]] = [[] for _ in queries]
+        if not queries or self.ntotal == 0:
+            return results
 
-        distances, indices = self.index.search(query_vector, k)
+        embeddings = self.llm_endpoint.get_embeddings(queries)
+        rows = [row for row, emb in enumerate(embeddings) if emb]
+        if not rows:
+            return results
 
-        # The indices returned are 2D, so we flatten them
-        return [self.index_to_chunk[i] for i in indices[0]]
+        query_vectors = self._as_vectors([embeddings[row] for row in rows])
+        distances, indices = self._search(query_vectors, k, self._select(filters))
+        for row, row_distances, row_indices in zip(rows, distances, indices):
+            results[row] = self._to_hits(
+                row_distances, row_indices, max_distance, min_score
+            )
+        return results
+
+    def _as_vectors(self, embeddings) -> np.ndarray:
+        """Converts embeddings to a float32 matrix, normalized if configured."""
+        vectors = np.array(embeddings).astype("float32")
+        if self.index_policy.normalize_embeddings:
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def _to_hits(
+        self,
+        distances: np.ndarray,
+        indices: np.ndarray,
+        max_distance: Optional[float],
+        min_score: Optional[float],
+    ) -> List[SearchHit]:
+        """Builds the hits for one result row, applying the cutoffs."""
+        hits = []
+        # Approximate indexes pad missing results with -1.
+        for distance, i in zip(distances, indices):
+            if i < 0 or (max_distance is not None and distance > max_distance):
+                continue
+            score = self.index_policy.similarity(float(distance))
+            if min_score is not None and score < min_score:
+                continue
+            hits.append(
+                SearchHit(
+                    chunk=self.index_to_chunk[i], distance=float(distance), score=score
+                )
+            )
+        return hits
+
+    def chunks_by_line(
+        self, document_id: uuid.UUID, first_line: int, last_line: int
+    ) -> List[Chunk]:
+        positions = self.index_to_chunk.line_positions(document_id)
+        ids = [
+            i
+            for line in range(first_line, last_line + 1)
+            for i in positions.get(line, ())
+        ]
+        if len(self._tombstones) and ids:
+            deleted = np.isin(ids, self._tombstones, assume_unique=True)
+            ids = [i for i, dead in zip(ids, deleted) if not dead]
+        return [self.index_to_chunk[i] for i in ids]
+
+    def _select(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Sorted live ids matching ``filters``, or None to search everything."""
+        if not filters:
+            return None
+        ids = self.index_to_chunk.select(filters)
+        if len(self._tombstones):
+            ids = np.setdiff1d(ids, self._tombstones, assume_unique=True)
+        return ids
+
+    def _search(
+        self, query_vectors: np.ndarray, k: int, ids: Optional[np.ndarray] = None
+    ):
+        """
+        Searches the index and, for read-only stores, the memory-mapped
+        segments it does not cover, merging the results by distance.
+        Deleted ids are never returned.
+
+        :param ids: Sorted ids the results are restricted to.
+        """
+        tombstones = self._tombstones
+        excluded = tombstones if ids is None and len(tombstones) else None
+        results = []
+        offset = 0
+        index = self.index
+        if index is not None and index.ntotal:
+            results.append(self._search_index(index, query_vectors, k, ids))
+            offset = index.ntotal
+        for vectors in self._mapped_vectors:
+            end = offset + len(vectors)
+            local = None
+            candidates = vectors
+            fetch = k
+            if ids is not None:
+                lo, hi = np.searchsorted(ids, [offset, end])
+                local = ids[lo:hi] - offset
+                candidates = np.ascontiguousarray(vectors[local])
+            elif excluded is not None:
+                lo, hi = np.searchsorted(excluded, [offset, end])
+                # Fetch enough extra neighbours to make up for deleted ones.
+                fetch = k + int(hi - lo)
+            if len(candidates):
+                distances, indices = faiss.knn(
+                    query_vectors, candidates, min(fetch, len(candidates))
+                )
+                if local is not None:
+                    indices = local[indices]
+                results.append((distances, indices + offset))
+            offset = end
+
+        if not results:
+            return (
+                np.zeros((len(query_vectors), 0), dtype="float32"),
+                np.zeros((len(query_vectors), 0), dtype="int64"),
+            )
+        if len(results) == 1 and excluded is None:
+            return results[0]
+        distances = np.concatenate([d for d, _ in results], axis=1)
+        indices = np.concatenate([i for _, i in results], axis=1)
+        if excluded is not None:
+            indices[np.isin(indices, excluded)] = -1
+        distances[indices < 0] = np.inf
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return (
+            np.take_along_axis(distances, order, axis=1),
+            np.take_along_axis(indices, order, axis=1),
+        )
+
+    def _search_index(
+        self, index, query_vectors: np.ndarray, k: int, ids: Optional[np.ndarray]
+    ):
+        """
+        Searches ``index``, restricted to ``ids`` (or to live ids when there
+        are tombstones) through an id selector. Small selections are scanned
+        exactly; IVF indexes probe more lists the fewer ids a filter keeps.
+        """
+        ntotal = index.ntotal
+        index_type = index_type_of(index)
+        overrides = {}
+        if ids is None:
+            bitmap = self._live_bitmap(ntotal)
+            if bitmap is None:
+                # k might be larger than the number of vectors in the index
+                params = search_parameters(self.index_policy, index)
+                return index.search(query_vectors, min(k, ntotal), params=params)
+        else:
+            ids = ids[: np.searchsorted(ids, ntotal)]
+            if index_type != IndexType.FLAT and 0 < len(ids) <= EXACT_FILTER_LIMIT:
+                distances, local = faiss.knn(
+                    query_vectors, reconstruct_ids(index, ids), min(k, len(ids))
+                )
+                return distances, ids[local]
+            if index_type in (IndexType.IVF_FLAT, IndexType.IVF_PQ) and len(ids):
+                nlist = faiss.extract_index_ivf(index).nlist
+                nprobe = math.ceil(self.index_policy.nprobe * ntotal / len(ids))
+                overrides["nprobe"] = min(nlist, nprobe)
+            mask = np.zeros(ntotal, dtype=bool)
+            mask[ids] = True
+            bitmap = np.packbits(mask, bitorder="little")
+
+        params = search_parameters(
+            self.index_policy,
+            index,
+            selector=faiss.IDSelectorBitmap(bitmap),
+            **overrides,
+        )
+        return index.search(query_vectors, max(1, min(k, ntotal)), params=params)
+
+    def _live_bitmap(self, ntotal: int) -> Optional[np.ndarray]:
+        """
+        Packed bitset of the first ``ntotal`` ids that are not deleted, or
+        None when none of them is. Cached until the ids or tombstones change.
+        """
+        tombstones = self._tombstones
+        deleted = tombstones[: np.searchsorted(tombstones, ntotal)]
+        if not len(deleted):
+            return None
+        key = (ntotal, len(tombstones))
+        cached = self._live_bitmap_cache
+        if cached is None or cached[0] != key:
+            mask = np.ones(ntotal, dtype=bool)
+            mask[deleted] = False
+            cached = (key, np.packbits(mask, bitorder="little"))
+            self._live_bitmap_cache = cached
+        return cached[1]
 
     def save_to_disk(self):
-        """Saves the FAISS index and the chunk mapping to disk."""
+        """
+        Persists the vectors and chunks added since the last save as a new
+        segment and publishes it in the manifest.
+        """
         if not self.store_path:
             logger.error("store_path must be set to save the index.")
             raise ValueError("store_path must be set to save the index.")
-        if self.index is None:
-            logger.warning("Index is empty, nothing to save.")
+        self._check_writable()
+
+        self._save_retry_queue()
+
+        with self._lock:
+            if self.index is None:
+                logger.warning("Index is empty, nothing to save.")
+                return
+            self._flush()
+
+        self._maybe_compact()
+
+    def _flush(self):
+        """Writes pending vectors and, if needed, an index snapshot."""
+        pending = len(self.index_to_chunk.pending)
+        if not pending and not self._snapshot_dirty:
             return
 
-        # Ensure directory exists
-        Path(self.store_path).parent.mkdir(parents=True, exist_ok=True)
+        segment = None
+        if pending:
+            vectors = np.concatenate(self._pending_vectors)
+            segment = self.segments.write_segment(vectors, self.index_to_chunk.pending)
 
-        # Save FAISS index
-        logger.info(f"Saving FAISS index to {self.store_path}")
-        faiss.write_index(self.index, self.store_path)
+        old_snapshot = None
+        with self.segments.locked():
+            current = self.segments.read_manifest() or Manifest()
+            conflict = (
+                current.generation != self._manifest.generation
+                or current.count != self._manifest.count
+            )
+            # Pick up deletions published by other processes.
+            tombstones = None
+            if not conflict and current.tombstones != self._manifest.tombstones:
+                tombstones = self.segments.read_tombstones(current.tombstones)
+            if segment is not None:
+                current.segments.append(segment)
+            current.dimension = self.index.d
+            # A snapshot is only valid if the index holds exactly the
+            # manifest's vectors in manifest order.
+            if self._snapshot_dirty and not conflict:
+                old_snapshot = current.index
+                current.index = (
+                    None
+                    if index_type_of(self.index) == IndexType.FLAT
+                    else self.segments.write_index_snapshot(self.index)
+                )
+            current.version += 1
+            self.segments.write_manifest(current)
 
-        # Save chunk mapping
-        chunk_path = self._get_chunk_path()
-        with open(chunk_path, "w") as f:
-            # Explicitly dump each chunk to its JSON string representation.
-            # This is more robust than dumping dicts with a default handler.
-            chunk_json_list = [chunk.model_dump_json() for chunk in self.index_to_chunk]
-            json.dump(chunk_json_list, f, indent=4)
+        self._pending_vectors = []
+        self._snapshot_dirty = False
+        if old_snapshot is not None:
+            self.segments.remove_files([self.segments.snapshot_path(old_snapshot)])
+        self._remove_legacy_files()
+        if segment is not None:
+            logger.info(f"Saved segment {segment.name} with {segment.count} vectors.")
+
+        if conflict:
+            # Another process wrote to this store since we loaded it, so our
+            # in-memory ids no longer match the on-disk order.
+            logger.warning("Vector store changed on disk concurrently; reloading.")
+            self._load_from_disk()
+        else:
+            self._manifest = current
+            if segment is not None:
+                self.index_to_chunk.seal(self.segments.read_chunks(segment))
+            if tombstones is not None:
+                self._tombstones = np.union1d(self._tombstones, tombstones)
+
+    def _maybe_compact(self):
+        """
+        Starts a background rebuild once enough vectors are deleted, or a
+        merge once enough small segments pile up.
+        """
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        manifest = self.segments.read_manifest()
+        if manifest is None:
+            return
 
-        logger.info(f"Saved {len(self.index_to_chunk)} chunk metadata to {chunk_path}")
+        if (
+            manifest.tombstones is not None
+            and manifest.tombstones.count
+            >= self.compaction_tombstone_ratio * manifest.count
+        ):
+            target, args = self._rebuild, (manifest,)
+        else:
+            run = find_compaction_run(
+                manifest.segments,
+                self.compaction_small_segment_size,
+                self.compaction_merge_factor,
+            )
+            if run is None:
+                return
+            target, args = self._compact, (manifest.segments[run[0] : run[1]],)
+
+        self._compaction = threading.Thread(
+            target=target, args=args, name="faiss-segment-compaction", daemon=True
+        )
+        self._compaction.start()
+
+    def _compact(self, run):
+        """Merges a run of adjacent segments into one."""
+        try:
+            merged = self.segments.merge_segments(run)
+            run_names = [segment.name for segment in run]
+            with self.segments.locked():
+                current = self.segments.read_manifest()
+                names = [segment.name for segment in current.segments]
+                start = names.index(run_names[0]) if run_names[0] in names else -1
+                if start < 0 or names[start : start + len(run)] != run_names:
+                    logger.warning("Segments changed during compaction; discarding.")
+                    self.segments.remove_files(self.segments.segment_files(merged))
+                    return
+                current.segments[start : start + len(run)] = [merged]
+                current.version += 1
+                self.segments.write_manifest(current)
+
+            with self._lock:
+                # Merging keeps positions, so the new manifest still describes
+                # our in-memory index unless someone else appended meanwhile.
+                if (
+                    current.generation == self._manifest.generation
+                    and current.count == self._manifest.count
+                ):
+                    self._manifest = current
+
+            for segment in run:
+                self.segments.remove_files(self.segments.segment_files(segment))
+            logger.info(
+                f"Compacted {len(run)} segments into {merged.name} "
+                f"({merged.count} vectors)."
+            )
+        except Exception as e:
+            logger.error(f"Segment compaction failed: {e}", exc_info=True)
+
+    def _rebuild(self, manifest: Manifest):
+        """
+        Rewrites the segments holding deleted vectors without them. This
+        renumbers ids, so it starts a new manifest generation and refills
+        the index snapshot. The swap holds the store lock, and batches added
+        meanwhile are saved first so the reload picks them up.
+        """
+        try:
+            tombstones = self.segments.read_tombstones(manifest.tombstones)
+            segments, replaced = [], []
+            position = 0
+            for segment in manifest.segments:
+                end = position + segment.count
+                lo, hi = np.searchsorted(tombstones, [position, end])
+                if hi > lo:
+                    deleted = tombstones[lo:hi] - position
+                    keep = np.setdiff1d(np.arange(segment.count), deleted)
+                    if len(keep):
+                        segments.append(self.segments.rewrite_segment(segment, keep))
+                    replaced.append(segment)
+                else:
+                    segments.append(segment)
+                position = end
+            written = [s for s in segments if s not in manifest.segments]
 
-    def _load_from_disk(self):
+            # A trained index keeps its quantizers; only its contents change.
+            snapshot = None
+            if manifest.index is not None:
+                index = self.segments.read_index_snapshot(manifest.index)
+                index.reset()
+                for segment in segments:
+                    vectors = self.segments.read_vectors(segment)
+                    index.add(np.ascontiguousarray(vectors))
+                snapshot = self.segments.write_index_snapshot(index)
+
+            with self._lock:
+                # Vectors only in memory would be lost by the reload below.
+                self._flush()
+                with self.segments.locked():
+                    current = self.segments.read_manifest()
+                    prefix = current.segments[: len(manifest.segments)]
+                    if (
+                        current.generation != manifest.generation
+                        or current.tombstones != manifest.tombstones
+                        or current.index != manifest.index
+                        or [s.name for s in prefix]
+                        != [s.name for s in manifest.segments]
+                    ):
+                        logger.warning(
+                            "Vector store changed during rebuild; discarding."
+                        )
+                        new_files = [
+                            path
+                            for s in written
+                            for path in self.segments.segment_files(s)
+                        ]
+                        if snapshot is not None:
+                            new_files.append(self.segments.snapshot_path(snapshot))
+                        self.segments.remove_files(new_files)
+                        return
+                    current.segments = segments + current.segments[len(prefix) :]
+                    current.generation += 1
+                    current.tombstones = None
+                    current.index = snapshot
+                    current.version += 1
+                    self.segments.write_manifest(current)
+
+                old_files = [
+                    path for s in replaced for path in self.segments.segment_files(s)
+                ]
+                old_files.append(self.segments.tombstones_path(manifest.tombstones))
+                if manifest.index is not None:
+                    old_files.append(self.segments.snapshot_path(manifest.index))
+                self.segments.remove_files(old_files)
+                # Our in-memory ids follow the old numbering.
+                self._load_from_disk()
+            logger.info(
+                f"Rebuilt {len(replaced)} segments without "
+                f"{manifest.tombstones.count} deleted vectors."
+            )
+        except Exception as e:
+            logger.error(f"Vector store rebuild failed: {e}", exc_info=True)
+
+    def _load_from_disk(self, attempts: int = 3):
         """Loads the FAISS index and chunk mapping from disk."""
-        if not self.store_path or not Path(self.store_path).exists():
+        with self._lock:
+            self.index = None
+            self.index_to_chunk = ChunkStore()
+            self._mapped_vectors = []
+            self._pending_vectors = []
+            self._snapshot_dirty = False
+            self._manifest = Manifest()
+            self._tombstones = np.zeros(0, dtype=np.int64)
+            self._live_bitmap_cache = None
+
+            if not self.segments.exists():
+                self._load_legacy()
+                return
+
+            for attempt in range(attempts):
+                manifest = self.segments.read_manifest()
+                try:
+                    self._load_segments(manifest)
+                    self._manifest = manifest
+                    return
+                except FileNotFoundError:
+                    # A concurrent compaction replaced segments between our
+                    # manifest read and the segment reads; start over.
+                    if attempt == attempts - 1:
+                        raise
+                    self.index = None
+                    self.index_to_chunk = ChunkStore()
+                    self._mapped_vectors = []
+
+    def _load_segments(self, manifest: Manifest):
+        covered = 0
+        if manifest.index is not None:
+            logger.info(f"Loading FAISS index snapshot {manifest.index.file}")
+            self.index = self.segments.read_index_snapshot(
+                manifest.index, mmap=self.read_only
+            )
+            covered = manifest.index.count
+        elif manifest.dimension is not None and not self.read_only:
+            self.index = faiss.IndexFlatL2(manifest.dimension)
+
+        position = 0
+        for segment in manifest.segments:
+            self.index_to_chunk.add_segment(self.segments.read_chunks(segment))
+            end = position + segment.count
+            if end > covered:
+                vectors = self.segments.read_vectors(segment)
+                uncovered = vectors[max(0, covered - position) :]
+                if self.read_only:
+                    self._mapped_vectors.append(uncovered)
+                else:
+                    self.index.add(np.ascontiguousarray(uncovered))
+            position = end
+        self._tombstones = self.segments.read_tombstones(manifest.tombstones)
+
+        logger.info(
+            f"Loaded {len(self.index_to_chunk)} chunks from "
+            f"{len(manifest.segments)} segments in {self._get_store_dir()}"
+        )
+
+    def _load_legacy(self):
+        """
+        Loads a store saved as a single index file plus a JSON chunk list. The
+        next save migrates it to the segmented layout.
+        """
+        if not Path(self.store_path).exists():
             return
 
         # Load FAISS index
-        logger.info(f"Loading FAISS index from {self.store_path}")
+        logger.info(f"Loading legacy FAISS index from {self.store_path}")
         self.index = faiss.read_index(self.store_path)
 
         # Load chunk mapping
@@ -134,6 +992,58 @@ class FaissVectorStore(VectorStoreBase):
                 chunk_json_list = json.load(f)
                 # Each item in the list is a JSON string, so we need to parse it
                 # back into a Chunk object using Pydantic's validator.
-                self.index_to_chunk = [
-                    Chunk.model_validate_json(data_str) for data_str in chunk_json_list
-                ]
+                self.index_to_chunk = ChunkStore(
+                    [
+                        Chunk.model_validate_json(data_str)
+                        for data_str in chunk_json_list
+                    ]
+                )
+
+        if len(self.index_to_chunk) != self.index.ntotal:
+            # Stores written before failed embeddings were handled can hold
+            # more chunks than vectors; only the ids the index knows about
+            # can be kept.
+            logger.warning(
+                f"Legacy store has {len(self.index_to_chunk)} chunks for "
+                f"{self.index.ntotal} vectors; truncating the chunk mapping."
+            )
+            self.index_to_chunk.truncate(self.index.ntotal)
+
+        # Everything is pending until written as the first segment.
+        self._pending_vectors = [reconstruct_vectors(self.index)]
+        self._snapshot_dirty = index_type_of(self.index) != IndexType.FLAT
+
+    def _remove_legacy_files(self):
+        """Deletes the single-file layout once it has been migrated."""
+        legacy_files = [Path(self.store_path), self._get_chunk_path()]
+        for path in legacy_files:
+            if path.exists():
+                path.unlink()
+                logger.info(f"Removed migrated legacy store file {path}")
+
+    def _save_retry_queue(self):
+        """Persists the retry queue so a later run can pick it up."""
+        retry_path = self._get_retry_path()
+        if not self.retry_queue:
+            if retry_path.exists():
+                retry_path.unlink()
+            return
+
+        retry_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(retry_path, "w") as f:
+            entries = [
+                {"attempts": attempts, "chunk": chunk.model_dump(mode="json")}
+                for chunk, attempts in self.retry_queue.values()
+            ]
+            json.dump(entries, f)
+
+        logger.info(f"Saved {len(entries)} queued chunks to {retry_path}")
+
+    def _load_retry_queue(self):
+        """Loads the retry queue written by an earlier run."""
+        with open(self._get_retry_path(), "r") as f:
+            entries = json.load(f)
+
+        for entry in entries:
+            chunk = Chunk.model_validate(entry["chunk"])
+            self.retry_queue[str(chunk.chunk_id)] = (chunk, entry["attempts"])
@@ -0,0 +1,349 @@
+import enum
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import faiss
+import numpy as np
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# Number of stored vectors used as queries when measuring recall and latency.
+REPORT_SAMPLE_QUERIES = 200
+REPORT_K = 10
+
+# Faiss asks for roughly this many training points per IVF centroid.
+MIN_POINTS_PER_CENTROID = 39
+# Cap on the number of vectors used to train IVF/PQ quantizers.
+MAX_TRAINING_POINTS = 256 * 1024
+
+# Serialises building IVF direct maps, which concurrent searches may request.
+_DIRECT_MAP_LOCK = threading.Lock()
+
+
+class IndexType(str, enum.Enum):
+    FLAT = "flat"
+    IVF_FLAT = "ivf_flat"
+    IVF_PQ = "ivf_pq"
+    HNSW = "hnsw"
+
+
+class IndexPolicy(BaseModel):
+    """
+    Per-brain policy describing which FAISS index a vector store uses.
+
+    Every store starts with an exact flat index. Once it holds
+    ``promotion_threshold`` vectors it is trained and migrated to
+    ``index_type`` in the background.
+    """
+
+    index_type: IndexType = IndexType.IVF_FLAT
+    promotion_threshold: int = 100_000
+
+    # IVF build settings. ``nlist`` defaults to 4 * sqrt(n) when unset.
+    nlist: Optional[int] = None
+    # PQ build settings (IVF_PQ only).
+    pq_m: int = 16
+    pq_nbits: int = 8
+    # HNSW build settings.
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 200
+
+    # Query-time tuning knobs.
+    nprobe: int = 16
+    ef_search: int = 64
+
+    # Scale embeddings to unit length before indexing and searching, so that
+    # L2 ranking equals cosine ranking and scores are cosine similarities.
+    # Must not be changed once a store holds vectors.
+    normalize_embeddings: bool = False
+
+    def should_promote(self, index) -> bool:
+        """True when ``index`` is flat and large enough to be migrated."""
+        return (
+            self.index_type != IndexType.FLAT
+            and index is not None
+            and index_type_of(index) == IndexType.FLAT
+            and index.ntotal >= self.promotion_threshold
+        )
+
+    def similarity(self, distance: float) -> float:
+        """
+        Converts a squared L2 distance into a score where higher is closer:
+        the cosine similarity for normalized embeddings, otherwise
+        ``1 / (1 + distance)``.
+        """
+        if self.normalize_embeddings:
+            return 1.0 - distance / 2.0
+        return 1.0 / (1.0 + distance)
+
+
+class RecallLatencyPoint(BaseModel):
+    """Recall and mean per-query latency for one query-time setting."""
+
+    parameter: Optional[str] = None
+    value: Optional[int] = None
+    recall: float
+    latency_ms: float
+
+
+class PromotionReport(BaseModel):
+    """Summary written when a store is migrated from flat to an ANN index."""
+
+    from_type: IndexType
+    to_type: IndexType
+    ntotal: int
+    dimension: int
+    train_seconds: float
+    build_seconds: float
+    k: int
+    sample_queries: int
+    flat_latency_ms: float
+    points: List[RecallLatencyPoint]
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def index_type_of(index) -> IndexType:
+    """Returns the policy type matching a FAISS index instance."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return IndexType.HNSW
+    if isinstance(index, faiss.IndexIVFPQ):
+        return IndexType.IVF_PQ
+    if isinstance(index, faiss.IndexIVF):
+        return IndexType.IVF_FLAT
+    return IndexType.FLAT
+
+
+def _ensure_direct_map(index) -> None:
+    """Gives an IVF index the id-to-list map that reconstruction needs."""
+    if index_type_of(index) not in (IndexType.IVF_FLAT, IndexType.IVF_PQ):
+        return
+    ivf = faiss.extract_index_ivf(index)
+    with _DIRECT_MAP_LOCK:
+        if ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.make_direct_map()
+
+
+def reconstruct_vectors(index, start: int = 0, n: Optional[int] = None) -> np.ndarray:
+    """
+    Reads vectors back out of an index. IVF indexes get a direct map first;
+    PQ indexes return their lossy approximations.
+    """
+    if n is None:
+        n = index.ntotal - start
+    _ensure_direct_map(index)
+    return index.reconstruct_n(start, n)
+
+
+def reconstruct_ids(index, ids: np.ndarray) -> np.ndarray:
+    """Reads the vectors with the given ids back out of an index."""
+    _ensure_direct_map(index)
+    return index.reconstruct_batch(ids)
+
+
+def estimate_index_bytes(index) -> int:
+    """Approximate resident memory of a FAISS index."""
+    if index is None:
+        return 0
+    n, dimension = index.ntotal, index.d
+    index_type = index_type_of(index)
+    if index_type == IndexType.IVF_PQ:
+        ivf = faiss.downcast_index(index)
+        # PQ codes plus the stored 64-bit ids and the coarse centroids.
+        return n * (ivf.pq.code_size + 8) + ivf.nlist * dimension * 4
+    if index_type == IndexType.IVF_FLAT:
+        ivf = faiss.downcast_index(index)
+        return n * (dimension * 4 + 8) + ivf.nlist * dimension * 4
+    if index_type == IndexType.HNSW:
+        hnsw = faiss.downcast_index(index)
+        # Flat storage plus roughly 2 * M neighbour ids per vector.
+        return n * (dimension * 4 + hnsw.hnsw.nb_neighbors(0) * 4)
+    return n * dimension * 4
+
+
+def mmap_io_flags(index_type: Optional[IndexType]) -> int:
+    """
+    FAISS read flags that memory-map a saved index of ``index_type``
+    read-only instead of copying it into process memory.
+    """
+    if index_type in (IndexType.FLAT, IndexType.HNSW):
+        # Flat vector storage is mapped zero-copy.
+        flags = faiss.IO_FLAG_MMAP_IFC
+    else:
+        # IVF inverted lists are mapped as on-disk lists.
+        flags = faiss.IO_FLAG_MMAP
+    return flags | faiss.IO_FLAG_READ_ONLY
+
+
+def _nlist_for(policy: IndexPolicy, n: int) -> int:
+    nlist = policy.nlist or int(4 * math.sqrt(n))
+    return max(1, min(nlist, n // MIN_POINTS_PER_CENTROID))
+
+
+def _pq_m_for(policy: IndexPolicy, dimension: int) -> int:
+    """Largest sub-quantizer count <= ``pq_m`` that divides the dimension."""
+    m = max(1, min(policy.pq_m, dimension))
+    while dimension % m:
+        m -= 1
+    return m
+
+
+def build_index(policy: IndexPolicy, dimension: int, n: int):
+    """
+    Creates an empty (untrained) index of the policy's type, sized for
+    roughly ``n`` vectors.
+    """
+    if policy.index_type == IndexType.HNSW:
+        index = faiss.IndexHNSWFlat(dimension, policy.hnsw_m)
+        index.hnsw.efConstruction = policy.hnsw_ef_construction
+        return index
+
+    quantizer = faiss.IndexFlatL2(dimension)
+    nlist = _nlist_for(policy, n)
+    if policy.index_type == IndexType.IVF_PQ:
+        return faiss.IndexIVFPQ(
+            quantizer,
+            dimension,
+            nlist,
+            _pq_m_for(policy, dimension),
+            policy.pq_nbits,
+        )
+    if policy.index_type == IndexType.IVF_FLAT:
+        return faiss.IndexIVFFlat(quantizer, dimension, nlist)
+    return faiss.IndexFlatL2(dimension)
+
+
+def search_parameters(policy: IndexPolicy, index, selector=None, **overrides):
+    """
+    Builds the FAISS search parameters carrying the policy's query-time
+    knobs for ``index``, or None when the index has none.
+
+    :param selector: Optional ``faiss.IDSelector`` restricting the ids the
+        search may return.
+    """
+    index_type = index_type_of(index)
+    if index_type in (IndexType.IVF_FLAT, IndexType.IVF_PQ):
+        params = faiss.SearchParametersIVF(
+            nprobe=overrides.get("nprobe", policy.nprobe)
+        )
+    elif index_type == IndexType.HNSW:
+        params = faiss.SearchParametersHNSW(
+            efSearch=overrides.get("ef_search", policy.ef_search)
+        )
+    elif selector is not None:
+        params = faiss.SearchParameters()
+    else:
+        return None
+    if selector is not None:
+        params.sel = selector
+    return params
+
+
+def train_and_fill(policy: IndexPolicy, vectors: np.ndarray) -> Tuple[object, float]:
+    """
+    Builds, trains and fills an index of the policy's type.
+
+    :return: The populated index and the seconds spent training.
+    """
+    n, dimension = vectors.shape
+    index = build_index(policy, dimension, n)
+
+    train_seconds = 0.0
+    if not index.is_trained:
+        rng = np.random.default_rng(0)
+        sample_size = min(n, MAX_TRAINING_POINTS)
+        sample = vectors[np.sort(rng.choice(n, sample_size, replace=False))]
+        started = time.perf_counter()
+        index.train(sample)
+        train_seconds = time.perf_counter() - started
+
+    index.add(vectors)
+    return index, train_seconds
+
+
+def _sweep(policy: IndexPolicy, index) -> List[Tuple[Optional[str], Optional[int]]]:
+    index_type = index_type_of(index)
+    if index_type in (IndexType.IVF_FLAT, IndexType.IVF_PQ):
+        nlist = faiss.extract_index_ivf(index).nlist
+        values = {v for v in (1, 2, 4, 8, 16, 32, 64, 128) if v <= nlist}
+        values.add(min(policy.nprobe, nlist))
+        return [("nprobe", v) for v in sorted(values)]
+    if index_type == IndexType.HNSW:
+        values = {16, 32, 64, 128, 256, policy.ef_search}
+        return [("ef_search", v) for v in sorted(values)]
+    return [(None, None)]
+
+
+def _timed(search) -> Tuple[np.ndarray, float]:
+    started = time.perf_counter()
+    ids = search()
+    return ids, (time.perf_counter() - started) * 1000
+
+
+def measure_recall(
+    policy: IndexPolicy,
+    ann_index,
+    vectors: np.ndarray,
+    train_seconds: float,
+    build_seconds: float,
+) -> PromotionReport:
+    """
+    Compares ``ann_index`` against exact search over ``vectors`` using a
+    sample of the stored vectors as queries, sweeping the policy's
+    query-time knob.
+    """
+    n, dimension = vectors.shape
+    rng = np.random.default_rng(1)
+    sample = vectors[rng.choice(n, min(n, REPORT_SAMPLE_QUERIES), replace=False)]
+    k = min(REPORT_K, n)
+
+    truth, flat_ms = _timed(lambda: faiss.knn(sample, vectors, k)[1])
+    points = []
+    for parameter, value in _sweep(policy, ann_index):
+        overrides = {parameter: value} if parameter else {}
+        params = search_parameters(policy, ann_index, **overrides)
+        found, ann_ms = _timed(lambda: ann_index.search(sample, k, params=params)[1])
+        hits = sum(
+            len(set(row_truth) & set(row_found))
+            for row_truth, row_found in zip(truth, found)
+        )
+        points.append(
+            RecallLatencyPoint(
+                parameter=parameter,
+                value=value,
+                recall=hits / (k * len(sample)),
+                latency_ms=ann_ms / len(sample),
+            )
+        )
+
+    report = PromotionReport(
+        from_type=IndexType.FLAT,
+        to_type=index_type_of(ann_index),
+        ntotal=n,
+        dimension=dimension,
+        train_seconds=train_seconds,
+        build_seconds=build_seconds,
+        k=k,
+        sample_queries=len(sample),
+        flat_latency_ms=flat_ms / len(sample),
+        points=points,
+    )
+    logger.info(f"Index promotion report: {report.model_dump_json()}")
+    return report
+
+
+def promote(policy: IndexPolicy, vectors: np.ndarray) -> Tuple[object, PromotionReport]:
+    """
+    Trains an index of the policy's type on ``vectors`` and measures its
+    recall and latency against exact search.
+    """
+    started = time.perf_counter()
+    ann_index, train_seconds = train_and_fill(policy, vectors)
+    build_seconds = time.perf_counter() - started
+    report = measure_recall(policy, ann_index, vectors, train_seconds, build_seconds)
+    return ann_index, report
@@ -1,9 +1,9 @@
 import os
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
-from .storage_base import StorageBase
+from .storage_base import DEFAULT_STREAM_CHUNK_SIZE, StorageBase
 
 
 class LocalStorage(StorageBase):
@@ -41,6 +41,17 @@ class LocalStorage(StorageBase):
         with open(full_path, "rb") as f:
             return f.read()
 
+    def stream(
+        self, file_path: str, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Read a local file in pieces of at most ``chunk_size`` bytes.
+        """
+        full_path = self._get_full_path(file_path)
+        with open(full_path, "rb") as f:
+            while piece := f.read(chunk_size):
+                yield piece
+
     def delete(self, file_path: str) -> None:
         """
         Delete a local file.
@@ -1,18 +1,50 @@
+import hashlib
 import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, Deque, Dict, Iterator, List, Optional
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from pydantic import BaseModel
 
 from ..base_config import MinioConfig
-from .storage_base import StorageBase
+from .storage_base import DEFAULT_STREAM_CHUNK_SIZE, StorageBase
 
 logger = logging.getLogger(__name__)
 
+# S3 rejects multipart parts smaller than this, except for the last one.
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class UploadResult(BaseModel):
+    """An uploaded object with the size and SHA-256 of its content."""
+
+    file_path: str
+    size: int
+    sha256: str
+
+
+def _read_part(stream: BinaryIO, size: int) -> bytes:
+    """Reads ``size`` bytes, or fewer only at the end of the stream."""
+    part = stream.read(size)
+    while part and len(part) < size:
+        more = stream.read(size - len(part))
+        if not more:
+            break
+        part += more
+    return part
+
 
 class S3Storage(StorageBase):
     def __init__(self, config: MinioConfig, s3_client):
         self.config = config
         self.s3_client = s3_client
+        self._upload_executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self._create_bucket_if_not_exists()
 
     def _create_bucket_if_not_exists(self):
@@ -40,6 +72,115 @@ class S3Storage(StorageBase):
             logger.error(f"Failed to save file '{file_path}' to S3: {e}")
             raise
 
+    def upload_stream(
+        self,
+        file_path: str,
+        stream: BinaryIO,
+        part_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> UploadResult:
+        """
+        Uploads a file-like object without reading it into memory.
+
+        Content that fits in one part is sent with a single ``put_object``;
+        anything larger becomes a multipart upload whose parts are sent in
+        parallel, at most ``max_concurrency`` at a time, so memory stays at
+        about ``(max_concurrency + 1) * part_size``. The size and SHA-256 are
+        computed while reading. A failed multipart upload is aborted. This
+        call blocks; async code should run it in a thread.
+
+        :param part_size: Bytes per part, at least ``MIN_PART_SIZE``.
+            Defaults to ``config.upload_part_size``.
+        :param max_concurrency: Defaults to ``config.upload_concurrency``.
+        """
+        part_size = max(MIN_PART_SIZE, part_size or self.config.upload_part_size)
+        max_concurrency = max(1, max_concurrency or self.config.upload_concurrency)
+        digest = hashlib.sha256()
+
+        part = _read_part(stream, part_size)
+        digest.update(part)
+        size = len(part)
+        if len(part) < part_size:
+            self.save(file_path, part)
+            return UploadResult(
+                file_path=file_path, size=size, sha256=digest.hexdigest()
+            )
+
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=self.config.bucket, Key=file_path
+        )["UploadId"]
+        try:
+            parts: List[Dict] = []
+            in_flight: Deque[Future] = deque()
+            executor = self._get_upload_executor()
+            number = 1
+            while part:
+                in_flight.append(
+                    executor.submit(
+                        self._upload_part, file_path, upload_id, number, part
+                    )
+                )
+                if len(in_flight) >= max_concurrency:
+                    parts.append(in_flight.popleft().result())
+                part = _read_part(stream, part_size)
+                digest.update(part)
+                size += len(part)
+                number += 1
+            while in_flight:
+                parts.append(in_flight.popleft().result())
+
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.config.bucket,
+                Key=file_path,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException as e:
+            logger.error(f"Multipart upload of '{file_path}' failed: {e}")
+            for future in in_flight:
+                future.cancel()
+            try:
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.config.bucket, Key=file_path, UploadId=upload_id
+                )
+            except ClientError as abort_error:
+                logger.error(
+                    f"Failed to abort multipart upload of '{file_path}': "
+                    f"{abort_error}"
+                )
+            raise
+
+        logger.info(
+            f"File '{file_path}' ({size} bytes, {len(parts)} parts) uploaded to "
+            f"S3 bucket '{self.config.bucket}'."
+        )
+        return UploadResult(file_path=file_path, size=size, sha256=digest.hexdigest())
+
+    def _upload_part(
+        self, file_path: str, upload_id: str, number: int, data: bytes
+    ) -> Dict:
+        response = self.s3_client.upload_part(
+            Bucket=self.config.bucket,
+            Key=file_path,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=data,
+        )
+        return {"ETag": response["ETag"], "PartNumber": number}
+
+    def _get_upload_executor(self) -> ThreadPoolExecutor:
+        """
+        Returns the pool that sends upload parts, shared by all uploads and
+        sized to the client's connection pool.
+        """
+        with self._executor_lock:
+            if self._upload_executor is None:
+                self._upload_executor = ThreadPoolExecutor(
+                    max_workers=self.config.max_pool_connections,
+                    thread_name_prefix="s3-upload",
+                )
+            return self._upload_executor
+
     def get(self, file_path: str) -> bytes:
         try:
             response = self.s3_client.get_object(
@@ -53,25 +194,78 @@ class S3Storage(StorageBase):
             logger.error(f"Failed to get file '{file_path}' from S3: {e}")
             raise
 
+    def stream(
+        self, file_path: str, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Reads an object in pieces of at most ``chunk_size`` bytes straight
+        from the response body, so it is never held in memory as a whole.
+        """
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.config.bucket, Key=file_path
+            )
+        except ClientError as e:
+            logger.error(f"Failed to get file '{file_path}' from S3: {e}")
+            raise
+
+        logger.info(
+            f"Streaming file '{file_path}' ({response.get('ContentLength')} bytes) "
+            f"from S3 bucket '{self.config.bucket}'."
+        )
+        body = response["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size=chunk_size)
+        finally:
+            body.close()
+
     def delete(self, file_path: str) -> None:
-        pass
+        try:
+            self.s3_client.delete_object(Bucket=self.config.bucket, Key=file_path)
+            logger.info(
+                f"File '{file_path}' deleted from S3 bucket '{self.config.bucket}'."
+            )
+        except ClientError as e:
+            logger.error(f"Failed to delete file '{file_path}' from S3: {e}")
+            raise
 
     def exists(self, file_path: str) -> bool:
-        pass
+        try:
+            self.s3_client.head_object(Bucket=self.config.bucket, Key=file_path)
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return False
+            logger.error(f"Failed to check file '{file_path}' in S3: {e}")
+            raise
 
 
-def get_s3_storage() -> S3Storage:
-    # This is a placeholder for dependency injection
-    # In a real app, this would get the config from a global registry or context
-    config = MinioConfig()
+def create_s3_client(config: MinioConfig):
+    """
+    Creates an S3 client with a connection pool of
+    ``config.max_pool_connections``. Clients are thread-safe, so one per
+    process is enough.
+    """
     client_kwargs = {
         "aws_access_key_id": config.access_key,
         "aws_secret_access_key": config.secret_key.get_secret_value(),
         "region_name": "us-east-1",
+        "config": Config(max_pool_connections=config.max_pool_connections),
     }
     if config.endpoint:
         client_kwargs["endpoint_url"] = config.endpoint
 
-    s3_client = boto3.client("s3", **client_kwargs)
+    return boto3.client("s3", **client_kwargs)
+
 
-    return S3Storage(config=config, s3_client=s3_client)
+@lru_cache(maxsize=None)
+def get_s3_storage() -> S3Storage:
+    """
+    Factory function to get this process's S3Storage singleton. The client
+    and the bucket check are set up on first use only.
+
+    Forked processes must call ``get_s3_storage.cache_clear()`` before first
+    use, as clients are not safe to share across a fork.
+    """
+    config = MinioConfig()
+    return S3Storage(config=config, s3_client=create_s3_client(config))
@@ -0,0 +1,244 @@
+import fcntl
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from pydantic import BaseModel, Field
+
+from ..processor.splitter import Chunk
+from .chunk_store import ChunkColumns
+from .index_policy import IndexType, index_type_of, mmap_io_flags
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+
+# Segments smaller than this are candidates for compaction.
+DEFAULT_SMALL_SEGMENT_SIZE = 50_000
+# Compaction starts once this many adjacent small segments have piled up.
+DEFAULT_MERGE_FACTOR = 8
+# Segments are rebuilt without deleted vectors once this share is deleted.
+DEFAULT_TOMBSTONE_RATIO = 0.2
+
+
+class SegmentInfo(BaseModel):
+    """An immutable batch of vectors and their chunks."""
+
+    name: str
+    count: int
+
+
+class IndexSnapshot(BaseModel):
+    """A serialized FAISS index covering the first ``count`` vectors."""
+
+    file: str
+    count: int
+    index_type: Optional[IndexType] = None
+
+
+class TombstoneSet(BaseModel):
+    """A sorted ``.npy`` array of deleted vector positions."""
+
+    file: str
+    count: int
+
+
+class Manifest(BaseModel):
+    """
+    Describes the on-disk state of a segmented vector store.
+
+    Vector ids are positions in the concatenation of ``segments``. Appends
+    and merges keep existing positions stable; ``generation`` changes when
+    positions are rewritten. Deleted positions are listed in ``tombstones``
+    until a rebuild drops them.
+    """
+
+    version: int = 0
+    generation: int = 0
+    dimension: Optional[int] = None
+    segments: List[SegmentInfo] = Field(default_factory=list)
+    index: Optional[IndexSnapshot] = None
+    tombstones: Optional[TombstoneSet] = None
+
+    @property
+    def count(self) -> int:
+        return sum(segment.count for segment in self.segments)
+
+
+def find_compaction_run(
+    segments: List[SegmentInfo],
+    small_segment_size: int = DEFAULT_SMALL_SEGMENT_SIZE,
+    merge_factor: int = DEFAULT_MERGE_FACTOR,
+) -> Optional[Tuple[int, int]]:
+    """
+    Finds the first run of at least ``merge_factor`` adjacent small segments.
+
+    :return: ``(start, end)`` slice bounds of the run, or None.
+    """
+    start = None
+    for i, segment in enumerate(segments + [None]):
+        if segment is not None and segment.count < small_segment_size:
+            if start is None:
+                start = i
+            continue
+        if start is not None and i - start >= merge_factor:
+            return start, i
+        start = None
+    return None
+
+
+class SegmentStore:
+    """
+    Append-only on-disk layout of a vector store.
+
+    Each ingest batch is written as a new immutable segment (a ``.npy``
+    vector file and the columnar chunk files of ``ChunkColumns``) and then
+    published by
+    atomically replacing ``manifest.json``. Writers serialize manifest
+    updates through a file lock so that several processes can share a
+    directory.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    # --- Paths ---
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    def vectors_path(self, segment: SegmentInfo) -> Path:
+        return self._path(f"{segment.name}.vectors.npy")
+
+    def segment_files(self, segment: SegmentInfo) -> List[Path]:
+        return [
+            self.vectors_path(segment),
+            *ChunkColumns.paths(self.directory, segment.name),
+        ]
+
+    @property
+    def manifest_path(self) -> Path:
+        return self._path(MANIFEST_FILE)
+
+    # --- Manifest ---
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def read_manifest(self) -> Optional[Manifest]:
+        try:
+            return Manifest.model_validate_json(self.manifest_path.read_text())
+        except FileNotFoundError:
+            return None
+
+    def write_manifest(self, manifest: Manifest) -> None:
+        """Atomically replaces the manifest. Callers must hold ``locked()``."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path(f"{MANIFEST_FILE}.{os.getpid()}.tmp")
+        tmp_path.write_text(manifest.model_dump_json(indent=4))
+        os.replace(tmp_path, self.manifest_path)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Holds the directory's cross-process writer lock."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._path(LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- Segments ---
+    def write_segment(self, vectors: np.ndarray, chunks: List[Chunk]) -> SegmentInfo:
+        """
+        Writes a new immutable segment. It only becomes visible once a
+        manifest referencing it is written.
+        """
+        if len(vectors) != len(chunks):
+            raise ValueError("A segment needs exactly one vector per chunk.")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segment = SegmentInfo(name=f"seg-{uuid.uuid4().hex}", count=len(chunks))
+        np.save(self.vectors_path(segment), np.asarray(vectors, dtype="float32"))
+        ChunkColumns.from_chunks(chunks).write(self.directory, segment.name)
+        return segment
+
+    def read_vectors(self, segment: SegmentInfo) -> np.ndarray:
+        """Memory-maps a segment's vectors."""
+        return np.load(self.vectors_path(segment), mmap_mode="r")
+
+    def read_chunks(self, segment: SegmentInfo) -> ChunkColumns:
+        """Memory-maps a segment's chunk columns."""
+        return ChunkColumns.open(self.directory, segment.name)
+
+    def merge_segments(self, segments: List[SegmentInfo]) -> SegmentInfo:
+        """Writes one segment holding the contents of ``segments`` in order."""
+        vectors = np.concatenate([self.read_vectors(s) for s in segments])
+        merged = SegmentInfo(name=f"seg-{uuid.uuid4().hex}", count=len(vectors))
+        np.save(self.vectors_path(merged), vectors)
+        ChunkColumns.concatenate([self.read_chunks(s) for s in segments]).write(
+            self.directory, merged.name
+        )
+        return merged
+
+    def rewrite_segment(self, segment: SegmentInfo, rows: np.ndarray) -> SegmentInfo:
+        """Writes a new segment holding only ``rows`` of ``segment``."""
+        vectors = np.asarray(self.read_vectors(segment)[rows], dtype="float32")
+        rewritten = SegmentInfo(name=f"seg-{uuid.uuid4().hex}", count=len(rows))
+        np.save(self.vectors_path(rewritten), vectors)
+        self.read_chunks(segment).take(rows).write(self.directory, rewritten.name)
+        return rewritten
+
+    # --- Tombstones ---
+    def write_tombstones(self, ids: np.ndarray) -> TombstoneSet:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tombstones = TombstoneSet(
+            file=f"tombstones-{uuid.uuid4().hex}.npy", count=len(ids)
+        )
+        np.save(self._path(tombstones.file), np.asarray(ids, dtype=np.int64))
+        return tombstones
+
+    def read_tombstones(self, tombstones: Optional[TombstoneSet]) -> np.ndarray:
+        if tombstones is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.load(self._path(tombstones.file))
+
+    def tombstones_path(self, tombstones: TombstoneSet) -> Path:
+        return self._path(tombstones.file)
+
+    # --- Index snapshots ---
+    def write_index_snapshot(self, index) -> IndexSnapshot:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        snapshot = IndexSnapshot(
+            file=f"index-{uuid.uuid4().hex}.faiss",
+            count=index.ntotal,
+            index_type=index_type_of(index),
+        )
+        faiss.write_index(index, str(self._path(snapshot.file)))
+        return snapshot
+
+    def read_index_snapshot(self, snapshot: IndexSnapshot, mmap: bool = False):
+        """
+        Reads a snapshot. With ``mmap`` the index is memory-mapped read-only,
+        so processes serving the same file share its pages.
+        """
+        path = str(self._path(snapshot.file))
+        if mmap:
+            return faiss.read_index(path, mmap_io_flags(snapshot.index_type))
+        return faiss.read_index(path)
+
+    def snapshot_path(self, snapshot: IndexSnapshot) -> Path:
+        return self._path(snapshot.file)
+
+    # --- Cleanup ---
+    def remove_files(self, paths: List[Path]) -> None:
+        for path in paths:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
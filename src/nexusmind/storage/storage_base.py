@@ -1,4 +1,8 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
+
+# Size of the pieces a stored file is read in when streamed.
+DEFAULT_STREAM_CHUNK_SIZE = 1024 * 1024
 
 
 class StorageBase(ABC):
@@ -21,6 +25,16 @@ class StorageBase(ABC):
         """
         pass
 
+    def stream(
+        self, file_path: str, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Read content from a specified path in pieces of at most ``chunk_size``
+        bytes. Implementations should override this to avoid holding the
+        whole file in memory.
+        """
+        yield self.get(file_path)
+
     @abstractmethod
     def delete(self, file_path: str) -> None:
         """
@@ -1,25 +1,139 @@
+import uuid
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
 
 from ..processor.splitter import Chunk
 
 
+class IngestResult(BaseModel):
+    """
+    Outcome of adding chunks to a vector store.
+
+    Every chunk handed to the store ends up in exactly one of the lists:
+    ``embedded`` chunks are searchable, ``retry`` chunks are queued for a
+    later embedding pass, and ``failed`` chunks exhausted their retries.
+    """
+
+    embedded: List[uuid.UUID] = Field(default_factory=list)
+    retry: List[uuid.UUID] = Field(default_factory=list)
+    failed: List[uuid.UUID] = Field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        """True when every chunk was embedded."""
+        return not self.retry and not self.failed
+
+    @property
+    def total(self) -> int:
+        """Number of chunks handed to the store."""
+        return len(self.embedded) + len(self.retry) + len(self.failed)
+
+    def merge(self, other: "IngestResult") -> None:
+        """Adds the outcome of another ingest pass to this one."""
+        self.embedded.extend(other.embedded)
+        self.retry.extend(other.retry)
+        self.failed.extend(other.failed)
+
+
+class SearchHit(BaseModel):
+    """
+    A chunk returned by a similarity search.
+
+    ``distance`` is the raw index distance (lower is closer); ``score`` is a
+    similarity where higher is closer.
+    """
+
+    chunk: Chunk
+    distance: float
+    score: float
+
+
 class VectorStoreBase(ABC):
     """
     Abstract base class for vector stores.
     """
 
     @abstractmethod
-    def add_documents(self, chunks: List[Chunk]) -> None:
+    def add_documents(self, chunks: Iterable[Chunk]) -> IngestResult:
         """
         Add documents to the vector store.
-        This involves generating embeddings and indexing them.
+        This involves generating embeddings and indexing them. ``chunks``
+        may be a generator, which is consumed in batches.
         """
         pass
 
     @abstractmethod
-    def similarity_search(self, query: str, k: int = 5) -> List[Chunk]:
+    def retry_failed(self) -> IngestResult:
+        """
+        Re-embed chunks whose embedding failed in an earlier pass and add
+        the ones that succeed.
+        """
+        pass
+
+    @abstractmethod
+    def delete_documents(self, document_ids: List[uuid.UUID]) -> int:
+        """
+        Delete every chunk of the given documents from the vector store.
+        Returns the number of chunks deleted.
+        """
+        pass
+
+    @abstractmethod
+    def similarity_search(
+        self, query: str, k: int = 5, filters: Optional[Dict[str, Any]] = None
+    ) -> List[Chunk]:
         """
         Perform a similarity search against the vector store.
+
+        :param filters: Restricts the search to chunks whose ``document_id``,
+            ``file_name`` or other metadata keys match the given values. A
+            list value matches any of its items.
+        """
+        pass
+
+    @abstractmethod
+    def similarity_search_with_scores(
+        self,
+        query: str,
+        k: int = 5,
+        max_distance: Optional[float] = None,
+        min_score: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None,
+    ) -> List[SearchHit]:
+        """
+        Perform a similarity search and return up to ``k`` scored hits,
+        nearest first. Hits farther than ``max_distance`` or scoring below
+        ``min_score`` are dropped.
+
+        :param embedding: The query's embedding, if already computed; the
+            query is embedded only when it is not given.
+        """
+        pass
+
+    @abstractmethod
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        max_distance: Optional[float] = None,
+        min_score: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[List[SearchHit]]:
+        """
+        Perform similarity searches for several queries at once.
+        Returns the hits for each query, in query order, nearest first.
+        """
+        pass
+
+    @abstractmethod
+    def chunks_by_line(
+        self, document_id: uuid.UUID, first_line: int, last_line: int
+    ) -> List[Chunk]:
+        """
+        Return the live chunks of a document whose ``line_number`` lies in
+        ``first_line..last_line`` (inclusive), in line order.
         """
         pass
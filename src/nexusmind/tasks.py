@@ -1,6 +1,8 @@
+import time
+from functools import lru_cache
 from uuid import UUID
 
-import boto3
+from celery.signals import worker_process_init
 from sqlmodel import Session, select
 
 from .brain.brain import Brain
@@ -8,34 +10,73 @@ from .celery_app import app
 from .config import get_core_config
 from .database import get_engine
 from .files.file import NexusFile
+from .llm.embedding_cache import get_embedding_cache
 from .logger import logger
+from .metrics import ingest_stage_totals
 from .models.files import File, FileStatusEnum
 from .processor.implementations.simple_txt_processor import SimpleTxtProcessor
 from .processor.registry import ProcessorRegistry
-from .storage.s3_storage import S3Storage
+from .storage.s3_storage import get_s3_storage
 
 
+@lru_cache(maxsize=None)
 def setup_processor_registry() -> ProcessorRegistry:
-    """Helper function to initialize and configure the processor registry."""
-    # Since this runs in a separate Celery process, we need to initialize
-    # the config and S3 client here, similar to how it's done in main.py
+    """
+    Returns this process's processor registry, configured on first use with
+    the process-wide S3 storage.
+    """
     config = get_core_config()
-    client_kwargs = {
-        "aws_access_key_id": config.minio.access_key,
-        "aws_secret_access_key": config.minio.secret_key.get_secret_value(),
-        "region_name": "us-east-1",  # Added for consistency
-    }
-    if config.minio.endpoint:
-        client_kwargs["endpoint_url"] = config.minio.endpoint
-
-    s3_client = boto3.client("s3", **client_kwargs)
-    storage = S3Storage(config=config.minio, s3_client=s3_client)
-
     registry = ProcessorRegistry()
-    registry.register_processor(".txt", SimpleTxtProcessor(storage=storage))
+    registry.register_processor(
+        ".txt",
+        SimpleTxtProcessor(
+            storage=get_s3_storage(), read_ahead=config.ingest_read_ahead
+        ),
+    )
     return registry
 
 
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """
+    Sets up a Celery worker process's config, S3 client, bucket check and
+    processor registry once, right after it is forked, so tasks reuse them.
+
+    Clients inherited from the parent process are dropped first, as they are
+    not safe to share across a fork. If S3 is unreachable the error is
+    logged and the first task tries again.
+    """
+    get_s3_storage.cache_clear()
+    setup_processor_registry.cache_clear()
+    get_embedding_cache.cache_clear()
+    get_core_config()
+    try:
+        setup_processor_registry()
+        get_embedding_cache()
+    except Exception as e:
+        logger.error(f"Worker process initialization failed: {e}", exc_info=True)
+        return
+    logger.info("Worker process initialized S3 storage and processor registry.")
+
+
+def _stage_report(before: dict, after: dict) -> dict:
+    """
+    Per-stage work of one ingest run: items (bytes for fetch, chunks
+    otherwise), busy seconds and throughput. The stage busiest relative to
+    the run's wall time is the bottleneck.
+    """
+    report = {}
+    for stage, totals in after.items():
+        items = totals["items"] - before[stage]["items"]
+        busy = totals["busy_seconds"] - before[stage]["busy_seconds"]
+        report[stage] = {
+            "items": items,
+            "busy_seconds": busy,
+            "items_per_second": items / busy if busy else 0.0,
+        }
+    return report
+
+
 @app.task(bind=True)
 def process_file(self, file_id: str, brain_id: str):
     """
@@ -81,9 +122,12 @@ def process_file(self, file_id: str, brain_id: str):
                 )
 
             # 3. Create NexusFile and get processor
-            # The file_path is now the S3 key
+            # The file_path is now the S3 key, and the record's id becomes the
+            # chunks' document_id so the file's chunks can be deleted later.
             nexus_file = NexusFile(
-                file_name=file_record.file_name, file_path=file_record.s3_path
+                file_id=file_record.id,
+                file_name=file_record.file_name,
+                file_path=file_record.s3_path,
             )
             registry = setup_processor_registry()
             processor = registry.get_processor(file_record.file_name)
@@ -92,23 +136,61 @@ def process_file(self, file_id: str, brain_id: str):
                     f"No processor found for file type: {file_record.file_name}"
                 )
 
-            # 4. Process the file into chunks
-            chunks = processor.process(nexus_file)
+            # 4. Stream the file into chunks. Nothing is read yet: fetching,
+            # chunking, embedding and indexing run as one pipeline in step 6.
+            chunks = processor.iter_chunks(
+                nexus_file, splitter=brain.splitter_for(file_record.file_name)
+            )
+
+            # 5. Give chunks that failed to embed in earlier runs another try
+            retried = brain.vector_store.retry_failed()
+            if retried.embedded or retried.failed:
+                logger.info(
+                    f"Embedding retry for brain {brain.brain_id}: "
+                    f"{len(retried.embedded)} recovered, "
+                    f"{len(retried.retry)} still queued, "
+                    f"{len(retried.failed)} failed."
+                )
 
-            # 5. Add chunks to the brain's vector store
-            if chunks:
-                brain.vector_store.add_documents(chunks)
+            # 6. Add chunks to the brain's vector store
+            cache_stats = brain.llm_endpoint.embedding_cache_stats.model_copy()
+            stages_before = ingest_stage_totals()
+            started = time.perf_counter()
+            result = brain.vector_store.add_documents(chunks)
+            elapsed = time.perf_counter() - started
+            cache_stats = brain.llm_endpoint.embedding_cache_stats.diff(cache_stats)
+            stages = _stage_report(stages_before, ingest_stage_totals())
+            # Let a triggered index promotion finish before this worker moves
+            # on, so the migrated index is what gets persisted.
+            brain.vector_store.wait_for_promotion()
+            if result.total:
                 brain.save()  # Save brain state after modification
                 logger.info(
-                    f"Successfully added {len(chunks)} chunks from "
-                    f"{file_record.file_name} to brain {brain.brain_id}."
+                    f"Added {len(result.embedded)} of {result.total} chunks from "
+                    f"{file_record.file_name} to brain {brain.brain_id} "
+                    f"({len(result.retry)} queued for retry, "
+                    f"{len(result.failed)} failed)."
+                )
+                logger.info(
+                    f"Embedding cache served {cache_stats.hits} of "
+                    f"{cache_stats.hits + cache_stats.misses} chunks "
+                    f"({cache_stats.hit_rate:.0%} hit rate, "
+                    f"{cache_stats.redis_hits} from Redis)."
+                )
+                logger.info(
+                    f"Ingest pipeline ran for {elapsed:.2f}s; stage busy time: "
+                    + ", ".join(
+                        f"{stage} {report['busy_seconds']:.2f}s "
+                        f"({report['items_per_second']:.0f}/s)"
+                        for stage, report in stages.items()
+                    )
                 )
             else:
                 logger.warning(
                     f"No chunks were created from file {file_record.file_name}."
                 )
 
-            # 6. Update status to SUCCESS
+            # 7. Update status to SUCCESS
             # We need to refresh the file_record to avoid detached instance error
             session.refresh(file_record)
             file_record.status = FileStatusEnum.SUCCESS
@@ -118,6 +200,14 @@ def process_file(self, file_id: str, brain_id: str):
             return {
                 "status": "SUCCESS",
                 "message": f"File {file_record.file_name} processed successfully.",
+                "chunks_embedded": len(result.embedded),
+                "chunks_queued_for_retry": len(result.retry),
+                "chunks_failed": len(result.failed),
+                "embedding_cache_hits": cache_stats.hits,
+                "embedding_cache_misses": cache_stats.misses,
+                "embedding_cache_hit_rate": cache_stats.hit_rate,
+                "ingest_seconds": elapsed,
+                "ingest_stages": stages,
             }
 
         except Exception as e:
@@ -137,3 +227,73 @@ def process_file(self, file_id: str, brain_id: str):
 
             self.update_state(state="FAILURE", meta={"error": str(e)})
             raise
+
+
+@app.task(bind=True)
+def delete_file(self, file_id: str, brain_id: str):
+    """
+    Celery task to remove a file from a brain: its chunks are deleted from
+    the brain's vector store, then its S3 object and database record.
+    """
+    logger.info(
+        f"Starting file deletion task {self.request.id} "
+        f"for file_id: {file_id} and brain_id: {brain_id}"
+    )
+
+    engine = get_engine()
+    with Session(engine) as session:
+        try:
+            file_record = session.exec(
+                select(File).where(File.id == UUID(file_id))
+            ).first()
+            if not file_record:
+                raise ValueError(
+                    f"File record with id {file_id} not found in the database."
+                )
+
+            # 1. Delete the file's chunks; a missing brain has none
+            deleted = 0
+            try:
+                brain = Brain.load(UUID(brain_id))
+            except FileNotFoundError:
+                logger.warning(f"Brain {brain_id} not found; no chunks to delete.")
+            else:
+                deleted = brain.vector_store.delete_documents([file_record.id])
+                # Let a triggered rebuild finish before this worker moves on.
+                brain.vector_store.wait_for_background_tasks()
+
+            # 2. Delete the stored file, unless a re-upload under the same
+            # name still uses it, and the record
+            shared = session.exec(
+                select(File).where(
+                    File.s3_path == file_record.s3_path, File.id != file_record.id
+                )
+            ).first()
+            if shared is None:
+                get_s3_storage().delete(file_record.s3_path)
+            else:
+                logger.info(
+                    f"Keeping {file_record.s3_path} in S3; file {shared.id} "
+                    "still uses it."
+                )
+            session.delete(file_record)
+            session.commit()
+
+            logger.info(
+                f"Deleted file {file_record.file_name} and its {deleted} chunks "
+                f"from brain {brain_id}."
+            )
+            return {
+                "status": "SUCCESS",
+                "message": f"File {file_record.file_name} deleted successfully.",
+                "chunks_deleted": deleted,
+            }
+
+        except Exception as e:
+            logger.error(
+                f"Error deleting file_id {file_id} in task {self.request.id}: {e}",
+                exc_info=True,
+            )
+            session.rollback()
+            self.update_state(state="FAILURE", meta={"error": str(e)})
+            raise
@@ -1,3 +1,5 @@
+import pytest
+
 from nexusmind.files.file import NexusFile
 from nexusmind.processor.implementations.simple_txt_processor import SimpleTxtProcessor
 from nexusmind.storage.local_storage import LocalStorage
@@ -29,3 +31,69 @@ def test_simple_txt_processor(tmp_path):
     assert chunks[0].document_id == nexus_file.file_id
     assert chunks[1].metadata["line_number"] == 2
     assert chunks[2].metadata["file_name"] == "test.txt"
+
+
+def test_simple_txt_processor_streams_chunks(tmp_path):
+    """
+    Test that chunks are yielded lazily from a file read in small pieces.
+    """
+    storage = LocalStorage(base_path=str(tmp_path))
+    storage.save("é\n".encode("utf-8") * 10, "test.txt")
+    nexus_file = NexusFile(file_name="test.txt", file_path="test.txt")
+    reads = []
+
+    def stream(file_path):
+        for piece in LocalStorage.stream(storage, file_path, chunk_size=3):
+            reads.append(piece)
+            yield piece
+
+    storage.stream = stream
+    chunks = SimpleTxtProcessor(storage=storage).iter_chunks(nexus_file)
+
+    assert next(chunks).content == "é"
+    assert len(reads) == 1
+    assert [chunk.content for chunk in chunks] == ["é"] * 9
+
+
+def test_simple_txt_processor_logs_undecodable_files(tmp_path):
+    """
+    Test that a file that is not valid UTF-8 yields no chunks and no error.
+    """
+    storage = LocalStorage(base_path=str(tmp_path))
+    storage.save(b"\xff\xfe broken", "broken.txt")
+    nexus_file = NexusFile(file_name="broken.txt", file_path="broken.txt")
+
+    assert SimpleTxtProcessor(storage=storage).process(nexus_file) == []
+
+
+def test_simple_txt_processor_raises_errors_after_the_first_chunk(tmp_path):
+    """
+    Test that a read error in the middle of a file is raised rather than
+    ending the chunks early as if the file were complete.
+    """
+    storage = LocalStorage(base_path=str(tmp_path))
+    nexus_file = NexusFile(file_name="a.txt", file_path="a.txt")
+
+    def stream(file_path):
+        yield b"first\nsecond\n"
+        raise ConnectionError("connection reset")
+
+    storage.stream = stream
+    chunks = SimpleTxtProcessor(storage=storage).iter_chunks(nexus_file)
+
+    assert next(chunks).content == "first"
+    with pytest.raises(ConnectionError):
+        list(chunks)
+
+
+def test_simple_txt_processor_reads_ahead(tmp_path):
+    """
+    Test that fetching in a background thread yields the same chunks.
+    """
+    storage = LocalStorage(base_path=str(tmp_path))
+    storage.save("\n".join(f"line {i}" for i in range(100)).encode("utf-8"), "a.txt")
+    nexus_file = NexusFile(file_name="a.txt", file_path="a.txt")
+
+    chunks = SimpleTxtProcessor(storage=storage, read_ahead=2).process(nexus_file)
+
+    assert [chunk.content for chunk in chunks] == [f"line {i}" for i in range(100)]
@@ -0,0 +1,134 @@
+import uuid
+
+import pytest
+from pydantic import ValidationError
+
+from nexusmind.files.file import NexusFile
+from nexusmind.processor.implementations.simple_txt_processor import SimpleTxtProcessor
+from nexusmind.processor.splitter import SplitStrategy, SplitterConfig, split_lines
+from nexusmind.storage.local_storage import LocalStorage
+
+DOCUMENT_ID = uuid.uuid4()
+
+
+def _split(lines, **config):
+    return list(split_lines(lines, DOCUMENT_ID, "doc.txt", SplitterConfig(**config)))
+
+
+def test_line_strategy_makes_one_chunk_per_line():
+    """
+    Test that the default strategy keeps the line-per-chunk behaviour.
+    """
+    chunks = list(split_lines(["a", "", "b"], DOCUMENT_ID, "doc.txt"))
+
+    assert [chunk.content for chunk in chunks] == ["a", "b"]
+    assert [chunk.metadata["line_number"] for chunk in chunks] == [1, 3]
+    assert "line_start" not in chunks[0].metadata
+
+
+def test_character_windows_overlap_by_whole_lines():
+    """
+    Test that windows stay within the size, record their line range and
+    repeat trailing lines of the previous window.
+    """
+    lines = [f"line {i:02d}" for i in range(1, 11)]  # 8 chars + newline each
+    chunks = _split(lines, strategy="character", chunk_size=30, chunk_overlap=9)
+
+    assert all(len(chunk.content) + 1 <= 30 for chunk in chunks)
+    ranges = [(c.metadata["line_start"], c.metadata["line_end"]) for c in chunks]
+    assert ranges == [(1, 3), (3, 5), (5, 7), (7, 9), (9, 10)]
+    assert chunks[1].content == "line 03\nline 04\nline 05"
+    assert chunks[1].metadata["line_number"] == 3
+    assert chunks[0].metadata["file_name"] == "doc.txt"
+
+
+def test_windows_end_at_paragraph_breaks():
+    """
+    Test that a window is cut at a blank line in its second half rather
+    than in the middle of a paragraph, and that blank lines are trimmed.
+    """
+    lines = ["aaaa", "bbbb", "cccc", "", "dddd", "eeee", "ffff"]
+    chunks = _split(lines, strategy="character", chunk_size=25, chunk_overlap=0)
+
+    assert [chunk.content for chunk in chunks] == [
+        "aaaa\nbbbb\ncccc",
+        "dddd\neeee\nffff",
+    ]
+    assert chunks[1].metadata["line_start"] == 5
+
+
+def test_long_lines_are_cut_into_pieces():
+    """
+    Test that a line longer than a window is cut instead of being dropped
+    or exceeding the size.
+    """
+    chunks = _split(
+        ["x" * 25, "tail"], strategy="character", chunk_size=10, chunk_overlap=0
+    )
+
+    assert [chunk.content for chunk in chunks] == ["x" * 10, "x" * 10, "x" * 5, "tail"]
+    assert [chunk.metadata["line_start"] for chunk in chunks] == [1, 1, 1, 2]
+
+
+def test_token_windows_use_estimated_tokens():
+    """
+    Test that token windows hold no more estimated tokens than the size.
+    """
+    lines = ["word " * 20] * 6
+    chunks = _split(lines, strategy=SplitStrategy.TOKEN, chunk_size=80, chunk_overlap=0)
+
+    assert 1 < len(chunks) < 6
+    assert chunks[-1].metadata["line_end"] == 6
+
+
+@pytest.mark.parametrize(
+    "lines,chunk_size,chunk_overlap,expected",
+    [
+        (["", "xxx", ""], 5, 4, ["xxx"]),
+        (
+            ["a" * 50, "b" * 20, "c" * 20, "", "", "d" * 80, "e" * 10],
+            100,
+            30,
+            ["\n".join(["a" * 50, "b" * 20, "c" * 20]), "d" * 80 + "\n" + "e" * 10],
+        ),
+    ],
+)
+def test_overlap_is_never_emitted_on_its_own(
+    lines, chunk_size, chunk_overlap, expected
+):
+    """
+    Test that a window holding only carried overlap and blank lines is not
+    emitted, so no text is indexed twice on its own.
+    """
+    chunks = _split(
+        lines,
+        strategy="character",
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+    assert [chunk.content for chunk in chunks] == expected
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValidationError):
+        SplitterConfig(strategy="token", chunk_size=100, chunk_overlap=100)
+
+
+def test_processor_uses_the_given_splitter(tmp_path):
+    """
+    Test that SimpleTxtProcessor splits with a per-call configuration and
+    falls back to its own.
+    """
+    storage = LocalStorage(base_path=str(tmp_path))
+    storage.save("one\ntwo\nthree".encode("utf-8"), "test.txt")
+    nexus_file = NexusFile(file_name="test.txt", file_path="test.txt")
+    processor = SimpleTxtProcessor(storage=storage)
+
+    windowed = processor.process(
+        nexus_file,
+        splitter=SplitterConfig(strategy="character", chunk_size=100, chunk_overlap=0),
+    )
+
+    assert [chunk.content for chunk in windowed] == ["one\ntwo\nthree"]
+    assert len(processor.process(nexus_file)) == 3
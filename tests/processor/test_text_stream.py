@@ -0,0 +1,21 @@
+import pytest
+
+from nexusmind.processor.text_stream import decode_lines
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_decode_lines_matches_splitlines(size):
+    """
+    Test that lines are split like str.splitlines however the bytes are cut,
+    including multi-byte characters and CRLF pairs split across pieces.
+    """
+    text = "naïve\r\ncafé €5\rlast\n\n tail"
+    data = text.encode("utf-8")
+    pieces = [data[i : i + size] for i in range(0, len(data), size)]
+
+    assert list(decode_lines(pieces)) == text.splitlines()
+
+
+def test_decode_lines_rejects_invalid_utf8():
+    with pytest.raises(UnicodeDecodeError):
+        list(decode_lines([b"ok\n", b"\xff\xfe\n"]))
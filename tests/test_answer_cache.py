@@ -0,0 +1,64 @@
+import uuid
+
+from nexusmind.rag.cache import AnswerCache
+
+
+def test_similar_questions_share_an_answer():
+    """
+    Test that a question matches a cached one only above the similarity
+    threshold.
+    """
+    cache = AnswerCache(min_similarity=0.9)
+    brain_id = uuid.uuid4()
+    cache.put(brain_id, 1, "q", [1.0, 0.0], "answer")
+
+    assert cache.get(brain_id, 1, [0.99, 0.05]) == "answer"
+    assert cache.get(brain_id, 1, [0.5, 0.5]) is None
+    assert cache.get(uuid.uuid4(), 1, [1.0, 0.0]) is None
+
+
+def test_new_brain_version_drops_answers():
+    """
+    Test that answers cached for an older brain version are discarded.
+    """
+    cache = AnswerCache()
+    brain_id = uuid.uuid4()
+    cache.put(brain_id, 1, "q", [1.0, 0.0], "old answer")
+
+    assert cache.get(brain_id, 2, [1.0, 0.0]) is None
+    assert len(cache) == 0
+
+
+def test_answers_expire_and_are_bounded():
+    """
+    Test that answers older than the TTL are dropped and that only the newest
+    ``max_entries_per_brain`` answers are kept.
+    """
+    brain_id = uuid.uuid4()
+    expired = AnswerCache(ttl_seconds=0.0)
+    expired.put(brain_id, 1, "q", [1.0, 0.0], "answer")
+    assert expired.get(brain_id, 1, [1.0, 0.0]) is None
+
+    bounded = AnswerCache(max_entries_per_brain=2)
+    for i, embedding in enumerate(([1.0, 0.0], [0.0, 1.0], [-1.0, 0.0])):
+        bounded.put(brain_id, 1, f"q{i}", embedding, f"a{i}")
+    assert len(bounded) == 2
+    assert bounded.get(brain_id, 1, [1.0, 0.0]) is None
+    assert bounded.get(brain_id, 1, [-1.0, 0.0]) == "a2"
+
+
+def test_empty_or_mismatched_embeddings_never_match():
+    """
+    Test that a failed (empty) embedding or one of another dimension is a
+    miss, and that caching one of a new dimension replaces the old answers.
+    """
+    cache = AnswerCache(min_similarity=0.9)
+    brain_id = uuid.uuid4()
+    cache.put(brain_id, 1, "q", [1.0, 0.0], "answer")
+
+    assert cache.get(brain_id, 1, []) is None
+    assert cache.get(brain_id, 1, [1.0, 0.0, 0.0]) is None
+
+    cache.put(brain_id, 1, "q", [1.0, 0.0, 0.0], "new answer")
+    assert cache.get(brain_id, 1, [1.0, 0.0, 0.0]) == "new answer"
+    assert len(cache) == 1
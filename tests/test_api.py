@@ -1,3 +1,4 @@
+import hashlib
 import os  # noqa
 import uuid
 from unittest.mock import ANY, MagicMock, create_autospec, patch  # noqa
@@ -7,7 +8,9 @@ import pytest
 from fastapi.testclient import TestClient
 from moto import mock_aws
 from pydantic import SecretStr  # noqa
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateTable
 from sqlmodel import Session, SQLModel
 
 from main import app, get_core_config
@@ -166,6 +169,11 @@ def test_upload_and_verify_task_dispatch(
     # --- 2. Assertions ---
     # Assert that the API call was successful
     assert response_upload.status_code == 200
+    assert response_upload.json()["size_bytes"] == len(test_txt_content.encode())
+    assert (
+        response_upload.json()["sha256"]
+        == hashlib.sha256(test_txt_content.encode()).hexdigest()
+    )
 
     # Assert that the Celery task was called, indicating successful dispatch
     mock_process_file_delay.assert_called_once()
@@ -201,3 +209,49 @@ def test_chat_with_invalid_api_key(client):
     )
     assert response.status_code == 403
     assert "Could not validate credentials" in response.text
+
+
+@patch("main.delete_file.delay")
+def test_delete_file_queues_deletion(mock_delete_file_delay, session, client):
+    """
+    Tests that DELETE /brains/{brain_id}/files/{file_id} queues the deletion
+    task for a file of the brain and returns 404 for any other file.
+    """
+    mock_delete_file_delay.return_value.id = "delete-task"
+    brain_id = uuid.uuid4()
+    file_record = FileModel(file_name="a.txt", s3_path="a.txt", brain_id=brain_id)
+    session.add(file_record)
+    session.commit()
+    headers = {"X-API-Key": VALID_API_KEY}
+
+    response = client.delete(
+        f"/brains/{brain_id}/files/{file_record.id}", headers=headers
+    )
+    missing = client.delete(
+        f"/brains/{uuid.uuid4()}/files/{file_record.id}", headers=headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["task_id"] == "delete-task"
+    mock_delete_file_delay.assert_called_once_with(str(file_record.id), str(brain_id))
+    assert missing.status_code == 404
+
+
+def test_file_record_stores_sizes_above_2_gib(session):
+    """
+    Test that file sizes beyond a 32-bit integer are stored, and that the
+    column is a BIGINT on Postgres.
+    """
+    SQLModel.metadata.create_all(engine)
+    size = 5 * 2**30
+    file_record = FileModel(
+        file_name="big.bin", s3_path="big.bin", size_bytes=size, brain_id=uuid.uuid4()
+    )
+    session.add(file_record)
+    session.commit()
+    session.expire_all()
+
+    assert session.get(FileModel, file_record.id).size_bytes == size
+    ddl = str(CreateTable(FileModel.__table__).compile(dialect=postgresql.dialect()))
+    assert "size_bytes BIGINT" in ddl
+    SQLModel.metadata.drop_all(engine)
@@ -2,6 +2,7 @@ import pytest
 
 from nexusmind.brain.brain import Brain
 from nexusmind.brain.serialization import BRAIN_STORAGE_PATH
+from nexusmind.processor.splitter import SplitStrategy
 
 
 @pytest.fixture
@@ -33,6 +34,22 @@ def test_brain_history_update():
     assert brain.history[0] == new_entry
 
 
+def test_brain_chunking_per_file_extension():
+    """
+    Test that a brain picks the splitter configured for a file's extension.
+    """
+    brain = Brain(
+        llm_model_name="test-gpt",
+        temperature=0.5,
+        max_tokens=50,
+        chunking={".md": {"strategy": "token", "chunk_size": 500}},
+    )
+
+    assert brain.splitter_for("README.MD").strategy == SplitStrategy.TOKEN
+    assert brain.splitter_for("README.MD").chunk_size == 500
+    assert brain.splitter_for("notes.txt").strategy == SplitStrategy.LINE
+
+
 def test_save_and_load_brain(tmp_path):
     """
     Test saving a brain's state and then loading it back.
@@ -0,0 +1,98 @@
+import uuid
+from unittest.mock import Mock
+
+import pytest
+
+from nexusmind.brain.brain import Brain
+from nexusmind.brain.cache import BrainCache
+from nexusmind.llm.llm_endpoint import LLMEndpoint
+from nexusmind.metrics import BRAIN_CACHE_HITS, BRAIN_CACHE_MISSES
+from nexusmind.processor.splitter import Chunk
+
+
+@pytest.fixture(autouse=True)
+def isolated_storage(tmp_path, monkeypatch):
+    """Runs each test in a temporary directory so brains and indexes are isolated."""
+    monkeypatch.chdir(tmp_path)
+
+
+def make_brain(name: str = "Cached Brain") -> Brain:
+    brain = Brain(
+        name=name, llm_model_name="test-model", temperature=0.0, max_tokens=10
+    )
+    brain.save()
+    return brain
+
+
+def add_vectors(brain: Brain, contents):
+    """Adds chunks with fixed 3-d embeddings and persists the store."""
+    endpoint = Mock(spec=LLMEndpoint)
+    endpoint.get_embeddings.side_effect = lambda texts: [[0.1, 0.2, 0.3] for _ in texts]
+    brain.vector_store.set_llm_endpoint(endpoint)
+    brain.vector_store.add_documents(
+        [Chunk(document_id=uuid.uuid4(), content=content) for content in contents]
+    )
+
+
+def test_repeated_lookups_hit_the_cache():
+    """
+    Test that a brain is loaded once and then served from the cache.
+    """
+    brain = make_brain()
+    loader = Mock(side_effect=Brain.load)
+    cache = BrainCache(max_bytes=1024**3, loader=loader)
+    hits_before = BRAIN_CACHE_HITS._value.get()
+    misses_before = BRAIN_CACHE_MISSES._value.get()
+
+    first = cache.get(brain.brain_id)
+    second = cache.get(brain.brain_id)
+
+    assert first is second
+    assert loader.call_count == 1
+    assert BRAIN_CACHE_MISSES._value.get() == misses_before + 1
+    assert BRAIN_CACHE_HITS._value.get() == hits_before + 1
+
+
+def test_brain_is_reloaded_after_new_data_is_written():
+    """
+    Test that writing new vectors for a brain invalidates its cache entry.
+    """
+    brain = make_brain()
+    cache = BrainCache(max_bytes=1024**3)
+    stale = cache.get(brain.brain_id)
+    assert stale.vector_store.ntotal == 0
+
+    add_vectors(brain, ["first line", "second line"])
+
+    fresh = cache.get(brain.brain_id)
+    assert fresh is not stale
+    assert fresh.vector_store.ntotal == 2
+
+
+def test_least_recently_used_brain_is_evicted():
+    """
+    Test that the oldest entry is evicted once the memory budget is exceeded.
+    """
+    first, second, third = make_brain("one"), make_brain("two"), make_brain("three")
+    for brain in (first, second, third):
+        add_vectors(brain, ["line"])
+    one_brain_bytes = Brain.load(first.brain_id).vector_store.memory_bytes()
+    cache = BrainCache(max_bytes=2 * one_brain_bytes)
+
+    cache.get(first.brain_id)
+    cache.get(second.brain_id)
+    cache.get(first.brain_id)  # first is now the most recently used
+    cache.get(third.brain_id)
+
+    assert len(cache) == 2
+    assert cache.total_bytes <= cache.max_bytes
+    assert set(cache._entries) == {first.brain_id, third.brain_id}
+
+
+def test_unknown_brain_raises():
+    """
+    Test that looking up a brain that does not exist raises FileNotFoundError.
+    """
+    cache = BrainCache(max_bytes=1024**3)
+    with pytest.raises(FileNotFoundError):
+        cache.get(uuid.uuid4())
@@ -0,0 +1,142 @@
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+from nexusmind.processor.splitter import Chunk
+from nexusmind.storage.chunk_store import ChunkColumns, ChunkStore
+
+
+def make_chunks():
+    doc_id = uuid.uuid4()
+    return [
+        Chunk(
+            document_id=doc_id,
+            content="première ligne",
+            metadata={"file_name": "a.txt", "line_number": 1},
+        ),
+        Chunk(document_id=doc_id, content="", metadata={}),
+        Chunk(
+            document_id=uuid.uuid4(),
+            content="third",
+            metadata={"file_name": "b.txt", "line_number": 3, "page": 2},
+        ),
+    ]
+
+
+def test_columns_round_trip_through_disk(tmp_path):
+    """
+    Test that chunks written as columns are read back unchanged from the
+    memory-mapped files.
+    """
+    chunks = make_chunks()
+    ChunkColumns.from_chunks(chunks).write(tmp_path, "seg")
+
+    columns = ChunkColumns.open(tmp_path, "seg")
+
+    assert isinstance(columns.text_offsets, np.memmap)
+    assert [columns[i] for i in range(len(columns))] == chunks
+    assert columns.file_names == ["a.txt", "b.txt"]
+
+
+def test_columns_store_uuid_and_datetime_metadata_as_strings(tmp_path):
+    """
+    Test that metadata values plain json cannot encode, such as UUIDs and
+    datetimes, are written as strings instead of failing the batch.
+    """
+    source_id = uuid.uuid4()
+    created = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    chunk = Chunk(
+        document_id=uuid.uuid4(),
+        content="text",
+        metadata={"source_id": source_id, "created": created},
+    )
+    ChunkColumns.from_chunks([chunk]).write(tmp_path, "seg")
+
+    columns = ChunkColumns.open(tmp_path, "seg")
+
+    assert columns.metadata(0) == {
+        "source_id": str(source_id),
+        "created": "2024-05-01T12:30:00Z",
+    }
+
+
+def test_concatenate_remaps_file_names(tmp_path):
+    """
+    Test that merging segments keeps row order and file names.
+    """
+    first, second = make_chunks(), make_chunks()[::-1]
+    for name, chunks in (("one", first), ("two", second)):
+        ChunkColumns.from_chunks(chunks).write(tmp_path, name)
+
+    merged = ChunkColumns.concatenate(
+        [ChunkColumns.open(tmp_path, "one"), ChunkColumns.open(tmp_path, "two")]
+    )
+
+    assert [merged[i] for i in range(len(merged))] == first + second
+
+
+def test_store_reads_sealed_segments_and_pending_tail():
+    """
+    Test that ids span sealed segments and unsaved chunks in order.
+    """
+    chunks = make_chunks()
+    store = ChunkStore()
+    store.add_segment(ChunkColumns.from_chunks(chunks[:2]))
+    store.extend(chunks[2:])
+
+    assert len(store) == 3
+    assert store[2] == chunks[2]
+    assert list(store) == chunks
+    assert store.pending == chunks[2:]
+
+    store.seal(ChunkColumns.from_chunks(chunks[2:]))
+    assert store.pending == []
+    assert store.nbytes() == 0
+    assert store[-1] == chunks[2]
+
+
+def test_select_uses_inverted_lists_across_segments_and_tail():
+    """
+    Test that filters match sealed and unsaved rows by document id, file
+    name and other metadata keys, and that fields are intersected.
+    """
+    chunks = make_chunks()
+    store = ChunkStore()
+    store.add_segment(ChunkColumns.from_chunks(chunks))
+    assert store.select({"file_name": "a.txt"}).tolist() == [0]
+
+    store.extend(make_chunks())
+
+    assert store.select({"file_name": "a.txt"}).tolist() == [0, 3]
+    assert store.select({"page": 2}).tolist() == [2, 5]
+    assert store.select({"line_number": [1, 3]}).tolist() == [0, 2, 3, 5]
+    assert store.select({"document_id": str(chunks[0].document_id)}).tolist() == [
+        0,
+        1,
+    ]
+    assert store.select({"file_name": "b.txt", "document_id": chunks[2].document_id})
+    assert store.select({"file_name": "a.txt", "page": 2}).tolist() == []
+    assert store.select({"file_name": "missing.txt"}).tolist() == []
+
+
+def test_line_positions_cover_sealed_segments_and_tail():
+    """
+    Test that a document's line index finds chunks in sealed segments and in
+    the tail, and picks up chunks appended after it was built.
+    """
+    doc_id = uuid.uuid4()
+
+    def line(n):
+        return Chunk(document_id=doc_id, content=f"l{n}", metadata={"line_number": n})
+
+    store = ChunkStore()
+    store.add_segment(ChunkColumns.from_chunks([line(1), line(2)]))
+    store.extend([Chunk(document_id=uuid.uuid4(), content="other"), line(3)])
+
+    assert store.line_positions(doc_id) == {1: [0], 2: [1], 3: [3]}
+    store.extend([line(4), line(4)])
+    assert store.line_positions(doc_id)[4] == [4, 5]
+    store.extend([line(1)])
+    assert store.line_positions(doc_id)[1] == [6]
+    assert store.line_number(2) is None
@@ -0,0 +1,211 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from nexusmind.concurrency import (
+    AsyncMicroBatcher,
+    AsyncSingleFlight,
+    SingleFlight,
+    prefetch,
+)
+from nexusmind.metrics import ingest_stage_totals
+
+
+def test_concurrent_calls_share_one_computation():
+    """
+    Test that threads asking for the same key while it is in flight get the
+    leader's result instead of running the function again.
+    """
+    flights = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", compute)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(flights.do("k", compute)))
+        for _ in range(3)
+    ]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert len(flights) == 0
+    assert flights.do("k", lambda: "again") == "again"
+
+
+def test_errors_reach_every_waiter():
+    """
+    Test that an exception raised by the shared computation is raised for
+    the caller and that the key is released afterwards.
+    """
+    flights = SingleFlight("test")
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flights.do("k", fail)
+    assert len(flights) == 0
+
+
+def test_async_calls_share_one_task():
+    """
+    Test that concurrent coroutines share one task, and that cancelling one
+    waiter does not cancel the computation for the others.
+    """
+    flights = AsyncSingleFlight("test")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def run():
+        waiters = [asyncio.ensure_future(flights.do("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        results = await asyncio.gather(*waiters[1:])
+        await asyncio.sleep(0)
+        return results
+
+    assert asyncio.run(run()) == [1, 1]
+    assert len(calls) == 1
+    assert len(flights) == 0
+
+
+def test_micro_batcher_gathers_concurrent_items():
+    """
+    Test that a lone item is sent immediately and that items arriving while
+    a batch is in flight are sent together, each getting its own result.
+    """
+    batches = []
+
+    async def double(items):
+        batches.append(list(items))
+        await asyncio.sleep(0.02)
+        return [item * 2 for item in items]
+
+    batcher = AsyncMicroBatcher("test", double, max_batch_size=3, max_wait_seconds=1)
+
+    async def run():
+        alone = await batcher.submit(0)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(1, 6)))
+        return alone, results
+
+    assert asyncio.run(run()) == (0, [2, 4, 6, 8, 10])
+    assert batches == [[0], [1], [2, 3, 4], [5]]
+
+
+def test_micro_batcher_fails_every_item_of_a_failed_batch():
+    """
+    Test that an exception from the batch function reaches each caller.
+    """
+
+    async def fail(items):
+        raise RuntimeError("provider down")
+
+    batcher = AsyncMicroBatcher("test", fail)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit(1), batcher.submit(2), return_exceptions=True
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+
+def test_prefetch_runs_ahead_within_its_buffer():
+    """
+    Test that items arrive in order and that the producer runs at most
+    ``maxsize`` items (plus the one it holds) ahead of the consumer.
+    """
+    produced = []
+
+    def items():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    consumer = prefetch(items(), "test", maxsize=2)
+    assert next(consumer) == 0
+    time.sleep(0.1)
+    assert len(produced) <= 4
+
+    assert list(consumer) == list(range(1, 10))
+
+
+def test_prefetch_reraises_producer_errors():
+    def items():
+        yield 1
+        raise ValueError("bad input")
+
+    consumer = prefetch(items(), "test")
+    assert next(consumer) == 1
+    with pytest.raises(ValueError, match="bad input"):
+        next(consumer)
+
+
+def test_prefetch_stops_producer_when_consumer_stops():
+    """
+    Test that closing the consumer closes the source, e.g. a storage stream.
+    """
+    closed = threading.Event()
+
+    def items():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    consumer = prefetch(items(), "test", maxsize=1)
+    assert next(consumer) == 0
+    consumer.close()
+
+    assert closed.wait(timeout=1)
+
+
+def test_prefetch_busy_time_excludes_upstream_waits():
+    """
+    Test that a stage reading from a slow upstream stage is not charged for
+    the time it spends waiting on it.
+    """
+
+    def slow_fetch():
+        for i in range(5):
+            time.sleep(0.05)
+            yield i
+
+    def parse(pieces):
+        for piece in pieces:
+            yield piece * 2
+
+    before = ingest_stage_totals()
+    fetched = prefetch(slow_fetch(), "fetch", maxsize=1)
+    assert list(prefetch(parse(fetched), "parse", maxsize=1)) == [0, 2, 4, 6, 8]
+    after = ingest_stage_totals()
+
+    def busy(stage):
+        return after[stage]["busy_seconds"] - before[stage]["busy_seconds"]
+
+    assert busy("fetch") >= 0.2
+    assert busy("parse") < 0.05
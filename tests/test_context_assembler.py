@@ -0,0 +1,53 @@
+import uuid
+
+from nexusmind.processor.splitter import Chunk
+from nexusmind.rag.context import ContextAssembler, count_tokens
+from nexusmind.storage.vector_store_base import SearchHit
+
+MODEL = "gpt-4o"
+
+
+def hit(content: str, score: float) -> SearchHit:
+    chunk = Chunk(document_id=uuid.uuid4(), content=content)
+    return SearchHit(chunk=chunk, distance=1.0 - score, score=score)
+
+
+def test_highest_scoring_chunks_fill_the_budget():
+    """
+    Test that chunks are taken by score until the budget left after the
+    reserved tokens is used, skipping chunks that do not fit.
+    """
+    long_line = "error " * 40
+    hits = [hit("low score", 0.1), hit(long_line, 0.9), hit("best match", 0.95)]
+    budget = 20 + count_tokens(MODEL, "best match") + count_tokens(MODEL, "low score")
+
+    context = ContextAssembler(MODEL, token_budget=budget).assemble(
+        hits, reserved_tokens=18
+    )
+
+    assert [chunk.content for chunk in context.chunks] == ["best match", "low score"]
+    assert context.over_budget == 1
+    assert context.tokens <= budget - 18
+
+
+def test_duplicate_chunks_are_dropped():
+    """
+    Test that chunks with the same content, up to whitespace, appear once.
+    """
+    hits = [hit("motor overheated", 0.9), hit("motor  overheated\n", 0.8)]
+
+    context = ContextAssembler(MODEL).assemble(hits, reserved_tokens=0)
+
+    assert len(context.chunks) == 1
+    assert context.duplicates == 1
+
+
+def test_nothing_fits_when_reserved_tokens_exceed_the_budget():
+    """
+    Test that the answer's reserved tokens are never given to the context.
+    """
+    context = ContextAssembler(MODEL, token_budget=100).assemble(
+        [hit("line", 0.9)], reserved_tokens=100
+    )
+
+    assert context.chunks == []
@@ -0,0 +1,153 @@
+from unittest.mock import patch
+
+import pytest
+
+from nexusmind.llm.embedding_cache import EmbeddingCache, EmbeddingCacheStats
+from nexusmind.llm.llm_endpoint import LLMEndpoint
+
+MODEL = "test-embedding-model"
+
+
+class FakeRedis:
+    """Dictionary-backed stand-in for the few redis-py calls the cache makes."""
+
+    def __init__(self):
+        self.data = {}
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value))
+
+    def execute(self):
+        self.redis.data.update(self.commands)
+
+
+class BrokenRedis:
+    def mget(self, keys):
+        raise ConnectionError("redis is down")
+
+    def pipeline(self, transaction=False):
+        raise ConnectionError("redis is down")
+
+
+def _embedding_response(texts):
+    return {
+        "data": [
+            {"index": i, "embedding": [float(len(text)), 1.0]}
+            for i, text in enumerate(texts)
+        ]
+    }
+
+
+def test_cache_keys_ignore_whitespace_differences():
+    """
+    Test that texts differing only in whitespace share an entry and that
+    entries are kept per model.
+    """
+    cache = EmbeddingCache()
+    cache.put_many(MODEL, ["hello  world\n"], [[0.5, 1.5]])
+
+    assert cache.get_many(MODEL, ["hello world"]) == [[0.5, 1.5]]
+    assert cache.get_many("other-model", ["hello world"]) == [None]
+
+
+def test_least_recently_used_entry_is_evicted():
+    """
+    Test that the in-process tier keeps at most ``max_entries`` vectors.
+    """
+    cache = EmbeddingCache(max_entries=2)
+    cache.put_many(MODEL, ["a", "b"], [[1.0], [2.0]])
+    cache.get_many(MODEL, ["a"])
+    cache.put_many(MODEL, ["c"], [[3.0]])
+
+    assert len(cache) == 2
+    assert cache.get_many(MODEL, ["a", "b", "c"]) == [[1.0], None, [3.0]]
+
+
+def test_redis_tier_is_shared_between_caches():
+    """
+    Test that a vector cached by one process is served to another from Redis.
+    """
+    redis = FakeRedis()
+    EmbeddingCache(redis_client=redis).put_many(MODEL, ["shared"], [[0.25, 0.5]])
+
+    stats = EmbeddingCacheStats()
+    other = EmbeddingCache(redis_client=redis)
+    assert other.get_many(MODEL, ["shared", "new"], stats) == [[0.25, 0.5], None]
+    assert (stats.redis_hits, stats.misses) == (1, 1)
+
+    stats = EmbeddingCacheStats()
+    other.get_many(MODEL, ["shared"], stats)
+    assert stats.memory_hits == 1
+
+
+def test_unavailable_redis_only_costs_cache_hits():
+    """
+    Test that Redis errors are swallowed and the local tier keeps working.
+    """
+    cache = EmbeddingCache(redis_client=BrokenRedis())
+    cache.put_many(MODEL, ["text"], [[1.0]])
+
+    assert cache.get_many(MODEL, ["text", "missing"]) == [[1.0], None]
+
+
+@patch("litellm.embedding")
+def test_endpoint_embeds_each_distinct_text_once(mock_litellm_embedding):
+    """
+    Test that duplicate texts, within a batch and across calls, reach the
+    provider only once and are reported as cache hits.
+    """
+    mock_litellm_embedding.side_effect = lambda model, input: _embedding_response(input)
+    endpoint = LLMEndpoint(
+        model_name="test-model",
+        temperature=0.0,
+        max_tokens=10,
+        embedding_model=MODEL,
+        embedding_cache=EmbeddingCache(),
+    )
+
+    first = endpoint.get_embeddings(["a", "bb", "a ", "bb"])
+    second = endpoint.get_embeddings(["bb", "ccc"])
+
+    assert first == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [2.0, 1.0]]
+    assert second == [[2.0, 1.0], [3.0, 1.0]]
+    assert [call.kwargs["input"] for call in mock_litellm_embedding.call_args_list] == [
+        ["a", "bb"],
+        ["ccc"],
+    ]
+    stats = endpoint.embedding_cache_stats
+    assert (stats.hits, stats.misses) == (3, 3)
+    assert stats.hit_rate == pytest.approx(0.5)
+    assert endpoint.get_embedding("ccc") == [3.0, 1.0]
+    assert mock_litellm_embedding.call_count == 2
+
+
+@patch("litellm.embedding")
+def test_failed_embeddings_are_not_cached(mock_litellm_embedding):
+    """
+    Test that texts whose batch failed are retried on the next call.
+    """
+    mock_litellm_embedding.side_effect = RuntimeError("provider down")
+    endpoint = LLMEndpoint(
+        model_name="test-model",
+        temperature=0.0,
+        max_tokens=10,
+        embedding_model=MODEL,
+        embedding_cache=EmbeddingCache(),
+    )
+
+    assert endpoint.get_embeddings(["a"]) == [[]]
+
+    mock_litellm_embedding.side_effect = lambda model, input: _embedding_response(input)
+    assert endpoint.get_embeddings(["a"]) == [[1.0, 1.0]]
@@ -1,14 +1,19 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from fastapi import HTTPException
+from fastapi import HTTPException, WebSocketDisconnect
 from fastapi.testclient import TestClient
 from sqlalchemy.pool import StaticPool
 from sqlmodel import Session, SQLModel
 
 from main import app, get_api_key, get_session
 from nexusmind.brain.brain import Brain
+from nexusmind.brain.cache import get_brain_cache
 from nexusmind.database import get_engine
+from nexusmind.llm.embedding_cache import EmbeddingCache
+from nexusmind.llm.llm_endpoint import LLMEndpoint
 
 VALID_LLM_API_KEY = "test-llm-api-key"
 
@@ -80,7 +85,7 @@ def test_unauthorized_access(client: TestClient):
     assert response.json()["detail"] == "Invalid API Key"
 
 
-@patch("litellm.completion")
+@patch("litellm.acompletion", new_callable=AsyncMock)
 def test_chat_endpoint_success(mock_litellm_completion, client: TestClient):
     """
     Test a successful chat interaction with all dependencies mocked.
@@ -122,3 +127,345 @@ def test_chat_endpoint_success(mock_litellm_completion, client: TestClient):
 
     # Clean up the specific override for this test
     del app.dependency_overrides[get_api_key]
+
+
+@patch("litellm.acompletion", new_callable=AsyncMock)
+def test_chat_requests_do_not_share_the_cached_brains_history(
+    mock_litellm_completion, client: TestClient
+):
+    """
+    Test that /chat requests served from one cached brain neither grow its
+    history nor see each other's turns.
+    """
+
+    async def get_api_key_override_authorized():
+        return VALID_LLM_API_KEY
+
+    app.dependency_overrides[get_api_key] = get_api_key_override_authorized
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "An answer."
+    mock_litellm_completion.return_value = mock_response
+    brain = Brain(
+        name="Test Brain for History",
+        llm_model_name="test-model",
+        temperature=0.5,
+        max_tokens=100,
+    )
+    brain.save()
+
+    for question in ("Mine?", "Yours?"):
+        response = client.post(
+            "/chat",
+            headers={"X-API-Key": VALID_LLM_API_KEY},
+            json={"question": question, "brain_id": str(brain.brain_id)},
+        )
+        assert response.status_code == 200
+
+    cached = get_brain_cache().get(brain.brain_id)
+    assert cached.history == []
+    second_prompt = mock_litellm_completion.call_args.kwargs["messages"]
+    assert "Mine?" not in json.dumps(second_prompt)
+
+
+def _embedding_response(texts):
+    """Builds a litellm-style embedding response with one vector per text."""
+    return {
+        "data": [
+            {"index": i, "embedding": [float(len(text))]}
+            for i, text in enumerate(texts)
+        ]
+    }
+
+
+@patch("litellm.embedding")
+def test_get_embeddings_batches_and_preserves_order(mock_litellm_embedding):
+    """
+    Test that get_embeddings splits the input into bounded batches and
+    returns vectors aligned with the input texts.
+    """
+    mock_litellm_embedding.side_effect = lambda model, input: _embedding_response(input)
+    endpoint = LLMEndpoint(
+        model_name="test-model",
+        temperature=0.0,
+        max_tokens=10,
+        embedding_batch_size=2,
+        embedding_concurrency=3,
+    )
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    embeddings = endpoint.get_embeddings(texts)
+
+    assert embeddings == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert mock_litellm_embedding.call_count == 3
+    batch_sizes = sorted(
+        len(call.kwargs["input"]) for call in mock_litellm_embedding.call_args_list
+    )
+    assert batch_sizes == [1, 2, 2]
+
+
+@patch("litellm.embedding")
+def test_get_embeddings_respects_token_budget(mock_litellm_embedding):
+    """
+    Test that a batch is closed once its estimated token count would exceed
+    the configured budget.
+    """
+    mock_litellm_embedding.side_effect = lambda model, input: _embedding_response(input)
+    endpoint = LLMEndpoint(
+        model_name="test-model",
+        temperature=0.0,
+        max_tokens=10,
+        embedding_batch_tokens=10,
+        embedding_concurrency=1,
+    )
+
+    endpoint.get_embeddings(["x" * 20, "y" * 20, "z"])
+
+    assert [call.kwargs["input"] for call in mock_litellm_embedding.call_args_list] == [
+        ["x" * 20],
+        ["y" * 20, "z"],
+    ]
+
+
+@patch("litellm.embedding")
+def test_get_embeddings_failed_batch_returns_empty_vectors(mock_litellm_embedding):
+    """
+    Test that a failing batch yields empty embeddings only for its own texts.
+    """
+
+    def side_effect(model, input):
+        if "bad" in input:
+            raise RuntimeError("provider error")
+        return _embedding_response(input)
+
+    mock_litellm_embedding.side_effect = side_effect
+    endpoint = LLMEndpoint(
+        model_name="test-model",
+        temperature=0.0,
+        max_tokens=10,
+        embedding_batch_size=1,
+    )
+
+    embeddings = endpoint.get_embeddings(["ok", "bad", "fine"])
+
+    assert embeddings == [[2.0], [], [4.0]]
+
+
+@patch("litellm.aembedding", new_callable=AsyncMock)
+@patch("litellm.acompletion", new_callable=AsyncMock)
+def test_async_methods_use_litellm_async_calls(mock_acompletion, mock_aembedding):
+    """
+    Test that the async methods await litellm's async API and share the
+    embedding cache with the sync methods.
+    """
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "async answer"
+    mock_acompletion.return_value = mock_response
+    mock_aembedding.side_effect = lambda model, input: _embedding_response(input)
+    endpoint = LLMEndpoint(
+        model_name="test-model",
+        temperature=0.0,
+        max_tokens=10,
+        embedding_cache=EmbeddingCache(),
+    )
+
+    async def run():
+        answer = await endpoint.aget_chat_completion([{"role": "user", "content": "q"}])
+        first = await endpoint.aget_embedding("abc")
+        second = await endpoint.aget_embedding("abc")
+        return answer, first, second
+
+    assert asyncio.run(run()) == ("async answer", [3.0], [3.0])
+    assert mock_acompletion.await_args.kwargs["model"] == "test-model"
+    assert mock_aembedding.await_count == 1
+    assert endpoint.get_embedding("abc") == [3.0]
+
+
+def _stream(*deltas):
+    """Builds a litellm-style async stream of completion chunks."""
+
+    async def chunks():
+        for delta in deltas:
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = delta
+            yield chunk
+
+    return chunks()
+
+
+@patch("litellm.acompletion", new_callable=AsyncMock)
+def test_chat_stream_sends_sources_then_tokens(mock_acompletion, client: TestClient):
+    """
+    Test that /chat/stream answers with Server-Sent Events carrying the
+    retrieved sources first and then the model's tokens in order.
+    """
+
+    async def get_api_key_override_authorized():
+        return VALID_LLM_API_KEY
+
+    app.dependency_overrides[get_api_key] = get_api_key_override_authorized
+    mock_acompletion.return_value = _stream("Hel", None, "lo", "!")
+    brain = Brain(
+        name="Test Brain for Streaming",
+        llm_model_name="test-model",
+        temperature=0.5,
+        max_tokens=100,
+    )
+    brain.save()
+
+    response = client.post(
+        "/chat/stream",
+        headers={"X-API-Key": VALID_LLM_API_KEY},
+        json={"question": "Stream this", "brain_id": str(brain.brain_id)},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: ")))
+        for lines in (
+            block.split("\n") for block in response.text.strip().split("\n\n")
+        )
+    ]
+    assert events[0] == ("sources", {"sources": []})
+    assert [data["text"] for event, data in events if event == "token"] == [
+        "Hel",
+        "lo",
+        "!",
+    ]
+    assert events[-1] == ("done", {"cached": False})
+    assert mock_acompletion.await_args.kwargs["stream"] is True
+
+
+@patch("litellm.acompletion", new_callable=AsyncMock)
+def test_websocket_chat_streams_answers_per_message(
+    mock_acompletion, client: TestClient
+):
+    """
+    Test that a WebSocket session authenticates once and then streams an
+    answer for every question sent on it.
+    """
+    mock_acompletion.side_effect = lambda **kwargs: _stream("An", "swer")
+    brain = Brain(
+        name="Test Brain for WebSocket",
+        llm_model_name="test-model",
+        temperature=0.5,
+        max_tokens=100,
+    )
+    brain.save()
+
+    with client.websocket_connect(
+        f"/ws/chat?brain_id={brain.brain_id}",
+        headers={"X-API-Key": "test-api-key-from-conftest"},
+    ) as websocket:
+        for question in ("First?", "Second?"):
+            websocket.send_json({"question": question})
+            events = [websocket.receive_json()]
+            while events[-1]["event"] != "done":
+                events.append(websocket.receive_json())
+            assert [e["event"] for e in events] == ["sources", "token", "token", "done"]
+            assert "".join(e.get("text", "") for e in events) == "Answer"
+
+        websocket.send_text("not json")
+        assert websocket.receive_json()["event"] == "error"
+
+    assert mock_acompletion.await_count == 2
+
+
+@patch("litellm.acompletion", new_callable=AsyncMock)
+def test_websocket_chat_authenticates_with_first_message(
+    mock_acompletion, client: TestClient
+):
+    """
+    Test that a browser client without headers authenticates by sending its
+    API key as the first message, and can pick the brain per question.
+    """
+    mock_acompletion.side_effect = lambda **kwargs: _stream("Hi")
+    brain = Brain(
+        name="Test Brain for WebSocket auth",
+        llm_model_name="test-model",
+        temperature=0.5,
+        max_tokens=100,
+    )
+    brain.save()
+
+    with client.websocket_connect("/ws/chat") as websocket:
+        websocket.send_json({"api_key": "test-api-key-from-conftest"})
+        websocket.send_json({"question": "Q?", "brain_id": str(brain.brain_id)})
+        events = [websocket.receive_json()]
+        while events[-1]["event"] != "done":
+            events.append(websocket.receive_json())
+
+    assert "".join(e.get("text", "") for e in events) == "Hi"
+
+
+@pytest.mark.parametrize(
+    "url,headers,first_message",
+    [
+        ("/ws/chat", {"X-API-Key": "wrong-key"}, None),
+        ("/ws/chat", {}, {"api_key": "wrong-key"}),
+        ("/ws/chat", {}, {"question": "Q?"}),
+        # Keys in the URL end up in access logs and are not accepted.
+        ("/ws/chat?api_key=test-api-key-from-conftest", {}, {"question": "Q?"}),
+    ],
+)
+def test_websocket_chat_rejects_invalid_api_key(
+    client: TestClient, url, headers, first_message
+):
+    """
+    Test that a WebSocket connection with a wrong or missing API key is
+    refused.
+    """
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect(url, headers=headers) as websocket:
+            if first_message is not None:
+                websocket.send_json(first_message)
+            websocket.receive_json()
+    assert excinfo.value.code == 1008
+
+
+@patch("litellm.aembedding", new_callable=AsyncMock)
+def test_concurrent_identical_embeddings_share_one_call(mock_aembedding):
+    """
+    Test that concurrent requests to embed the same text make one provider
+    call even without an embedding cache.
+    """
+
+    async def slow_embedding(model, input):
+        await asyncio.sleep(0.05)
+        return _embedding_response(input)
+
+    mock_aembedding.side_effect = slow_embedding
+    endpoint = LLMEndpoint(model_name="test-model", temperature=0.0, max_tokens=10)
+
+    async def run():
+        return await asyncio.gather(
+            *(endpoint.aget_embedding("same") for _ in range(5))
+        )
+
+    assert asyncio.run(run()) == [[4.0]] * 5
+    assert mock_aembedding.await_count == 1
+
+
+@patch("litellm.aembedding", new_callable=AsyncMock)
+def test_concurrent_query_embeddings_are_micro_batched(mock_aembedding):
+    """
+    Test that concurrent requests for different texts are sent to the
+    provider in shared batched calls, each caller getting its own vector.
+    """
+
+    async def slow_embedding(model, input):
+        await asyncio.sleep(0.02)
+        return _embedding_response(input)
+
+    mock_aembedding.side_effect = slow_embedding
+    endpoint = LLMEndpoint(model_name="test-model", temperature=0.0, max_tokens=10)
+    texts = ["a" * n for n in range(1, 11)]
+
+    async def run():
+        return await asyncio.gather(*(endpoint.aget_embedding(t) for t in texts))
+
+    assert asyncio.run(run()) == [[float(n)] for n in range(1, 11)]
+    assert mock_aembedding.await_count == 2
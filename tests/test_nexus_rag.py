@@ -1,28 +1,41 @@
+import asyncio
 import uuid
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
 from nexusmind.brain.brain import Brain
 from nexusmind.processor.splitter import Chunk
-from nexusmind.rag.nexus_rag import NexusRAG
-from nexusmind.storage.vector_store_base import VectorStoreBase
+from nexusmind.rag.cache import AnswerCache
+from nexusmind.rag.nexus_rag import MAX_HISTORY_TURNS, NexusRAG
+from nexusmind.storage.vector_store_base import SearchHit, VectorStoreBase
 
 
 @pytest.fixture
 def mock_brain():
     """Fixture to create a mock Brain with a mock LLMEndpoint and VectorStore."""
     brain = Mock(spec=Brain)
+    brain.brain_id = uuid.uuid4()
     brain.history = []
+    brain.retrieval_k = 5
+    brain.retrieval_max_distance = None
+    brain.retrieval_min_score = 0.5
+    brain.retrieval_window = 0
+    brain.llm_model_name = "gpt-4o"
+    brain.max_tokens = 100
+    brain.prompt_token_budget = 8000
 
     # Mock LLM Endpoint
     brain.llm_endpoint = Mock()
     brain.llm_endpoint.get_chat_completion.return_value = "This is the final answer."
+    brain.llm_endpoint.aget_embedding = AsyncMock(return_value=[1.0, 0.0])
 
     # Mock Vector Store
     brain.vector_store = Mock(spec=VectorStoreBase)
-    retrieved_chunks = [Chunk(document_id=uuid.uuid4(), content="The sky is blue.")]
-    brain.vector_store.similarity_search.return_value = retrieved_chunks
+    retrieved_chunk = Chunk(document_id=uuid.uuid4(), content="The sky is blue.")
+    brain.vector_store.similarity_search_with_scores.return_value = [
+        SearchHit(chunk=retrieved_chunk, distance=0.1, score=0.9)
+    ]
 
     return brain
 
@@ -39,8 +52,10 @@ def test_rag_pipeline_uses_vector_store(mock_brain):
     answer = rag.generate_answer(question)
 
     # Assert
-    # 1. Assert that the vector store's similarity_search was called correctly
-    mock_brain.vector_store.similarity_search.assert_called_once_with(query=question)
+    # 1. Assert that the vector store was searched with the brain's cutoffs
+    mock_brain.vector_store.similarity_search_with_scores.assert_called_once_with(
+        query=question, k=5, max_distance=None, min_score=0.5, embedding=None
+    )
 
     # 2. Assert that the prompt sent to the LLM contains the correct context
     call_args = mock_brain.llm_endpoint.get_chat_completion.call_args
@@ -66,3 +81,162 @@ def test_nexus_rag_initialization():
     # Test cases for NexusRAG initialization
     # ...
     pass
+
+
+def test_repeated_question_is_answered_from_the_cache(mock_brain, monkeypatch):
+    """
+    Test that a near-duplicate question skips retrieval and generation, and
+    that a new brain version invalidates the cached answer.
+    """
+    version = {"value": 1}
+    monkeypatch.setattr(
+        "nexusmind.rag.nexus_rag.read_brain_version", lambda _: version["value"]
+    )
+    mock_brain.brain_id = uuid.uuid4()
+    mock_brain.llm_endpoint.get_embedding.side_effect = lambda text: (
+        [1.0, 0.0] if "sky" in text else [0.0, 1.0]
+    )
+    rag = NexusRAG(brain=mock_brain, answer_cache=AnswerCache())
+
+    rag.generate_answer("What color is the sky?")
+    assert rag.generate_answer("what colour is the sky") == "This is the final answer."
+    assert mock_brain.llm_endpoint.get_chat_completion.call_count == 1
+    assert mock_brain.vector_store.similarity_search_with_scores.call_count == 1
+    assert len(mock_brain.history) == 2
+
+    rag.generate_answer("Where is the sorter?")
+    assert mock_brain.llm_endpoint.get_chat_completion.call_count == 2
+
+    version["value"] = 2
+    rag.generate_answer("What color is the sky?")
+    assert mock_brain.llm_endpoint.get_chat_completion.call_count == 3
+
+
+def test_question_is_embedded_once(mock_brain, monkeypatch):
+    """
+    Test that the embedding computed for the answer cache lookup is the one
+    the similarity search uses.
+    """
+    monkeypatch.setattr("nexusmind.rag.nexus_rag.read_brain_version", lambda _: 1)
+    mock_brain.llm_endpoint.aget_embedding = AsyncMock(return_value=[1.0, 0.0])
+    mock_brain.llm_endpoint.aget_chat_completion = AsyncMock(return_value="Answer.")
+    rag = NexusRAG(brain=mock_brain, answer_cache=AnswerCache())
+
+    asyncio.run(rag.agenerate_answer("What color is the sky?"))
+
+    mock_brain.llm_endpoint.aget_embedding.assert_awaited_once()
+    mock_brain.llm_endpoint.get_embedding.assert_not_called()
+    search = mock_brain.vector_store.similarity_search_with_scores
+    assert search.call_args.kwargs["embedding"] == [1.0, 0.0]
+
+
+def test_async_pipeline_embeds_asynchronously_without_caches(mock_brain):
+    """
+    Test that with both the answer and the embedding cache disabled the
+    question is still embedded through the async endpoint, not by the
+    search's blocking call in a worker thread.
+    """
+    mock_brain.llm_endpoint.embedding_cache = None
+    mock_brain.llm_endpoint.aget_chat_completion = AsyncMock(return_value="Answer.")
+    rag = NexusRAG(brain=mock_brain, answer_cache=None)
+
+    asyncio.run(rag.agenerate_answer("What color is the sky?"))
+
+    mock_brain.llm_endpoint.aget_embedding.assert_awaited_once_with(
+        "What color is the sky?"
+    )
+    mock_brain.llm_endpoint.get_embedding.assert_not_called()
+    search = mock_brain.vector_store.similarity_search_with_scores
+    assert search.call_args.kwargs["embedding"] == [1.0, 0.0]
+
+
+def test_async_pipeline_awaits_the_llm(mock_brain):
+    """
+    Test that agenerate_answer retrieves context and awaits the async
+    completion instead of the blocking one.
+    """
+    mock_brain.llm_endpoint.embedding_cache = None
+    mock_brain.llm_endpoint.aget_chat_completion = AsyncMock(
+        return_value="Async answer."
+    )
+    rag = NexusRAG(brain=mock_brain)
+
+    answer = asyncio.run(rag.agenerate_answer("What color is the sky?"))
+
+    assert answer == "Async answer."
+    mock_brain.llm_endpoint.get_chat_completion.assert_not_called()
+    messages = mock_brain.llm_endpoint.aget_chat_completion.await_args.args[0]
+    assert "The sky is blue." in messages[0]["content"]
+    assert mock_brain.history[-1]["assistant"] == "Async answer."
+
+
+def test_stream_records_the_full_answer(mock_brain):
+    """
+    Test that astream_answer yields sources before tokens and stores the
+    joined answer in the history.
+    """
+
+    async def deltas(messages):
+        for delta in ("The sky", " is blue."):
+            yield delta
+
+    mock_brain.llm_endpoint.embedding_cache = None
+    mock_brain.llm_endpoint.astream_chat_completion = deltas
+    rag = NexusRAG(brain=mock_brain)
+
+    async def collect():
+        return [event async for event in rag.astream_answer("Sky?")]
+
+    events = asyncio.run(collect())
+
+    assert [event for event, _ in events] == ["sources", "token", "token", "done"]
+    assert events[0][1]["sources"][0]["score"] == 0.9
+    assert mock_brain.history[-1]["assistant"] == "The sky is blue."
+
+
+def test_identical_concurrent_questions_share_one_llm_call(mock_brain, monkeypatch):
+    """
+    Test that identical questions in flight at the same time trigger a single
+    retrieval and completion, while each request still gets its answer.
+    """
+    monkeypatch.setattr("nexusmind.rag.nexus_rag.read_brain_version", lambda _: 1)
+    mock_brain.llm_endpoint.embedding_cache = None
+
+    async def slow_completion(messages):
+        await asyncio.sleep(0.05)
+        return "Shared answer."
+
+    mock_brain.llm_endpoint.aget_chat_completion = AsyncMock(
+        side_effect=slow_completion
+    )
+    rag = NexusRAG(brain=mock_brain)
+
+    async def ask_all():
+        return await asyncio.gather(
+            rag.agenerate_answer("Is the sorter down?"),
+            rag.agenerate_answer("Is the  sorter down?"),
+            rag.agenerate_answer("Something else?"),
+        )
+
+    answers = asyncio.run(ask_all())
+
+    assert answers == ["Shared answer."] * 3
+    assert mock_brain.llm_endpoint.aget_chat_completion.await_count == 2
+    assert mock_brain.vector_store.similarity_search_with_scores.call_count == 2
+    assert len(mock_brain.history) == 3
+
+
+def test_rag_records_turns_in_its_own_capped_history(mock_brain):
+    """
+    Test that RAG instances sharing a brain keep separate histories of at
+    most MAX_HISTORY_TURNS turns and leave the brain's history alone.
+    """
+    first, second = [], []
+    for _ in range(MAX_HISTORY_TURNS + 2):
+        NexusRAG(brain=mock_brain, history=first).generate_answer("First?")
+    NexusRAG(brain=mock_brain, history=second).generate_answer("Second?")
+
+    assert len(first) == MAX_HISTORY_TURNS
+    assert {turn["user"] for turn in first} == {"First?"}
+    assert second == [{"user": "Second?", "assistant": "This is the final answer."}]
+    assert mock_brain.history == []
@@ -0,0 +1,258 @@
+import json
+import uuid
+from unittest.mock import Mock
+
+import faiss
+import numpy as np
+import pytest
+
+from nexusmind.llm.llm_endpoint import LLMEndpoint
+from nexusmind.processor.splitter import Chunk
+from nexusmind.storage.faiss_vector_store import FaissVectorStore
+from nexusmind.storage.index_policy import IndexPolicy, IndexType, index_type_of
+from nexusmind.storage.segments import SegmentInfo, find_compaction_run
+
+
+@pytest.fixture
+def mock_llm_endpoint():
+    """Fixture for a mock LLMEndpoint that embeds 'line N' as a 4-d vector."""
+    endpoint = Mock(spec=LLMEndpoint)
+
+    def embed(text: str):
+        n = float(text.split()[-1])
+        return [n, n + 1.0, n + 2.0, n + 3.0]
+
+    endpoint.get_embedding.side_effect = embed
+    endpoint.get_embeddings.side_effect = lambda texts: [embed(t) for t in texts]
+    return endpoint
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "vs_test.index")
+
+
+def make_chunks(start: int, stop: int):
+    doc_id = uuid.uuid4()
+    return [Chunk(document_id=doc_id, content=f"line {i}") for i in range(start, stop)]
+
+
+def test_each_ingest_writes_only_a_new_segment(mock_llm_endpoint, store_path):
+    """
+    Test that every add_documents call appends one segment holding just the
+    new vectors, and that a save with nothing pending writes nothing.
+    """
+    store = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+
+    store.add_documents(make_chunks(0, 3))
+    store.add_documents(make_chunks(3, 5))
+    manifest = store.segments.read_manifest()
+    store.save_to_disk()
+
+    assert [segment.count for segment in manifest.segments] == [3, 2]
+    assert store.segments.read_manifest().version == manifest.version
+    second = manifest.segments[1]
+    assert store.segments.read_vectors(second).shape == (2, 4)
+    assert [c.content for c in store.segments.read_chunks(second)] == [
+        "line 3",
+        "line 4",
+    ]
+
+
+def test_store_reloads_from_segments(mock_llm_endpoint, store_path):
+    """
+    Test that a store rebuilt from its segments keeps ids aligned with chunks.
+    """
+    store = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+    store.add_documents(make_chunks(0, 3))
+    store.add_documents(make_chunks(3, 6))
+
+    reloaded = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+
+    assert reloaded.index.ntotal == 6
+    assert [c.content for c in reloaded.index_to_chunk] == [
+        f"line {i}" for i in range(6)
+    ]
+    assert reloaded.similarity_search("line 4", k=1)[0].content == "line 4"
+
+
+def test_small_segments_are_compacted(mock_llm_endpoint, store_path):
+    """
+    Test that a run of small segments is merged in the background without
+    changing what the store returns.
+    """
+    store = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+    store.compaction_merge_factor = 3
+
+    for i in range(3):
+        store.add_documents(make_chunks(i * 2, i * 2 + 2))
+    store.wait_for_background_tasks()
+
+    manifest = store.segments.read_manifest()
+    assert [segment.count for segment in manifest.segments] == [6]
+    assert len(list(store.segments.directory.glob("seg-*.vectors.npy"))) == 1
+
+    store.add_documents(make_chunks(6, 7))
+    reloaded = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+    assert [c.content for c in reloaded.index_to_chunk] == [
+        f"line {i}" for i in range(7)
+    ]
+
+
+def test_concurrent_writers_do_not_lose_vectors(mock_llm_endpoint, store_path):
+    """
+    Test that two store instances appending to the same directory end up
+    with every vector, in the order published in the manifest.
+    """
+    first = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+    second = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+
+    first.add_documents(make_chunks(0, 2))
+    second.add_documents(make_chunks(2, 4))
+
+    assert second.index.ntotal == 4
+    assert [c.content for c in second.index_to_chunk] == [
+        "line 0",
+        "line 1",
+        "line 2",
+        "line 3",
+    ]
+    reloaded = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+    assert reloaded.index.ntotal == 4
+
+
+def test_legacy_single_file_store_is_migrated(mock_llm_endpoint, store_path):
+    """
+    Test that a store saved as one index file plus a JSON chunk list is
+    loaded and rewritten as segments on the next save.
+    """
+    chunks = make_chunks(0, 3)
+    index = faiss.IndexFlatL2(4)
+    index.add(
+        np.array([mock_llm_endpoint.get_embedding(c.content) for c in chunks]).astype(
+            "float32"
+        )
+    )
+    faiss.write_index(index, store_path)
+    with open(store_path.replace(".index", ".json"), "w") as f:
+        json.dump([c.model_dump_json() for c in chunks], f)
+
+    store = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+    assert store.index.ntotal == 3
+    store.save_to_disk()
+
+    manifest = store.segments.read_manifest()
+    assert [segment.count for segment in manifest.segments] == [3]
+    assert not (store.segments.directory.parent / "vs_test.index").exists()
+    reloaded = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+    assert [c.content for c in reloaded.index_to_chunk] == [
+        "line 0",
+        "line 1",
+        "line 2",
+    ]
+
+
+def test_find_compaction_run():
+    """
+    Test that only runs of enough adjacent small segments are selected.
+    """
+    sizes = [100, 1, 1, 100, 1, 1, 1]
+    segments = [SegmentInfo(name=f"s{i}", count=n) for i, n in enumerate(sizes)]
+
+    assert find_compaction_run(segments, small_segment_size=10, merge_factor=3) == (
+        4,
+        7,
+    )
+    assert find_compaction_run(segments, small_segment_size=10, merge_factor=4) is None
+
+
+def test_deleted_documents_are_hidden_and_persisted(mock_llm_endpoint, store_path):
+    """
+    Test that deleting a document hides its chunks from searches at once,
+    including in stores opened afterwards.
+    """
+    store = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+    store.compaction_tombstone_ratio = 1.0
+    kept, deleted = make_chunks(0, 3), make_chunks(3, 6)
+    store.add_documents(kept)
+    store.add_documents(deleted)
+
+    assert store.delete_documents([deleted[0].document_id]) == 3
+    assert store.delete_documents([deleted[0].document_id]) == 0
+
+    assert store.similarity_search("line 4", k=1)[0].content == "line 2"
+    assert store.segments.read_manifest().tombstones.count == 3
+    reader = FaissVectorStore(
+        llm_endpoint=mock_llm_endpoint, store_path=store_path, read_only=True
+    )
+    assert [c.content for c in reader.similarity_search("line 4", k=5)] == [
+        "line 2",
+        "line 1",
+        "line 0",
+    ]
+
+
+@pytest.mark.parametrize("index_type", [IndexType.FLAT, IndexType.HNSW])
+def test_rebuild_drops_deleted_vectors(mock_llm_endpoint, store_path, index_type):
+    """
+    Test that once enough vectors are deleted the segments are rebuilt
+    without them and ids are renumbered consistently.
+    """
+    policy = IndexPolicy(index_type=index_type, promotion_threshold=4)
+    store = FaissVectorStore(
+        llm_endpoint=mock_llm_endpoint, store_path=store_path, index_policy=policy
+    )
+    first, second, third = make_chunks(0, 2), make_chunks(2, 4), make_chunks(4, 6)
+    for chunks in (first, second, third):
+        store.add_documents(chunks)
+        store.wait_for_background_tasks()
+
+    store.delete_documents([second[0].document_id])
+    store.wait_for_background_tasks()
+
+    manifest = store.segments.read_manifest()
+    assert manifest.generation == 1
+    assert manifest.tombstones is None
+    assert manifest.count == 4
+    assert store.ntotal == 4
+    assert [c.content for c in store.index_to_chunk] == [
+        "line 0",
+        "line 1",
+        "line 4",
+        "line 5",
+    ]
+    assert store.similarity_search("line 3", k=1)[0].content == "line 4"
+    reloaded = FaissVectorStore(
+        llm_endpoint=mock_llm_endpoint, store_path=store_path, index_policy=policy
+    )
+    assert index_type_of(reloaded.index) == index_type
+    assert reloaded.similarity_search("line 5", k=1)[0].content == "line 5"
+
+
+def test_rebuild_keeps_batches_added_while_it_ran(mock_llm_endpoint, store_path):
+    """
+    Test that a rebuild finishing while an ingest has indexed batches it has
+    not saved yet keeps those batches, in memory and on disk.
+    """
+    store = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+    store.compaction_tombstone_ratio = 1.0
+    kept, deleted = make_chunks(0, 2), make_chunks(2, 4)
+    store.add_documents(kept)
+    store.add_documents(deleted)
+    store.delete_documents([deleted[0].document_id])
+    manifest = store.segments.read_manifest()
+
+    # An ingest indexes a batch, and the rebuild swaps before it saves.
+    unsaved = make_chunks(4, 6)
+    vectors = np.array(
+        mock_llm_endpoint.get_embeddings([c.content for c in unsaved]),
+        dtype="float32",
+    )
+    store._index(unsaved, vectors)
+    store._rebuild(manifest)
+
+    expected = ["line 0", "line 1", "line 4", "line 5"]
+    assert [c.content for c in store.index_to_chunk] == expected
+    assert store.similarity_search("line 5", k=1)[0].content == "line 5"
+    reloaded = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+    assert [c.content for c in reloaded.index_to_chunk] == expected
@@ -1,8 +1,16 @@
+import hashlib
+import io
+import os
 import tempfile
+from unittest.mock import patch
 
+import boto3
 import pytest
+from moto import mock_aws
 
+from nexusmind.base_config import MinioConfig
 from nexusmind.storage.local_storage import LocalStorage
+from nexusmind.storage.s3_storage import MIN_PART_SIZE, S3Storage
 
 
 @pytest.fixture
@@ -73,3 +81,86 @@ def test_delete_non_existent_file(tmp_path):
         storage.delete("non_existent_file.txt")
     except Exception as e:
         pytest.fail(f"Deleting a non-existent file raised an exception: {e}")
+
+
+def test_stream_reads_in_pieces(tmp_path):
+    """
+    Test that streaming a local file yields pieces of at most chunk_size.
+    """
+    storage = LocalStorage(base_path=str(tmp_path))
+    content = b"0123456789" * 3
+    storage.save(content, "stream.txt")
+
+    pieces = list(storage.stream("stream.txt", chunk_size=8))
+
+    assert all(len(piece) <= 8 for piece in pieces)
+    assert b"".join(pieces) == content
+
+
+def test_s3_stream_reads_in_pieces():
+    """
+    Test that S3Storage streams an object's body in pieces.
+    """
+    config = MinioConfig.model_construct(bucket="stream-bucket")
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        storage = S3Storage(config=config, s3_client=s3_client)
+        content = b"line\n" * 1000
+        storage.save("big.txt", content)
+
+        pieces = list(storage.stream("big.txt", chunk_size=1024))
+
+    assert len(pieces) == 5
+    assert b"".join(pieces) == content
+
+
+@pytest.fixture
+def s3_storage():
+    """S3Storage on a mocked bucket, with the smallest multipart part size."""
+    config = MinioConfig.model_construct(
+        bucket="upload-bucket", upload_part_size=MIN_PART_SIZE, upload_concurrency=2
+    )
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        yield S3Storage(config=config, s3_client=s3_client)
+
+
+def test_upload_stream_sends_small_files_in_one_request(s3_storage):
+    content = b"small file"
+
+    result = s3_storage.upload_stream("small.txt", io.BytesIO(content))
+
+    assert result.size == len(content)
+    assert result.sha256 == hashlib.sha256(content).hexdigest()
+    assert s3_storage.get("small.txt") == content
+
+
+def test_upload_stream_uses_parallel_multipart_parts(s3_storage):
+    """
+    Test that a large stream is uploaded in parts and hashed on the way.
+    """
+    content = os.urandom(MIN_PART_SIZE) * 2 + b"tail"
+
+    with patch.object(
+        s3_storage.s3_client, "upload_part", wraps=s3_storage.s3_client.upload_part
+    ) as upload_part:
+        result = s3_storage.upload_stream("big.bin", io.BytesIO(content))
+
+    assert upload_part.call_count == 3
+    assert result.size == len(content)
+    assert result.sha256 == hashlib.sha256(content).hexdigest()
+    assert s3_storage.get("big.bin") == content
+
+
+def test_failed_multipart_upload_is_aborted(s3_storage):
+    content = b"x" * (MIN_PART_SIZE * 2)
+
+    with patch.object(
+        s3_storage.s3_client, "upload_part", side_effect=ConnectionError("reset")
+    ):
+        with pytest.raises(ConnectionError):
+            s3_storage.upload_stream("broken.bin", io.BytesIO(content))
+
+    uploads = s3_storage.s3_client.list_multipart_uploads(Bucket="upload-bucket")
+    assert not uploads.get("Uploads")
+    assert not s3_storage.exists("broken.bin")
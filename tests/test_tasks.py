@@ -0,0 +1,122 @@
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+from moto import mock_aws
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel
+
+from nexusmind.database import get_engine
+from nexusmind.models.files import File
+from nexusmind.storage.s3_storage import S3Storage, get_s3_storage
+from nexusmind.tasks import delete_file, init_worker_process, setup_processor_registry
+
+
+@pytest.fixture
+def mock_s3(monkeypatch):
+    """Mocked S3 with fresh process-wide singletons before and after."""
+    monkeypatch.setenv("MINIO_ENDPOINT", "")
+    get_s3_storage.cache_clear()
+    setup_processor_registry.cache_clear()
+    with mock_aws():
+        yield
+    get_s3_storage.cache_clear()
+    setup_processor_registry.cache_clear()
+
+
+def test_worker_process_builds_storage_and_registry_once(mock_s3):
+    """
+    Test that a worker process checks the bucket once and that every task
+    gets the same registry and S3 storage.
+    """
+    with patch.object(
+        S3Storage, "_create_bucket_if_not_exists", autospec=True
+    ) as check_bucket:
+        init_worker_process()
+        registry = setup_processor_registry()
+
+        assert setup_processor_registry() is registry
+        assert registry.get_processor("a.txt").storage is get_s3_storage()
+        assert check_bucket.call_count == 1
+
+
+def test_worker_process_init_drops_inherited_clients(mock_s3):
+    """
+    Test that a freshly forked worker process does not reuse the parent's
+    S3 client.
+    """
+    inherited = get_s3_storage()
+
+    init_worker_process()
+
+    assert get_s3_storage() is not inherited
+    assert setup_processor_registry().get_processor("a.txt").storage is (
+        get_s3_storage()
+    )
+
+
+@pytest.fixture
+def file_engine():
+    """An in-memory database holding the file table."""
+    engine = get_engine(
+        db_url="sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def add_file_records(engine, brain_id, *s3_paths):
+    with Session(engine) as session:
+        records = [
+            File(file_name=path, s3_path=path, brain_id=brain_id) for path in s3_paths
+        ]
+        session.add_all(records)
+        session.commit()
+        return [record.id for record in records]
+
+
+def run_delete_file(engine, file_id, brain_id):
+    """Runs delete_file with a mocked brain and storage; returns all three."""
+    brain = MagicMock()
+    brain.vector_store.delete_documents.return_value = 3
+    storage = MagicMock()
+    with patch("nexusmind.tasks.get_engine", return_value=engine), patch(
+        "nexusmind.tasks.Brain.load", return_value=brain
+    ), patch("nexusmind.tasks.get_s3_storage", return_value=storage):
+        result = delete_file.apply(args=(str(file_id), str(brain_id))).get()
+    return result, brain, storage
+
+
+def test_delete_file_removes_chunks_object_and_record(file_engine):
+    """
+    Test that deleting a file deletes the chunks whose document_id is the
+    file record's id, the stored object and the record.
+    """
+    brain_id = uuid.uuid4()
+    (file_id,) = add_file_records(file_engine, brain_id, "a.txt")
+
+    result, brain, storage = run_delete_file(file_engine, file_id, brain_id)
+
+    assert result["chunks_deleted"] == 3
+    brain.vector_store.delete_documents.assert_called_once_with([file_id])
+    storage.delete.assert_called_once_with("a.txt")
+    with Session(file_engine) as session:
+        assert session.get(File, file_id) is None
+
+
+def test_delete_file_keeps_objects_other_records_use(file_engine):
+    """
+    Test that the stored object of a file uploaded twice under the same name
+    survives deleting one of its records.
+    """
+    brain_id = uuid.uuid4()
+    old_id, new_id = add_file_records(file_engine, brain_id, "a.txt", "a.txt")
+
+    _, _, storage = run_delete_file(file_engine, old_id, brain_id)
+
+    storage.delete.assert_not_called()
+    with Session(file_engine) as session:
+        assert session.get(File, old_id) is None
+        assert session.get(File, new_id) is not None
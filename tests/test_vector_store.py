@@ -1,3 +1,5 @@
+import threading
+import time
 import uuid
 from unittest.mock import Mock
 
@@ -5,8 +7,10 @@ import numpy as np
 import pytest
 
 from nexusmind.llm.llm_endpoint import LLMEndpoint
+from nexusmind.metrics import ingest_stage_totals
 from nexusmind.processor.splitter import Chunk
 from nexusmind.storage.faiss_vector_store import FaissVectorStore
+from nexusmind.storage.index_policy import IndexPolicy, IndexType, index_type_of
 
 # Predefined vectors for testing
 VECTOR_CAT = np.array([0.1, 0.1, 0.8]).astype("float32")
@@ -29,6 +33,9 @@ def mock_llm_endpoint():
         return np.random.rand(3).astype("float32").tolist()
 
     endpoint.get_embedding.side_effect = get_embedding_side_effect
+    endpoint.get_embeddings.side_effect = lambda texts: [
+        get_embedding_side_effect(text) for text in texts
+    ]
     return endpoint
 
 
@@ -85,5 +92,389 @@ def test_empty_search(mock_llm_endpoint):
     assert results == []
 
 
+def test_similarity_search_batch(mock_llm_endpoint, sample_chunks):
+    """
+    Test that a batch search embeds all queries in one call and returns
+    hits with distances for each query in order.
+    """
+    vector_store = FaissVectorStore(llm_endpoint=mock_llm_endpoint)
+    vector_store.add_documents(sample_chunks)
+    mock_llm_endpoint.get_embeddings.reset_mock()
+
+    results = vector_store.similarity_search_batch(
+        ["about dogs", "tech news", "cat pictures"], k=2
+    )
+
+    mock_llm_endpoint.get_embeddings.assert_called_once()
+    assert [hits[0].chunk.content for hits in results] == [
+        "All about dogs.",
+        "All about technology.",
+        "All about cats.",
+    ]
+    assert all(len(hits) == 2 for hits in results)
+    assert results[0][0].distance == pytest.approx(0.0)
+    assert results[0][0].distance <= results[0][1].distance
+
+
+def test_scored_search_applies_cutoffs(mock_llm_endpoint, sample_chunks):
+    """
+    Test that scored search returns distances and scores and drops hits
+    beyond the distance or score cutoffs.
+    """
+    vector_store = FaissVectorStore(llm_endpoint=mock_llm_endpoint)
+    vector_store.add_documents(sample_chunks)
+
+    hits = vector_store.similarity_search_with_scores("about cats", k=3)
+    assert [hit.chunk.content for hit in hits][0] == "All about cats."
+    assert hits[0].distance == pytest.approx(0.0)
+    assert hits[0].score == pytest.approx(1.0)
+    assert hits[1].score < hits[0].score
+
+    assert (
+        len(vector_store.similarity_search_with_scores("cats", k=3, max_distance=0.1))
+        == 1
+    )
+    assert (
+        len(vector_store.similarity_search_with_scores("cats", k=3, min_score=0.9)) == 1
+    )
+
+
+def test_normalized_embeddings_score_by_cosine(mock_llm_endpoint, sample_chunks):
+    """
+    Test that with normalized embeddings scores are cosine similarities.
+    """
+    vector_store = FaissVectorStore(
+        llm_endpoint=mock_llm_endpoint,
+        index_policy=IndexPolicy(normalize_embeddings=True),
+    )
+    vector_store.add_documents(sample_chunks)
+
+    hits = vector_store.similarity_search_with_scores("cats", k=2)
+
+    cosine = VECTOR_CAT @ VECTOR_DOG / (np.linalg.norm(VECTOR_CAT) ** 2)
+    assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+    assert hits[1].score == pytest.approx(cosine, abs=1e-5)
+
+
+@pytest.mark.parametrize(
+    "index_type,exact_limit",
+    [
+        (IndexType.FLAT, 10_000),
+        (IndexType.HNSW, 10_000),
+        (IndexType.IVF_FLAT, 10_000),
+        (IndexType.IVF_PQ, 10_000),
+        # Without the exact scan IVF has to probe more lists instead.
+        (IndexType.IVF_FLAT, 0),
+        (IndexType.IVF_PQ, 0),
+    ],
+)
+def test_filtered_search_finds_matches_outside_top_k(
+    index_type, exact_limit, tmp_path, monkeypatch
+):
+    """
+    Test that a metadata filter is applied inside the search, so matching
+    chunks are returned even when they are far from the query, whether the
+    selection is scanned exactly or searched through the index.
+    """
+    monkeypatch.setattr(
+        "nexusmind.storage.faiss_vector_store.EXACT_FILTER_LIMIT", exact_limit
+    )
+    rng = np.random.default_rng(3)
+    vectors = {f"line {i}": rng.random(8).astype("float32") for i in range(1100)}
+    endpoint = Mock(spec=LLMEndpoint)
+    endpoint.get_embedding.side_effect = lambda text: vectors[text].tolist()
+    endpoint.get_embeddings.side_effect = lambda texts: [
+        vectors[text].tolist() for text in texts
+    ]
+    # A single probed list would miss most matches of a selective filter.
+    policy = IndexPolicy(index_type=index_type, promotion_threshold=1000, nprobe=1)
+    store = FaissVectorStore(
+        llm_endpoint=endpoint,
+        store_path=str(tmp_path / "vs_test.index"),
+        index_policy=policy,
+    )
+    chunks = [
+        Chunk(
+            document_id=uuid.uuid4(),
+            content=text,
+            metadata={"file_name": f"file{i % 100}.txt"},
+        )
+        for i, text in enumerate(vectors)
+    ]
+    store.add_documents(chunks)
+    store.wait_for_promotion()
+    assert index_type_of(store.index) == index_type
+
+    hits = store.similarity_search_with_scores(
+        "line 0", k=5, filters={"file_name": "file57.txt"}
+    )
+    assert len(hits) == 5
+    assert {hit.chunk.metadata["file_name"] for hit in hits} == {"file57.txt"}
+
+    by_document = store.similarity_search(
+        "line 0", k=3, filters={"document_id": chunks[42].document_id}
+    )
+    assert [chunk.content for chunk in by_document] == ["line 42"]
+
+
+def test_failed_embeddings_keep_chunks_aligned(mock_llm_endpoint, sample_chunks):
+    """
+    Test that a failed embedding does not shift later chunks onto wrong vectors.
+    """
+    embed = mock_llm_endpoint.get_embedding.side_effect
+
+    # The middle chunk ("dogs") fails to embed.
+    mock_llm_endpoint.get_embeddings.side_effect = lambda texts: [
+        [] if "dog" in text else embed(text) for text in texts
+    ]
+    vector_store = FaissVectorStore(llm_endpoint=mock_llm_endpoint)
+
+    vector_store.add_documents(sample_chunks)
+
+    assert vector_store.index.ntotal == 2
+    assert len(vector_store.index_to_chunk) == 2
+    results = vector_store.similarity_search(query="tech news", k=1)
+    assert results[0].content == "All about technology."
+
+
+def test_failed_chunks_are_queued_and_retried(mock_llm_endpoint, sample_chunks):
+    """
+    Test that chunks whose embedding failed are reported, queued and added by
+    a later retry pass without re-embedding the rest.
+    """
+    embed = mock_llm_endpoint.get_embedding.side_effect
+    mock_llm_endpoint.get_embeddings.side_effect = lambda texts: [
+        [] if "dog" in text else embed(text) for text in texts
+    ]
+    vector_store = FaissVectorStore(llm_endpoint=mock_llm_endpoint)
+
+    result = vector_store.add_documents(sample_chunks)
+
+    dog_chunk = sample_chunks[1]
+    assert result.embedded == [sample_chunks[0].chunk_id, sample_chunks[2].chunk_id]
+    assert result.retry == [dog_chunk.chunk_id]
+    assert result.failed == []
+    assert not result.complete
+
+    # The provider recovers; only the queued chunk is embedded again.
+    mock_llm_endpoint.get_embeddings.side_effect = lambda texts: [
+        embed(text) for text in texts
+    ]
+    retried = vector_store.retry_failed()
+
+    assert retried.embedded == [dog_chunk.chunk_id]
+    assert retried.complete
+    assert mock_llm_endpoint.get_embeddings.call_args[0][0] == [dog_chunk.content]
+    assert vector_store.retry_queue == {}
+    assert vector_store.index.ntotal == 3
+    results = vector_store.similarity_search(query="a query about a dog", k=1)
+    assert results[0].content == "All about dogs."
+
+
+def test_chunks_fail_after_max_attempts(mock_llm_endpoint, sample_chunks):
+    """
+    Test that a chunk which keeps failing is reported as failed and dropped
+    from the retry queue.
+    """
+    mock_llm_endpoint.get_embeddings.side_effect = lambda texts: [[] for _ in texts]
+    vector_store = FaissVectorStore(
+        llm_endpoint=mock_llm_endpoint, max_embedding_attempts=2
+    )
+
+    first = vector_store.add_documents(sample_chunks[:1])
+    second = vector_store.retry_failed()
+
+    assert first.retry == [sample_chunks[0].chunk_id]
+    assert second.failed == [sample_chunks[0].chunk_id]
+    assert vector_store.retry_queue == {}
+    assert vector_store.index is None
+
+
+def test_retry_queue_is_persisted(mock_llm_endpoint, sample_chunks, tmp_path):
+    """
+    Test that the retry queue survives reloading the store from disk.
+    """
+    store_path = str(tmp_path / "vs_test.index")
+    embed = mock_llm_endpoint.get_embedding.side_effect
+    mock_llm_endpoint.get_embeddings.side_effect = lambda texts: [
+        [] if "dog" in text else embed(text) for text in texts
+    ]
+    FaissVectorStore(
+        llm_endpoint=mock_llm_endpoint, store_path=store_path
+    ).add_documents(sample_chunks)
+
+    reloaded = FaissVectorStore(llm_endpoint=mock_llm_endpoint, store_path=store_path)
+
+    assert reloaded.index.ntotal == 2
+    assert list(reloaded.retry_queue) == [str(sample_chunks[1].chunk_id)]
+
+
+@pytest.mark.parametrize(
+    "index_type", [IndexType.IVF_FLAT, IndexType.IVF_PQ, IndexType.HNSW]
+)
+def test_index_is_promoted_past_threshold(index_type, tmp_path):
+    """
+    Test that a flat index is migrated to the policy's ANN type once it
+    crosses the promotion threshold, and that a report is written.
+    """
+    rng = np.random.default_rng(42)
+    vectors = {f"line {i}": rng.random(16).astype("float32") for i in range(1200)}
+    endpoint = Mock(spec=LLMEndpoint)
+    endpoint.get_embedding.side_effect = lambda text: vectors[text].tolist()
+    endpoint.get_embeddings.side_effect = lambda texts: [
+        vectors[text].tolist() for text in texts
+    ]
+    policy = IndexPolicy(
+        index_type=index_type, promotion_threshold=1000, nlist=8, pq_m=4, nprobe=8
+    )
+    store_path = str(tmp_path / "vs_test.index")
+    vector_store = FaissVectorStore(
+        llm_endpoint=endpoint, store_path=store_path, index_policy=policy
+    )
+    doc_id = uuid.uuid4()
+
+    vector_store.add_documents(
+        [Chunk(document_id=doc_id, content=text) for text in list(vectors)[:999]]
+    )
+    vector_store.wait_for_promotion()
+    assert index_type_of(vector_store.index) == IndexType.FLAT
+
+    vector_store.add_documents(
+        [Chunk(document_id=doc_id, content=text) for text in list(vectors)[999:]]
+    )
+    vector_store.wait_for_promotion()
+
+    assert index_type_of(vector_store.index) == index_type
+    assert vector_store.index.ntotal == 1200
+    report = vector_store.promotion_report
+    assert report.to_type == index_type
+    assert all(0.0 <= point.recall <= 1.0 for point in report.points)
+    assert (tmp_path / "vs_test" / "promotion.json").exists()
+
+    reloaded = FaissVectorStore(
+        llm_endpoint=endpoint, store_path=store_path, index_policy=policy
+    )
+    assert index_type_of(reloaded.index) == index_type
+    results = reloaded.similarity_search("line 5", k=3)
+    assert 0 < len(results) <= 3
+
+
+@pytest.mark.parametrize("index_type", [IndexType.FLAT, IndexType.HNSW])
+def test_read_only_store_memory_maps_files(index_type, tmp_path):
+    """
+    Test that a read-only store maps the snapshot and segment files, finds
+    vectors in segments written after the snapshot, and refuses writes.
+    """
+    rng = np.random.default_rng(7)
+    vectors = {f"line {i}": rng.random(16).astype("float32") for i in range(1010)}
+    endpoint = Mock(spec=LLMEndpoint)
+    endpoint.get_embedding.side_effect = lambda text: vectors[text].tolist()
+    endpoint.get_embeddings.side_effect = lambda texts: [
+        vectors[text].tolist() for text in texts
+    ]
+    policy = IndexPolicy(index_type=index_type, promotion_threshold=1000)
+    store_path = str(tmp_path / "vs_test.index")
+    writer = FaissVectorStore(
+        llm_endpoint=endpoint, store_path=store_path, index_policy=policy
+    )
+    doc_id = uuid.uuid4()
+    texts = list(vectors)
+    writer.add_documents([Chunk(document_id=doc_id, content=t) for t in texts[:1000]])
+    writer.wait_for_promotion()
+    writer.add_documents([Chunk(document_id=doc_id, content=t) for t in texts[1000:]])
+
+    reader = FaissVectorStore(
+        llm_endpoint=endpoint,
+        store_path=store_path,
+        index_policy=policy,
+        read_only=True,
+    )
+
+    assert reader.ntotal == 1010
+    assert all(isinstance(v, np.memmap) for v in reader._mapped_vectors)
+    if index_type == IndexType.FLAT:
+        assert reader.index is None
+    else:
+        assert index_type_of(reader.index) == IndexType.HNSW
+    assert reader.similarity_search("line 1005", k=1)[0].content == "line 1005"
+    assert reader.similarity_search("line 3", k=1)[0].content == "line 3"
+    with pytest.raises(RuntimeError):
+        reader.add_documents([Chunk(document_id=doc_id, content="line 0")])
+
+
 def create_mock_embedding_and_chunk(embedding_dim=128):
     """Helper function to create a mock embedding and chunk."""
+
+
+def test_add_documents_consumes_generators_in_batches(mock_llm_endpoint):
+    """
+    Test that chunks from a generator are embedded in bounded batches.
+    """
+    doc_id = uuid.uuid4()
+    chunks = (Chunk(document_id=doc_id, content=f"tech note {i}") for i in range(5))
+    vector_store = FaissVectorStore(llm_endpoint=mock_llm_endpoint)
+    vector_store.ingest_batch_size = 2
+
+    result = vector_store.add_documents(chunks)
+
+    assert result.total == 5 and result.complete
+    assert vector_store.ntotal == 5
+    assert sorted(
+        len(call.args[0]) for call in mock_llm_endpoint.get_embeddings.call_args_list
+    ) == [1, 2, 2]
+
+
+def test_add_documents_embeds_batches_concurrently_and_indexes_in_order(
+    mock_llm_endpoint,
+):
+    """
+    Test that several batches are embedded at once, that a slow batch does
+    not reorder the index and that the stages record their work.
+    """
+    doc_id = uuid.uuid4()
+    chunks = [Chunk(document_id=doc_id, content=f"note {i}") for i in range(6)]
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def get_embeddings(texts):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        # The first batch finishes last.
+        time.sleep(0.2 if texts[0] == "note 0" else 0.05)
+        with lock:
+            active[0] -= 1
+        return [[float(text.split()[1]), 1.0, 0.0] for text in texts]
+
+    mock_llm_endpoint.get_embeddings.side_effect = get_embeddings
+    vector_store = FaissVectorStore(
+        llm_endpoint=mock_llm_endpoint, ingest_batch_size=2, ingest_concurrency=3
+    )
+    before = ingest_stage_totals()
+
+    vector_store.add_documents(chunks)
+
+    after = ingest_stage_totals()
+    assert peak[0] == 3
+    assert [vector_store.index_to_chunk[i].content for i in range(6)] == [
+        chunk.content for chunk in chunks
+    ]
+    assert after["embed"]["items"] - before["embed"]["items"] == 6
+    assert after["index"]["items"] - before["index"]["items"] == 6
+
+
+def test_search_uses_a_given_embedding(mock_llm_endpoint, sample_chunks):
+    """
+    Test that a precomputed query embedding is searched without embedding
+    the query again.
+    """
+    vector_store = FaissVectorStore(llm_endpoint=mock_llm_endpoint)
+    vector_store.add_documents(sample_chunks)
+    mock_llm_endpoint.get_embedding.reset_mock()
+
+    hits = vector_store.similarity_search_with_scores(
+        "ignored", k=1, embedding=VECTOR_DOG.tolist()
+    )
+
+    assert hits[0].chunk.content == sample_chunks[1].content
+    mock_llm_endpoint.get_embedding.assert_not_called()
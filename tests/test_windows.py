@@ -0,0 +1,111 @@
+import uuid
+from unittest.mock import Mock
+
+import pytest
+
+from nexusmind.llm.llm_endpoint import LLMEndpoint
+from nexusmind.processor.splitter import Chunk, SplitterConfig, split_lines
+from nexusmind.rag.windows import expand_windows
+from nexusmind.storage.faiss_vector_store import FaissVectorStore
+from nexusmind.storage.vector_store_base import SearchHit
+
+
+@pytest.fixture
+def store():
+    """An in-memory store holding a 10-line log document and a loose chunk."""
+    endpoint = Mock(spec=LLMEndpoint)
+    endpoint.get_embeddings.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    store = FaissVectorStore(llm_endpoint=endpoint)
+    doc_id = uuid.uuid4()
+    store.add_documents(
+        [
+            Chunk(
+                document_id=doc_id,
+                content=f"line {n}",
+                metadata={"file_name": "app.log", "line_number": n},
+            )
+            for n in range(1, 11)
+        ]
+        + [Chunk(document_id=uuid.uuid4(), content="no line number")]
+    )
+    return store
+
+
+def hit(store, i, score):
+    return SearchHit(chunk=store.index_to_chunk[i], distance=1 - score, score=score)
+
+
+def test_hits_are_expanded_and_overlapping_windows_merged(store):
+    """
+    Test that hits on lines 3 and 5 with a window of 1 become one block of
+    lines 2-6, while a hit on line 9 stays a separate block.
+    """
+    hits = [hit(store, 2, 0.5), hit(store, 8, 0.9), hit(store, 4, 0.7)]
+
+    blocks = expand_windows(hits, store, window=1)
+
+    assert [block.chunk.content for block in blocks] == [
+        "line 8\nline 9\nline 10",
+        "line 2\nline 3\nline 4\nline 5\nline 6",
+    ]
+    assert blocks[1].score == 0.7
+    assert blocks[1].chunk.metadata == {
+        "file_name": "app.log",
+        "line_start": 2,
+        "line_end": 6,
+    }
+
+
+def test_hits_without_line_numbers_and_deleted_lines(store):
+    """
+    Test that chunks without a line number pass through unchanged and that
+    deleted lines are left out of windows.
+    """
+    loose = hit(store, 10, 0.4)
+    line_hit = hit(store, 0, 0.8)
+
+    assert expand_windows([loose], store, window=2) == [loose]
+    store.compaction_tombstone_ratio = 1.0
+    store.delete_documents([line_hit.chunk.document_id])
+    assert expand_windows([line_hit], store, window=2)[0].chunk.content == "line 1"
+
+
+def test_overlapping_window_chunks_are_expanded_by_range_without_repeats():
+    """
+    Test that window chunks are expanded around their whole line range and
+    that lines repeated by their overlap appear once in the block.
+    """
+    endpoint = Mock(spec=LLMEndpoint)
+    endpoint.get_embeddings.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    store = FaissVectorStore(llm_endpoint=endpoint)
+    lines = [f"line {i:02d}" for i in range(1, 11)]
+    config = SplitterConfig(strategy="character", chunk_size=30, chunk_overlap=9)
+    store.add_documents(list(split_lines(lines, uuid.uuid4(), "app.log", config)))
+    # Chunks cover lines 1-3, 3-5, 5-7, 7-9 and 9-10.
+    hits = [hit(store, 1, 0.9), hit(store, 3, 0.5)]
+
+    blocks = expand_windows(hits, store, window=1)
+
+    assert len(blocks) == 1
+    assert blocks[0].chunk.content == "\n".join(lines[2:])
+    assert blocks[0].chunk.metadata["line_start"] == 3
+    assert blocks[0].chunk.metadata["line_end"] == 10
+
+
+def test_every_piece_of_a_cut_line_is_kept():
+    """
+    Test that a hit on one piece of a line cut by the splitter expands to
+    the whole line, with its pieces joined, rather than to the last piece.
+    """
+    endpoint = Mock(spec=LLMEndpoint)
+    endpoint.get_embeddings.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    store = FaissVectorStore(llm_endpoint=endpoint)
+    lines = ["short 1", "x" * 10 + "y" * 10 + "z" * 5, "short 3"]
+    config = SplitterConfig(strategy="character", chunk_size=10, chunk_overlap=0)
+    store.add_documents(list(split_lines(lines, uuid.uuid4(), "app.log", config)))
+    # Chunks: "short 1", three pieces of line 2, "short 3".
+    assert store.index_to_chunk[2].content == "y" * 10
+
+    blocks = expand_windows([hit(store, 2, 0.9)], store, window=1)
+
+    assert blocks[0].chunk.content == "\n".join(lines)
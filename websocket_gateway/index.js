@@ -1,7 +1,7 @@
 const express = require('express');
 const http = require('http');
 const { Server } = require('socket.io');
-const axios = require('axios');
+const WebSocket = require('ws');
 
 const app = express();
 const server = http.createServer(app);
@@ -14,8 +14,14 @@ const io = new Server(server, {
   }
 });
 
-// Read the backend URL and API Key from environment variables
-const FASTAPI_URL = process.env.FASTAPI_URL;
+// Read the backend URL and API Key from environment variables.
+// Answers are streamed from the API's WebSocket chat (served publicly under
+// /api/ws/chat). Deployments that only set the old FASTAPI_URL (the /chat
+// endpoint) get the matching WebSocket URL derived from it.
+const FASTAPI_WS_URL = process.env.FASTAPI_WS_URL || (
+  process.env.FASTAPI_URL &&
+  process.env.FASTAPI_URL.replace(/^http/, 'ws').replace(/\/chat\/?$/, '/ws/chat')
+);
 let API_KEY = null;
 
 // Try to get API key from API_KEYS (plural, JSON array) which is used by the API server
@@ -42,14 +48,51 @@ if (!API_KEY) {
 
 
 // Exit if the environment variables are not set. This is a crucial check.
-if (!FASTAPI_URL || !API_KEY) {
-  console.error('FATAL ERROR: The FASTAPI_URL and a valid API Key (from API_KEYS or API_KEY) environment variables must be set.');
+if (!FASTAPI_WS_URL || !API_KEY) {
+  console.error('FATAL ERROR: The FASTAPI_WS_URL (or FASTAPI_URL) and a valid API Key (from API_KEYS or API_KEY) environment variables must be set.');
   process.exit(1);
 }
 
+// Opens the API chat session of one client. The key goes in a header, never
+// in the URL, so it stays out of access logs.
+const openChatSession = (socket) => {
+  const session = new WebSocket(FASTAPI_WS_URL, {
+    headers: { 'X-API-Key': API_KEY },
+  });
+  // Tokens of the answer currently being streamed.
+  let answer = [];
+
+  session.on('message', (raw) => {
+    const data = JSON.parse(raw.toString());
+    if (data.event === 'token') {
+      answer.push(data.text);
+    } else if (data.event === 'done') {
+      socket.emit('message', { answer: answer.join('') });
+      answer = [];
+    } else if (data.event === 'error') {
+      answer = [];
+      socket.emit('message', {
+        error: 'Failed to get response from backend.',
+        details: data.detail,
+      });
+    }
+  });
+
+  session.on('close', (code) => {
+    console.log(`[Socket ${socket.id}] API chat session closed (code ${code}).`);
+  });
+
+  session.on('error', (err) => {
+    console.error(`[Socket ${socket.id}] API chat session error: ${err.message}`);
+  });
+
+  return session;
+};
+
 // Listen for new connections
 io.on('connection', (socket) => {
   console.log(`✅ Client connected: ${socket.id}`);
+  let session = openChatSession(socket);
 
   // Listen for 'message' events from this client
   socket.on('message', async (data) => {
@@ -69,20 +112,20 @@ io.on('connection', (socket) => {
 
       console.log(`[Socket ${socket.id}] Forwarding to FastAPI:`, requestPayload);
 
-      const response = await axios.post(FASTAPI_URL, requestPayload, {
-        headers: {
-          'X-API-Key': API_KEY,
-          'Content-Type': 'application/json',
-        },
-      });
-
-      console.log(`[Socket ${socket.id}] Received from FastAPI:`, response.data);
-
-      // Send the response back to the original client
-      socket.emit('message', response.data);
+      if (session.readyState === WebSocket.CLOSING || session.readyState === WebSocket.CLOSED) {
+        session = openChatSession(socket);
+      }
+      if (session.readyState === WebSocket.CONNECTING) {
+        await new Promise((resolve, reject) => {
+          session.once('open', resolve);
+          session.once('error', reject);
+        });
+      }
+      // The answer is sent back by the session's message handler.
+      session.send(JSON.stringify(requestPayload));
 
     } catch (error) {
-      const errorMessage = error.response ? error.response.data : error.message;
+      const errorMessage = error.message;
       console.error(`[Socket ${socket.id}] Error forwarding to FastAPI:`, errorMessage);
       
       socket.emit('message', { 
@@ -95,6 +138,7 @@ io.on('connection', (socket) => {
   // Listen for client disconnection
   socket.on('disconnect', (reason) => {
     console.log(`❌ Client disconnected: ${socket.id}. Reason: ${reason}`);
+    session.close();
   });
 
   // Listen for any connection errors